@@ -0,0 +1,58 @@
+"""
+Single-frame latency and batched throughput of the Classifier backends on the bundled dataset images,
+with an ONNX Runtime intra-op thread sweep. Backends whose packages or model files are missing are reported
+and skipped. Export the ONNX model first with python -m easysort.sorting.export.
+
+Run from the repository root:
+    python -m benchmarks.bench_backends --threads 1 2 4
+"""
+import argparse
+import time
+
+import numpy as np
+
+from easysort.sorting.backends import DEFAULT_ONNX_MODEL_PATH, make_backend
+from easysort.sorting.dataset import load_images
+
+
+def latencies_ms(backend, frames, batch_size: int) -> np.ndarray:
+    backend.infer(frames[:batch_size]) # warmup
+    times = []
+    for i in range(0, len(frames) - batch_size + 1, batch_size):
+        start = time.perf_counter()
+        backend.infer(frames[i:i + batch_size])
+        times.append((time.perf_counter() - start) * 1e3)
+    return np.asarray(times)
+
+
+def report(name: str, backend, frames, batch_size: int):
+    single = latencies_ms(backend, frames, 1)
+    batched = latencies_ms(backend, frames, batch_size)
+    print(f"{name:24s} p50 {np.percentile(single, 50):7.1f} ms  p90 {np.percentile(single, 90):7.1f} ms  "
+          f"batch {batch_size}: {batch_size * len(batched) / batched.sum() * 1e3:6.1f} frames/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--split", default="test")
+    parser.add_argument("--limit", type=int, default=32)
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--model-path", default=str(DEFAULT_ONNX_MODEL_PATH))
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--backends", nargs="+", default=["onnx", "yolo_world"])
+    args = parser.parse_args()
+
+    frames = load_images(args.split, args.limit)
+    print(f"{len(frames)} frames from {args.split}")
+    configs = []
+    for name in args.backends:
+        if name == "onnx": configs += [(f"onnx ({threads} threads)", name, dict(model_path=args.model_path, intra_op_threads=threads)) for threads in args.threads]
+        else: configs.append((name, name, {}))
+    for label, name, kwargs in configs:
+        try: backend = make_backend(name, **kwargs)
+        except Exception as e: print(f"{label:24s} unavailable: {type(e).__name__}: {e}"); continue
+        report(label, backend, frames, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Compares per-frame and batched detector throughput on the bundled 27-06-2024.v1i.yolov8 images. Both sides
+time backend.infer only: one frame per call against batch_size frames per call. Batching only pays off on
+backends that run a batch as one forward pass (onnx with a dynamic batch export, tinygrad), yolo_world runs
+frame by frame.
+
+Run from the repository root:
+    python -m benchmarks.bench_batch_inference --backend onnx --batch-sizes 1 2 4 8
+"""
+import argparse
+import json
+import time
+
+from easysort.sorting.backends import make_backend
+from easysort.sorting.batching import chunked
+from easysort.sorting.dataset import load_images
+
+
+def frames_per_second(infer, frames, batch_size: int, repeats: int) -> float:
+    batches = chunked(frames, batch_size)
+    infer(batches[0]) # warmup, tinygrad compiles per batch size
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for batch in batches: infer(batch)
+    return repeats * len(frames) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", default="onnx", help="onnx and tinygrad batch, yolo_world does not")
+    parser.add_argument("--backend-kwargs", type=json.loads, default={}, help='JSON, e.g. {"model_path": "model.onnx"}')
+    parser.add_argument("--split", default="train")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[2, 4, 8])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    frames = load_images(args.split, args.limit)
+    backend = make_backend(args.backend, **args.backend_kwargs)
+    if not backend.batched: print(f"{args.backend} runs frames one by one, expect no speedup")
+    per_frame = frames_per_second(backend.infer, frames, 1, args.repeats)
+    print(f"{len(frames)} frames from {args.split}, {args.backend}")
+    print(f"per-frame          : {per_frame:7.2f} frames/s")
+    for batch_size in args.batch_sizes:
+        batched = frames_per_second(backend.infer, frames, batch_size, args.repeats)
+        print(f"batched (size {batch_size:>3}) : {batched:7.2f} frames/s ({batched / per_frame:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
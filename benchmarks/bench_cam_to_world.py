@@ -0,0 +1,25 @@
+"""
+Micro-benchmark of the camera-to-world transform applied to every frame's detections.
+
+Run from the repository root:
+    python -m benchmarks.bench_cam_to_world
+"""
+import timeit
+
+import numpy as np
+
+from easysort.sorting.calibration import load_calibration
+
+
+def main():
+    calibration = load_calibration()
+    rng = np.random.default_rng(0)
+    for n in [1, 50, 500]:
+        top_left = rng.uniform(0, 1100, size=(n, 2))
+        xyxy = np.c_[top_left, top_left + rng.uniform(20, 180, size=(n, 2))].astype(np.float32)
+        number, total = timeit.Timer(lambda: calibration.boxes_to_world(xyxy)).autorange()
+        print(f"{n:>4} detections: {total / number * 1e6:6.2f} us per frame")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""
+Per-event write cost of the DataSaver backends as the database grows. The JSON backend rewrites the
+whole database per save, the event log appends one record, so its cost should stay flat.
+
+Run from the repository root:
+    python -m benchmarks.bench_datasaver_event_log
+"""
+import tempfile
+import time
+from pathlib import Path
+
+from easysort.common.datasaver import DataSaver
+
+MESSAGES = ["success__paper__none", "fail__glass__pickup_failure", "success__plastic__none", "fail__metal__other"]
+
+
+def run(backend: str, save_every_event: bool, n_events: int, report_every: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        datasaver = DataSaver(Path(tmp) / "database.json", backend=backend)
+        start = time.perf_counter()
+        for i in range(1, n_events + 1):
+            datasaver.decode(MESSAGES[i % len(MESSAGES)], save=True)
+            if save_every_event: datasaver.save()
+            if i % report_every == 0:
+                now = time.perf_counter()
+                print(f"{backend:>8}: events {i - report_every:>6}-{i:<6} {(now - start) / report_every * 1e6:8.1f} us/event")
+                start = now
+        datasaver.quit()
+
+
+def main():
+    run("json", save_every_event=True, n_events=500, report_every=100)
+    run("eventlog", save_every_event=False, n_events=20_000, report_every=5_000)
+
+
+if __name__ == "__main__":
+    main()
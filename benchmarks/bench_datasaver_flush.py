@@ -0,0 +1,45 @@
+"""
+Throughput of decode(save=True) with a synchronous save after every event versus background flushing.
+
+Run from the repository root:
+    python -m benchmarks.bench_datasaver_flush --events 100000 --sync-events 200
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from easysort.common.datasaver import DataSaver
+
+MESSAGES = ["success__paper__none", "fail__glass__pickup_failure", "success__plastic__none", "fail__metal__other"]
+
+
+def decodes_per_second(datasaver: DataSaver, n_events: int, save_every_event: bool) -> float:
+    start = time.perf_counter()
+    for i in range(n_events):
+        datasaver.decode(MESSAGES[i % len(MESSAGES)], save=True)
+        if save_every_event: datasaver.save()
+    rate = n_events / (time.perf_counter() - start)
+    datasaver.quit()
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--sync-events", type=int, default=200, help="The synchronous path is slow, so it runs fewer events")
+    parser.add_argument("--flush-interval", type=float, default=1.0)
+    parser.add_argument("--flush-every", type=int, default=10_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sync = decodes_per_second(DataSaver(Path(tmp) / "sync.json"), args.sync_events, save_every_event=True)
+        background_saver = DataSaver(Path(tmp) / "background.json", flush_interval_s=args.flush_interval, flush_every=args.flush_every)
+        background = decodes_per_second(background_saver, args.events, save_every_event=False)
+    print(f"synchronous save : {sync:12,.0f} decodes/s ({args.sync_events} events)")
+    print(f"background flush : {background:12,.0f} decodes/s ({args.events} events, {background_saver.flusher.n_flushes} flushes)")
+    print(f"speedup          : {background / sync:12,.0f}x")
+
+
+if __name__ == "__main__":
+    main()
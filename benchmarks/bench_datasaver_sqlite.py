@@ -0,0 +1,41 @@
+"""
+Insert throughput of the SQLite DataSaver backend and latency of the "picks per minute over the last hour"
+query on a database holding several days of events.
+
+Run from the repository root:
+    python -m benchmarks.bench_datasaver_sqlite
+"""
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from easysort.common.datasaver import APPROVED_MATERIALS, DataSaver, SortEvent
+
+
+def main(n_events: int = 500_000, days: float = 7.0):
+    random.seed(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        datasaver = DataSaver(Path(tmp) / "database.sqlite", backend="sqlite", batch_size=1024)
+        now = time.time()
+        start = time.perf_counter()
+        for i in range(n_events):
+            timestamp = now - days * 86400 * (1 - i / n_events)
+            event = SortEvent(timestamp, random.choice(["success", "fail"]), random.choice(APPROVED_MATERIALS), "none", random.random(), 0.2)
+            datasaver.backend.record(event, datasaver.database)
+        datasaver.backend.flush()
+        print(f"inserted {n_events} events: {n_events / (time.perf_counter() - start):,.0f} events/s")
+
+        for material in [None, "paper"]:
+            start = time.perf_counter()
+            for _ in range(100): rows = datasaver.backend.picks_per_minute(window_s=3600, material=material, now=now)
+            print(f"picks per minute, last hour, material={material}: {len(rows)} rows in {(time.perf_counter() - start) * 10:.2f} ms")
+
+        start = time.perf_counter()
+        database = datasaver.backend.load()
+        print(f"counters derived from {n_events} rows in {(time.perf_counter() - start) * 1000:.1f} ms, paper={database.paper}")
+        datasaver.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Round-trip latency of the delta connector against the PTY-backed fake robot: send a line, await its echo.
+Then the time to complete a sequence of moves with stop-and-wait versus pipelined commands.
+
+Run from the repository root:
+    python -m benchmarks.bench_delta_connector --n 2000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from easysort.system.delta.delta_connector import DeltaConnector
+from easysort.system.delta.simulator import spawn_simulator
+
+
+async def round_trips(port: str, n: int, baud_rate: int) -> list:
+    latencies = []
+    async with DeltaConnector(port, baud_rate=baud_rate) as connector:
+        for i in range(n):
+            start = time.perf_counter()
+            await connector.request((i, 2.5, 0.0))
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def moves(port: str, n: int, pipelined: bool) -> float:
+    async with DeltaConnector(port, window_size=4) as connector:
+        start = time.perf_counter()
+        if pipelined:
+            commands = [await connector.send_command((i, 2.5, 0.0)) for i in range(n)]
+            await asyncio.gather(*(command.done for command in commands))
+        else:
+            for i in range(n): await connector.navigate_to(i, 2.5, 0.0)
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=2000)
+    parser.add_argument("--baud-rate", type=int, default=115200)
+    parser.add_argument("--moves", type=int, default=20)
+    parser.add_argument("--move-time", type=float, default=0.02)
+    args = parser.parse_args()
+    process, port = spawn_simulator()
+    try: latencies = sorted(asyncio.run(round_trips(port, args.n, args.baud_rate)))
+    finally: process.kill(); process.wait()
+    pct = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1e6
+    print(f"{args.n} round trips: mean {statistics.mean(latencies) * 1e6:.0f} us, p50 {pct(0.5):.0f} us, "
+          f"p99 {pct(0.99):.0f} us, max {latencies[-1] * 1e6:.0f} us")
+    print("(the polling connector waited up to 100000 us per message)")
+
+    process, port = spawn_simulator("--move-time", str(args.move_time))
+    try:
+        for pipelined in [False, True]:
+            elapsed = asyncio.run(moves(port, args.moves, pipelined))
+            print(f"{args.moves} moves of {args.move_time * 1000:.0f} ms, {'pipelined' if pipelined else 'stop-and-wait'}: {elapsed * 1000:.0f} ms")
+    finally: process.kill(); process.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+YOLOWorld backend startup with a cold and a warm text embedding cache, each in a fresh process, then the
+cost of switching between class sets at runtime (text encoder versus in-memory cache hit).
+
+Run from the repository root:
+    python -m benchmarks.bench_embedding_cache
+"""
+import argparse
+import multiprocessing as mp
+import tempfile
+import time
+
+CLASS_SETS = [["plastic-bottle", "cardboard-box", "plastic-packaging", "other"],
+              ["bottle-plastic", "carton", "mixed-plastics", "packaging-soft-plastic"]]
+
+
+def startup(cache_dir: str) -> float:
+    start = time.perf_counter()
+    from easysort.sorting.backends import YOLOWorldBackend
+    from easysort.sorting.embedding_cache import TextEmbeddingCache
+    YOLOWorldBackend(classes=CLASS_SETS[0], embedding_cache=TextEmbeddingCache(cache_dir))
+    return time.perf_counter() - start
+
+
+def switching(cache_dir: str) -> tuple:
+    from easysort.sorting.backends import YOLOWorldBackend
+    from easysort.sorting.embedding_cache import TextEmbeddingCache
+    backend = YOLOWorldBackend(classes=CLASS_SETS[0], embedding_cache=TextEmbeddingCache(cache_dir))
+    start = time.perf_counter(); backend.set_classes(CLASS_SETS[1]); encoded = time.perf_counter() - start
+    start = time.perf_counter(); backend.set_classes(CLASS_SETS[0]); cached = time.perf_counter() - start
+    return encoded, cached
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    context = mp.get_context("spawn")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        with context.Pool(1, maxtasksperchild=1) as pool:
+            try: cold = pool.apply(startup, (cache_dir,))
+            except Exception as e: print(f"YOLOWorld unavailable: {type(e).__name__}: {e}"); return
+        warm = []
+        for _ in range(args.repeats):
+            with context.Pool(1, maxtasksperchild=1) as pool: warm.append(pool.apply(startup, (cache_dir,)))
+        print(f"startup, cold cache : {cold:6.2f} s")
+        print(f"startup, warm cache : {min(warm):6.2f} s (best of {args.repeats})")
+    with tempfile.TemporaryDirectory() as cache_dir, context.Pool(1, maxtasksperchild=1) as pool:
+        encoded, cached = pool.apply(switching, (cache_dir,))
+    print(f"set_classes, new set    : {encoded * 1e3:8.1f} ms")
+    print(f"set_classes, cached set : {cached * 1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Frame hand-off from a capture process to an inference process: FrameRing (shared memory, zero copy)
+versus multiprocessing.Queue (pickled frames), at camera rates. Reports the latency from the producer
+having a frame to the consumer holding a usable array, the time the producer spends per frame, and the
+CPU time of both processes.
+
+Run from the repository root:
+    python -m benchmarks.bench_frame_ring --seconds 5
+"""
+import argparse
+import multiprocessing as mp
+import time
+
+import numpy as np
+
+from easysort.common.frame_ring import DEFAULT_FRAME_SHAPE, FrameReader, FrameRing
+
+
+def produce(kind: str, channel, fps: float, n_frames: int, ready, results):
+    frames = [np.random.default_rng(i).integers(0, 256, DEFAULT_FRAME_SHAPE, dtype=np.uint8) for i in range(4)]
+    ring = FrameRing.attach(channel) if kind == "ring" else None
+    ready.wait()
+    cpu_start, put_times, start = time.process_time(), [], time.perf_counter()
+    for i in range(n_frames):
+        time.sleep(max(0.0, start + i / fps - time.perf_counter()))
+        t = time.perf_counter()
+        if ring is not None: ring.write(frames[i % 4], timestamp=t)
+        else: channel.put((t, frames[i % 4]))
+        put_times.append(time.perf_counter() - t)
+    results.put(("producer", np.median(put_times) * 1e3, time.process_time() - cpu_start))
+    if ring is not None: ring.close()
+
+
+def consume(kind: str, channel, n_frames: int, ready, results):
+    reader = FrameReader(FrameRing.attach(channel)) if kind == "ring" else None
+    ready.set()
+    cpu_start, latencies = time.process_time(), []
+    for _ in range(n_frames):
+        if reader is not None:
+            view = reader.next(timeout=5)
+            if view is None: break
+            latencies.append(time.perf_counter() - view.timestamp)
+        else:
+            t, frame = channel.get(timeout=5)
+            latencies.append(time.perf_counter() - t)
+    missed = reader.n_missed if reader is not None else 0
+    results.put(("consumer", np.percentile(latencies, [50, 99]) * 1e3, time.process_time() - cpu_start, missed))
+    if reader is not None: reader.ring.close()
+
+
+def run(kind: str, fps: float, seconds: float) -> dict:
+    context = mp.get_context("spawn")
+    n_frames = int(fps * seconds)
+    ready, results = context.Event(), context.Queue()
+    ring = FrameRing.create(n_slots=8) if kind == "ring" else None
+    channel = ring.name if ring is not None else context.Queue(maxsize=8)
+    processes = [context.Process(target=consume, args=(kind, channel, n_frames, ready, results)),
+                 context.Process(target=produce, args=(kind, channel, fps, n_frames, ready, results))]
+    for process in processes: process.start()
+    reports = dict((report[0], report[1:]) for report in (results.get(timeout=seconds + 30) for _ in processes))
+    for process in processes: process.join()
+    if ring is not None: ring.close(); ring.unlink()
+    (put_ms, producer_cpu), (latency_ms, consumer_cpu, missed) = reports["producer"], reports["consumer"]
+    return {"put_ms": put_ms, "latency_p50_ms": latency_ms[0], "latency_p99_ms": latency_ms[1],
+            "cpu_percent": (producer_cpu + consumer_cpu) / seconds * 100, "missed": missed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--fps", type=float, nargs="+", default=[30, 60])
+    args = parser.parse_args()
+    print(f"{DEFAULT_FRAME_SHAPE} uint8 frames, {args.seconds:.0f} s per run")
+    print(f"{'channel':8s} {'fps':>4s} {'producer ms':>12s} {'latency p50 ms':>15s} {'p99 ms':>8s} {'CPU %':>6s} {'missed':>7s}")
+    for fps in args.fps:
+        for kind in ["queue", "ring"]:
+            r = run(kind, fps, args.seconds)
+            print(f"{kind:8s} {fps:4.0f} {r['put_ms']:12.3f} {r['latency_p50_ms']:15.3f} {r['latency_p99_ms']:8.3f} {r['cpu_percent']:6.1f} {r['missed']:7d}")
+
+
+if __name__ == "__main__":
+    main()
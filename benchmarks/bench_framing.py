@@ -0,0 +1,70 @@
+"""
+Text lines versus binary frames on the delta link: encode/decode cost per command, bytes on the wire,
+and pipelined commands per second against the PTY-backed fake robot.
+
+A pseudo terminal ignores the baud rate, so the wire time at a real baud rate is computed from the frame
+size (10 bits per byte with 8N1) rather than measured.
+
+Run from the repository root:
+    python -m benchmarks.bench_framing
+"""
+import argparse
+import asyncio
+import time
+
+from easysort.system.delta.delta_connector import DeltaConnector
+from easysort.system.delta.framing import FrameDecoder, Opcode, encode_frame
+from easysort.system.delta.simulator import spawn_simulator
+
+N_CODEC = 200_000
+
+
+def codec() -> None:
+    positions = [(i % 640 / 10, i % 490 / 10, 0.0) for i in range(N_CODEC)]
+    start = time.perf_counter()
+    text = [f"{i % 65536}:".encode() + DeltaConnector.encode(xyz) for i, xyz in enumerate(positions)]
+    text_encode = time.perf_counter() - start
+    start = time.perf_counter()
+    binary = [encode_frame(i, Opcode.PICK, *xyz) for i, xyz in enumerate(positions)]
+    binary_encode = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for line in b"".join(text).split(b"\n")[:-1]:
+        seq, _, payload = line.partition(b":")
+        int(seq); [float(value) for value in payload.split(b",")]
+    text_decode = time.perf_counter() - start
+    stream = b"".join(binary)
+    decoder = FrameDecoder()
+    start = time.perf_counter()
+    for i in range(0, len(stream), 4096): decoder.feed(stream[i:i + 4096])
+    binary_decode = time.perf_counter() - start
+
+    for name, messages, encode, decode in [("text", text, text_encode, text_decode), ("binary", binary, binary_encode, binary_decode)]:
+        size = sum(map(len, messages)) / len(messages)
+        wire = ", ".join(f"{size * 10 / baud * 1e6:.0f} us @ {baud}" for baud in (115200, 921600))
+        print(f"{name:7s}: encode {encode / N_CODEC * 1e9:5.0f} ns, decode {decode / N_CODEC * 1e9:5.0f} ns, "
+              f"{size:4.1f} bytes/command (wire {wire})")
+
+
+async def throughput(port: str, n: int, framing: str) -> float:
+    async with DeltaConnector(port, window_size=16, framing=framing) as connector:
+        start = time.perf_counter()
+        commands = [await connector.send_command((i % 64, 2.5, 0.0)) for i in range(n)]
+        await asyncio.gather(*(command.done for command in commands))
+        return n / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--commands", type=int, default=5000)
+    args = parser.parse_args()
+    codec()
+    for framing in ["text", "binary"]:
+        process, port = spawn_simulator("--framing", framing)
+        try: rate = asyncio.run(throughput(port, args.commands, framing))
+        finally: process.kill(); process.wait()
+        print(f"{framing:7s}: {rate:8,.0f} pipelined commands/s over the PTY")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Cost and skip ratio of the MotionGate in front of the detector. Replays the data engine recordings in data/
+when there are any (needs cv2), otherwise synthetic recordings of an empty belt and of a belt with items passing
+through. Reports the time per gated frame and the fraction of frames kept away from the model.
+
+Run from the repository root:
+    python -m benchmarks.bench_gate --downscale 8
+"""
+import argparse
+import time
+
+import numpy as np
+
+from easysort.sorting.dataset import RECORDING_FPS, recordings, replay_recording
+from easysort.sorting.gate import DEFAULT_DOWNSCALE, DEFAULT_REFRESH_INTERVAL_S, MotionGate
+
+SHAPE = (980, 1280, 3)
+
+
+def synthetic(n_frames: int, item_every: int, seed: int = 0):
+    """Belt with noise and flicker, an item entering every item_every frames (0 for none), 40 px per frame."""
+    rng = np.random.default_rng(seed)
+    belt = np.linspace(40, 90, SHAPE[1], dtype=np.float32)[None, :, None].repeat(SHAPE[0], 0).repeat(3, 2)
+    for i in range(n_frames):
+        frame = belt + rng.normal(0, 3, SHAPE).astype(np.float32) + rng.integers(-8, 9)
+        if item_every:
+            x = SHAPE[1] - 40 * (i % item_every)
+            if x + 100 > 0: frame[400:500, max(0, x):x + 100] = 200
+        yield np.clip(frame, 0, 255).astype(np.uint8)
+
+
+def run(name: str, frames, downscale: int, refresh_interval_s: float) -> None:
+    frames = list(frames)
+    gate, times = MotionGate(downscale=downscale, refresh_interval_s=refresh_interval_s), []
+    for i, frame in enumerate(frames):
+        start = time.perf_counter()
+        gate(frame, i / RECORDING_FPS)
+        times.append(time.perf_counter() - start)
+    times = np.array(times[1:]) * 1e6
+    print(f"{name:<28} frames={gate.n_frames:<5} skip_ratio={gate.skip_ratio:.2f} forced={gate.n_forced:<4} "
+          f"p50={np.median(times):.0f}us p99={np.percentile(times, 99):.0f}us")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--downscale", type=int, default=DEFAULT_DOWNSCALE)
+    parser.add_argument("--refresh-interval-s", type=float, default=DEFAULT_REFRESH_INTERVAL_S)
+    parser.add_argument("--frames", type=int, default=300, help="Frames per synthetic recording")
+    args = parser.parse_args()
+    folders = recordings("verified") + recordings("labelled")
+    for folder in folders: run(folder.name, replay_recording(folder), args.downscale, args.refresh_interval_s)
+    if not folders:
+        print("No data engine recordings in data/, replaying synthetic ones")
+        run("synthetic empty belt", synthetic(args.frames, 0), args.downscale, args.refresh_interval_s)
+        run("synthetic item every 5 s", synthetic(args.frames, 5 * RECORDING_FPS), args.downscale, args.refresh_interval_s)
+        run("synthetic item every 2 s", synthetic(args.frames, 2 * RECORDING_FPS), args.downscale, args.refresh_interval_s)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Cost per point of the delta kinematics: closed-form inverse/forward kinematics versus the lookup table,
+reachability checks and move time estimates, for batches of candidate points on the belt.
+
+Run from the repository root:
+    python -m benchmarks.bench_kinematics
+"""
+import time
+
+import numpy as np
+
+from easysort.common.config import load_robot_config
+from easysort.system.delta.kinematics import DeltaKinematics, KinematicsLUT
+
+
+def per_point_us(fn, n_points: int, min_time_s: float = 0.2) -> float:
+    n_calls, start = 0, time.perf_counter()
+    while time.perf_counter() - start < min_time_s: fn(); n_calls += 1
+    return (time.perf_counter() - start) / n_calls / n_points * 1e6
+
+
+def main():
+    kinematics = DeltaKinematics.from_config(load_robot_config())
+    start = time.perf_counter()
+    lut = KinematicsLUT(kinematics)
+    print(f"LUT: {lut.shape} cells at {lut.resolution} cm, {lut.nbytes / 1e6:.1f} MB, built in {time.perf_counter() - start:.2f} s")
+    rng = np.random.default_rng(0)
+    print(f"{'points':>7s} {'inverse':>9s} {'LUT inverse':>12s} {'forward':>9s} {'reachable':>10s} {'LUT reachable':>14s} {'move_time':>10s}  (us per point)")
+    for n in [1, 10, 100, 1000, 100_000]:
+        world = np.stack([rng.uniform(0, 64, n), rng.uniform(0, 49, n), rng.uniform(0, 15, n)], axis=1)
+        points = kinematics.to_robot(world)
+        angles = kinematics.inverse(points)
+        home = np.zeros(3)
+        timings = [per_point_us(lambda: kinematics.inverse(points), n), per_point_us(lambda: lut.inverse(points), n),
+                   per_point_us(lambda: kinematics.forward(angles), n), per_point_us(lambda: kinematics.reachable(points), n),
+                   per_point_us(lambda: lut.reachable(points), n), per_point_us(lambda: kinematics.move_time(home, angles), n)]
+        print(f"{n:7d} " + " ".join(f"{t:{w}.3f}" for t, w in zip(timings, [9, 12, 9, 10, 14, 10])))
+    error = np.abs(lut.inverse(points) - angles)
+    print(f"LUT error over {len(points)} belt points: max {np.degrees(np.nanmax(error)):.4f} deg, "
+          f"mean {np.degrees(np.nanmean(error)):.5f} deg")
+
+
+if __name__ == "__main__":
+    main()
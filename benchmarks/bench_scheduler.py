@@ -0,0 +1,89 @@
+"""
+Items sorted per minute on a simulated belt: the old "most crucial point" rule (pick the item with the
+smallest x, as in _old/lab/run.py) versus PickScheduler, and versus PickScheduler searching the orderings of
+twice as many candidates (--exhaustive-candidates) to show what limiting the search costs. All use the same
+robot model from the delta config, the greedy rule is only offered items the robot can still reach.
+
+Then the time PickScheduler.plan takes for 50 items.
+
+Run from the repository root:
+    python -m benchmarks.bench_scheduler
+"""
+import argparse
+import time
+
+import numpy as np
+
+from easysort.common.config import load_robot_config
+from easysort.sorting.scheduler import PickScheduler
+
+CLASSES = ["plastic-bottle", "cardboard-box", "plastic-packaging", "other"]
+CLASS_WEIGHTS = [0.35, 0.25, 0.3, 0.1]
+BELT_LENGTH, BELT_WIDTH = 64.0, 49.0
+IDLE_STEP_S = 0.05
+
+
+def smallest_x(scheduler: PickScheduler, positions: np.ndarray, classes: list, robot_xy, t_free: float):
+    feasible = scheduler.intercept(positions, robot_xy, t_free).feasible
+    x = np.where((scheduler.class_indices(classes) >= 0) & feasible, positions[:, 0], np.inf)
+    return int(np.argmin(x)) if len(x) and np.isfinite(x.min()) else None
+
+
+def planned(scheduler: PickScheduler, positions: np.ndarray, classes: list, robot_xy, t_free: float):
+    plan = scheduler.plan(positions, classes, robot_xy, t_free)
+    return int(plan.order[0]) if len(plan.order) else None
+
+
+def simulate(scheduler: PickScheduler, policy, items_per_minute: float, duration_s: float, seed: int) -> float:
+    """Returns the number of items sorted per minute."""
+    rng = np.random.default_rng(seed)
+    n = rng.poisson(items_per_minute * duration_s / 60)
+    arrivals = np.sort(rng.uniform(0, duration_s, n))
+    ys = rng.uniform(3, BELT_WIDTH - 3, n)
+    classes = rng.choice(CLASSES, n, p=CLASS_WEIGHTS)
+    picked = np.zeros(n, dtype=bool)
+    robot_xy, t, n_sorted = np.array([32.0, 24.0]), 0.0, 0
+    while t < duration_s:
+        xs = BELT_LENGTH - scheduler.conveyor_speed * (t - arrivals) # Items appear at the upstream edge of the camera view
+        visible = np.flatnonzero((arrivals <= t) & (xs >= 0) & ~picked)
+        positions = np.stack([xs[visible], ys[visible]], axis=1)
+        choice = policy(scheduler, positions, list(classes[visible]), robot_xy, 0.0)
+        if choice is None: t += IDLE_STEP_S; continue
+        index = visible[choice]
+        t_pick, xy, _ = scheduler.intercept(positions[choice:choice + 1], robot_xy, 0.0)
+        drop = scheduler.drop_positions[scheduler.class_indices([classes[index]])[0]]
+        t += t_pick[0] + scheduler.pick_time_s + scheduler.travel_time(np.linalg.norm(drop - xy[0])) + scheduler.drop_time_s
+        robot_xy, picked[index] = drop, True
+        n_sorted += 1
+    return n_sorted / duration_s * 60
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=600.0, help="Simulated seconds per run")
+    parser.add_argument("--seeds", type=int, default=3)
+    parser.add_argument("--exhaustive-candidates", type=int, default=12, help="search_candidates of the last column")
+    args = parser.parse_args()
+    scheduler = PickScheduler.from_config(load_robot_config())
+    exhaustive = PickScheduler.from_config(load_robot_config(), search_candidates=args.exhaustive_candidates)
+    print(f"{'arrivals/min':>12s} {'sortable/min':>12s} {'smallest x':>11s} {'scheduler':>10s} {f'{args.exhaustive_candidates} cands':>10s}")
+    for rate in [20, 40, 60, 90, 120]:
+        runs = [(scheduler, smallest_x), (scheduler, planned), (exhaustive, planned)]
+        results = [[simulate(s, policy, rate, args.duration, seed) for seed in range(args.seeds)] for s, policy in runs]
+        print(f"{rate:12d} {rate * (1 - CLASS_WEIGHTS[-1]):12.0f} {np.mean(results[0]):11.1f} {np.mean(results[1]):10.1f} {np.mean(results[2]):10.1f}")
+
+    rng = np.random.default_rng(0)
+    positions = np.stack([rng.uniform(0, BELT_LENGTH, 50), rng.uniform(0, BELT_WIDTH, 50)], axis=1)
+    classes = list(rng.choice(CLASSES, 50, p=CLASS_WEIGHTS))
+    n = 2000
+    start = time.perf_counter()
+    for _ in range(n): scheduler.plan(positions, classes, (32.0, 24.0))
+    print(f"plan() for 50 items, horizon {scheduler.horizon}: {(time.perf_counter() - start) / n * 1e6:.0f} us")
+    scheduler.horizon = 1
+    start = time.perf_counter()
+    for _ in range(n): scheduler.plan(positions, classes, (32.0, 24.0))
+    print(f"plan() for 50 items, horizon 1: {(time.perf_counter() - start) / n * 1e6:.0f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Overhead of serving frames through InferenceServer instead of calling the model in process: round trip of
+one camera frame over the Unix socket with a model that returns immediately, and throughput with several
+clients sharing the batcher.
+
+Run from the repository root:
+    python -m benchmarks.bench_server --clients 1 2 4
+"""
+import argparse
+import tempfile
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+
+from easysort.sorting.server import InferenceClient, InferenceServer
+
+FRAME_SHAPE = (980, 1280, 3)
+
+
+class InstantClassifier:
+    classes = ["bottle-plastic", "carton", "mixed-plastics", "packaging-soft-plastic"]
+
+    def __init__(self, max_batch_size: int, max_wait_s: float): self.max_batch_size, self.max_wait_s = max_batch_size, max_wait_s
+    def warmup(self, **kwargs): pass
+
+    def infer_batch(self, frames):
+        detections = SimpleNamespace(xyxy=np.zeros((5, 4)), confidence=np.zeros(5), class_id=np.zeros(5, dtype=int), data={"world_xy": np.zeros((5, 2))})
+        return [detections] * len(frames)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=200, help="Frames per client")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--max-wait-s", type=float, default=0.002)
+    args = parser.parse_args()
+    frame = np.random.default_rng(0).integers(0, 256, FRAME_SHAPE, dtype=np.uint8)
+    with tempfile.TemporaryDirectory() as tmp:
+        classifier = InstantClassifier(max(args.clients), args.max_wait_s)
+        with InferenceServer(classifier, Path(tmp) / "bench.sock", keep_warm_s=None) as server:
+            for n_clients in args.clients:
+                latencies = [[] for _ in range(n_clients)]
+                def client_loop(i):
+                    with InferenceClient(server.socket_path) as client:
+                        for _ in range(args.frames):
+                            start = time.perf_counter(); client.infer_raw(frame); latencies[i].append(time.perf_counter() - start)
+                threads = [threading.Thread(target=client_loop, args=(i,)) for i in range(n_clients)]
+                start = time.perf_counter()
+                for thread in threads: thread.start()
+                for thread in threads: thread.join()
+                elapsed = time.perf_counter() - start
+                all_latencies = np.concatenate(latencies) * 1e3
+                print(f"{n_clients} client(s): round trip p50 {np.percentile(all_latencies, 50):5.2f} ms, p99 {np.percentile(all_latencies, 99):5.2f} ms, "
+                      f"{n_clients * args.frames / elapsed:6.0f} frames/s, mean batch {server.batcher.mean_batch_size:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Decode throughput in messages per second: DataSaver.decode on one message at a time versus
+StatusDecoder.feed on raw buffers as read from the robot.
+
+Run from the repository root:
+    python -m benchmarks.bench_status_decoder
+"""
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from easysort.common.datasaver import APPROVED_MATERIALS, DataSaver, StatusDecoder
+
+N_MESSAGES = 200_000
+CHUNK_SIZE = 4096
+
+
+def main():
+    random.seed(0)
+    lines = [f"{random.choice(['success', 'fail'])}__{random.choice(APPROVED_MATERIALS)}__"
+             f"{random.choice(['none', 'pickup_failure', 'lost_while_moving', 'other'])}" for _ in range(N_MESSAGES)]
+    raw = ("\r\n".join(lines) + "\r\n").encode()
+    chunks = [raw[i:i + CHUNK_SIZE] for i in range(0, len(raw), CHUNK_SIZE)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        datasaver = DataSaver(Path(tmp) / "database.json")
+        start = time.perf_counter()
+        for line in raw.decode().splitlines(): datasaver.decode(line, save=True)
+        print(f"DataSaver.decode         : {N_MESSAGES / (time.perf_counter() - start):12,.0f} messages/s")
+
+        decoder = StatusDecoder()
+        start = time.perf_counter()
+        for chunk in chunks: decoder.feed(chunk)
+        decoder.apply_to(datasaver.database)
+        print(f"StatusDecoder.feed       : {N_MESSAGES / (time.perf_counter() - start):12,.0f} messages/s")
+
+        start = time.perf_counter()
+        for chunk in chunks: datasaver.decode_buffer(chunk)
+        print(f"DataSaver.decode_buffer  : {N_MESSAGES / (time.perf_counter() - start):12,.0f} messages/s (incl. events)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Latency versus small item recall of tiled inference on the bundled dataset images. To emulate a belt wider than
+the model input, mosaic x mosaic images are joined into one frame, so every item is mosaic times smaller in the
+letterboxed model input than in the dataset. Each tile grid is run through Classifier.detect with a Tiler (one batch
+per frame) and compared with whole-frame inference. Recall is the fraction of ground truth boxes with a detection of
+the same class at IoU >= 0.5, for all boxes and for the small ones (area below --small-size squared, frame pixels).
+
+Run from the repository root:
+    python -m benchmarks.bench_tiling --backend onnx --mosaic 2 --grids 1x2 2x2 2x3
+"""
+import argparse
+import time
+
+import numpy as np
+
+from easysort.sorting.classifier import Classifier
+from easysort.sorting.dataset import load_images, load_labels
+from easysort.sorting.metrics import iou_matrix, yolo_to_xyxy
+from easysort.sorting.tiling import DEFAULT_OVERLAP, Tiler
+
+
+def mosaics(frames: list, labels: list, n: int):
+    """Joins n x n frames into one, with their ground truth as (xyxy, class_id) in mosaic pixels."""
+    for start in range(0, len(frames) - n * n + 1, n * n):
+        group, group_labels = frames[start:start + n * n], labels[start:start + n * n]
+        height, width = group[0].shape[:2]
+        mosaic = np.zeros((n * height, n * width, 3), dtype=np.uint8)
+        boxes, classes = [], []
+        for i, (frame, label) in enumerate(zip(group, group_labels)):
+            y, x = i // n * height, i % n * width
+            mosaic[y:y + height, x:x + width] = frame[:height, :width]
+            boxes.append(yolo_to_xyxy(label, width, height) + [x, y, x, y]); classes.append(label[:, 0].astype(int))
+        yield mosaic, np.concatenate(boxes), np.concatenate(classes)
+
+
+def recalled(detections, gt_xyxy: np.ndarray, gt_class: np.ndarray, agnostic: bool) -> np.ndarray:
+    if not len(detections.xyxy) or not len(gt_xyxy): return np.zeros(len(gt_xyxy), dtype=bool)
+    iou = iou_matrix(gt_xyxy, detections.xyxy)
+    if not agnostic: iou[gt_class[:, None] != detections.class_id[None]] = 0.0
+    return (iou >= 0.5).any(axis=1)
+
+
+def run(label: str, classifier: Classifier, tiler, samples: list, small_size: float, agnostic: bool) -> None:
+    classifier.tiler = tiler
+    hits, small, latencies = [], [], []
+    classifier.detect(samples[0][0]) # warmup, tinygrad compiles per batch size
+    for frame, gt_xyxy, gt_class in samples:
+        start = time.perf_counter()
+        detections = classifier.detect(frame)
+        latencies.append((time.perf_counter() - start) * 1e3)
+        hits.append(recalled(detections, gt_xyxy, gt_class, agnostic))
+        small.append((gt_xyxy[:, 2:] - gt_xyxy[:, :2]).prod(axis=1) < small_size ** 2)
+    hits, small = np.concatenate(hits), np.concatenate(small)
+    small_recall = f"{hits[small].mean():.3f}" if small.any() else "  n/a"
+    print(f"{label:16s} p50 {np.percentile(latencies, 50):7.1f} ms  p90 {np.percentile(latencies, 90):7.1f} ms  "
+          f"recall {hits.mean():.3f}  small recall {small_recall} ({small.sum()} of {len(small)} boxes)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", default="onnx")
+    parser.add_argument("--split", default="test")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--mosaic", type=int, default=2, help="Dataset images per side of a benchmark frame")
+    parser.add_argument("--grids", nargs="+", default=["1x2", "2x2", "2x3"], help="Tile grids as ROWSxCOLS")
+    parser.add_argument("--overlap", type=float, default=DEFAULT_OVERLAP)
+    parser.add_argument("--no-full-frame", action="store_true", help="Only run the tiles, not the whole frame too")
+    parser.add_argument("--small-size", type=float, default=64, help="Boxes with a smaller area than this squared are small")
+    parser.add_argument("--agnostic", action="store_true", help="Ignore classes, for models not trained on the dataset classes")
+    args = parser.parse_args()
+
+    samples = list(mosaics(load_images(args.split, args.limit), load_labels(args.split, args.limit), args.mosaic))
+    if not samples: raise SystemExit(f"Not enough images in {args.split} for a {args.mosaic}x{args.mosaic} mosaic")
+    print(f"{len(samples)} frames of {samples[0][0].shape[1]}x{samples[0][0].shape[0]} from {args.split}")
+    classifier = Classifier(backend=args.backend)
+    run("whole frame", classifier, None, samples, args.small_size, args.agnostic)
+    for grid in args.grids:
+        rows, cols = map(int, grid.split("x"))
+        tiler = Tiler((rows, cols), args.overlap, full_frame=not args.no_full_frame)
+        run(f"tiles {grid}", classifier, tiler, samples, args.small_size, args.agnostic)
+
+
+if __name__ == "__main__":
+    main()
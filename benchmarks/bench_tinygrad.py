@@ -0,0 +1,79 @@
+"""
+tinygrad versus torch (ultralytics) for the trained YOLOv8n on CPU: cold start (import, load and first
+inference), steady-state single-frame latency, peak memory, and how closely the detections agree.
+
+Every backend runs in a fresh process so imports, kernel compilation and memory are measured from scratch.
+Export the weights for tinygrad first with python -m easysort.sorting.export --format safetensors.
+
+Run from the repository root:
+    python -m benchmarks.bench_tinygrad --limit 32
+"""
+import argparse
+import multiprocessing as mp
+import resource
+import time
+
+import numpy as np
+
+from easysort.sorting.metrics import iou_matrix
+
+BACKENDS = ["ultralytics", "tinygrad"]
+
+
+def run(name: str, split: str, limit: int) -> dict:
+    start = time.perf_counter()
+    from easysort.sorting.backends import make_backend
+    from easysort.sorting.dataset import load_images
+    frames = load_images(split, limit)
+    load_start = time.perf_counter()
+    backend = make_backend(name)
+    detections = backend.infer_raw(frames[:1])
+    cold_start = time.perf_counter() - load_start
+    backend.infer_raw(frames[:1]) # tinygrad captures its JIT on the second call
+    latencies = []
+    for frame in frames:
+        frame_start = time.perf_counter()
+        detections += backend.infer_raw([frame])
+        latencies.append((time.perf_counter() - frame_start) * 1e3)
+    return {"cold_start_s": cold_start, "import_s": load_start - start, "latencies_ms": latencies, "detections": detections[1:],
+            "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+
+
+def agreement(reference: list, other: list, iou_threshold: float = 0.9) -> tuple:
+    """Fraction of reference detections with a same-class match above iou_threshold, and the largest corner error."""
+    matched, total, max_error = 0, 0, 0.0
+    for a, b in zip(reference, other):
+        total += len(a.xyxy)
+        if not len(a.xyxy) or not len(b.xyxy): continue
+        iou = iou_matrix(a.xyxy.astype(np.float64), b.xyxy.astype(np.float64))
+        iou[a.class_id[:, None] != b.class_id[None]] = 0
+        best = iou.argmax(axis=1)
+        hits = iou[np.arange(len(best)), best] >= iou_threshold
+        matched += hits.sum()
+        if hits.any(): max_error = max(max_error, float(np.abs(a.xyxy[hits] - b.xyxy[best[hits]]).max()))
+    return matched / max(total, 1), max_error
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--split", default="test")
+    parser.add_argument("--limit", type=int, default=32)
+    args = parser.parse_args()
+
+    results = {}
+    with mp.get_context("spawn").Pool(1, maxtasksperchild=1) as pool:
+        for name in BACKENDS:
+            try: results[name] = pool.apply(run, (name, args.split, args.limit))
+            except Exception as e: print(f"{name:12s} unavailable: {type(e).__name__}: {e}")
+    print(f"{'backend':12s} {'import s':>9s} {'cold start s':>13s} {'p50 ms':>8s} {'p90 ms':>8s} {'peak RSS MB':>12s}")
+    for name, result in results.items():
+        latencies = np.asarray(result["latencies_ms"])
+        print(f"{name:12s} {result['import_s']:9.2f} {result['cold_start_s']:13.2f} {np.percentile(latencies, 50):8.1f} "
+              f"{np.percentile(latencies, 90):8.1f} {result['peak_rss_mb']:12.0f}")
+    if len(results) == 2:
+        matched, max_error = agreement(results["ultralytics"]["detections"], results["tinygrad"]["detections"])
+        print(f"tinygrad matches {matched:.1%} of the ultralytics detections (IoU >= 0.9), largest corner difference {max_error:.1f} px")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Cost of the latency tracing. Times a bare span, then a synthetic frame loop with the stages of the sorting
+pipeline (capture copy, MotionGate, a matmul standing in for inference, world transform, scheduling, and the
+serial, robot and DataSaver spans of one item per frame) with TRACER disabled and enabled, alternating rounds so
+drift hits both alike. The overhead is the relative change of the median frame time, the target is under 1%.
+
+Run from the repository root:
+    python -m benchmarks.bench_tracing --frames 100 --rounds 5 --inference-size 1024
+"""
+import argparse
+import time
+
+import numpy as np
+
+from easysort.common.tracing import TRACER, Tracer
+from easysort.sorting.gate import MotionGate
+
+SHAPE = (980, 1280, 3)
+
+
+def span_cost(n: int) -> None:
+    for name, tracer in [("disabled", Tracer()), ("enabled", Tracer(enabled=True))]:
+        start = time.perf_counter_ns()
+        with tracer.trace(("frame", 0)):
+            for _ in range(n):
+                with tracer.span("inference"): pass
+        print(f"span {name:<9} {(time.perf_counter_ns() - start) / n:8.0f} ns")
+
+
+def frame_loop(frames: list, weights: np.ndarray, gate: MotionGate, first_seq: int) -> np.ndarray:
+    """Nanoseconds per frame of the traced stages, 14 spans per frame."""
+    times, points = [], np.random.default_rng(0).random((8, 3))
+    for i, source in enumerate(frames):
+        seq, item = first_seq + i, ("item", first_seq + i)
+        start = time.perf_counter_ns()
+        with TRACER.trace(("frame", seq)):
+            with TRACER.span("capture"): frame = source.copy()
+            with TRACER.span("gate"): gate(frame, seq * 0.1)
+            with TRACER.span("inference"):
+                with TRACER.span("preprocess"): x = frame[:weights.shape[0], :weights.shape[0], 1].astype(np.float32)
+                x @ weights
+            with TRACER.span("world_transform"): points @ points.T
+            TRACER.link(item)
+            with TRACER.span("scheduling"): np.argsort(points[:, 0])
+        now = time.perf_counter_ns()
+        for name in ["serial_send", "robot_ack", "robot_move"]: TRACER.record(name, now, now + 1_000, item)
+        with TRACER.span("datasaver_update", item): pass
+        TRACER.finish_item(item)
+        times.append(time.perf_counter_ns() - start)
+    return np.array(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--inference-size", type=int, default=1024, help="Side of the matmul standing in for inference, 1024 is ~8 ms")
+    parser.add_argument("--spans", type=int, default=200_000, help="Iterations of the bare span timing")
+    args = parser.parse_args()
+
+    span_cost(args.spans)
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 255, SHAPE, dtype=np.uint8) for _ in range(8)] * (args.frames // 8 + 1)
+    frames, weights = frames[:args.frames], rng.random((args.inference_size, args.inference_size), dtype=np.float32)
+    medians = {False: [], True: []}
+    for round in range(2 * args.rounds + 1):
+        enabled = round % 2 == 1
+        TRACER.enabled = enabled
+        times = frame_loop(frames, weights, MotionGate(), round * args.frames)
+        if round: medians[enabled].append(np.median(times)) # The first round warms up
+    TRACER.disable()
+    off, on = np.median(medians[False]) / 1e6, np.median(medians[True]) / 1e6
+    print(f"frame disabled {off:8.3f} ms\nframe enabled  {on:8.3f} ms\noverhead {on / off - 1:+.2%}")
+    print(TRACER.format_summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Tracker.update latency on replayed detections, with tens to hundreds of items on the belt at once.
+
+The detections are recorded up front from a simulated belt (items enter upstream, move towards x = 0,
+noisy positions, 5% missed detections, 20% wrong classes) and then replayed frame by frame, so only the
+tracker is timed. Also reports events per item, which should be 1.
+
+Run from the repository root:
+    python -m benchmarks.bench_tracker
+"""
+import argparse
+import time
+
+import numpy as np
+
+from easysort.common.config import load_robot_config
+from easysort.sorting.tracker import Tracker
+
+FPS = 30.0
+N_CLASSES = 4
+
+
+def record(n_items: int, n_frames: int, speed: float, seed: int = 0) -> list:
+    """Frames of (timestamp, positions, class ids, confidences, item ids) with about n_items items in view."""
+    rng = np.random.default_rng(seed)
+    duration = n_frames / FPS
+    view_time = 64.0 / speed
+    n_total = int(n_items * (duration + view_time) / view_time)
+    entry = rng.uniform(-view_time, duration, n_total) # Time at which each item passes x = 64
+    # Spread items over a belt wide enough that they do not overlap, like many lanes of the real 49 cm belt
+    width = max(49.0, n_items * 0.5)
+    ys = rng.uniform(0, width, n_total)
+    true_classes = rng.integers(0, N_CLASSES, n_total)
+    frames = []
+    for frame in range(n_frames):
+        t = frame / FPS
+        xs = 64.0 - speed * (t - entry)
+        visible = np.flatnonzero((xs >= 0) & (xs <= 64.0) & (rng.random(n_total) > 0.05))
+        positions = np.stack([xs[visible], ys[visible]], axis=1) + rng.normal(0, 0.2, (len(visible), 2))
+        classes = np.where(rng.random(len(visible)) < 0.2, rng.integers(0, N_CLASSES, len(visible)), true_classes[visible])
+        frames.append((t, positions, classes, rng.uniform(0.4, 0.95, len(visible)), visible))
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=900)
+    args = parser.parse_args()
+    config = load_robot_config()
+    for n_items in [10, 50, 200, 500]:
+        frames = record(n_items, args.frames, config.conveyor_speed_cm_per_s)
+        tracker = Tracker.from_config(config, N_CLASSES)
+        latencies, events = [], []
+        for t, positions, classes, confidences, items in frames:
+            start = time.perf_counter()
+            _, new = tracker.update(positions, classes, confidences, timestamp=t)
+            latencies.append(time.perf_counter() - start)
+            events.extend(items[new])
+        latencies = np.sort(latencies) * 1e6
+        n_seen = len(np.unique(np.concatenate([frame[4] for frame in frames])))
+        print(f"{n_items:4d} items in view: p50 {np.percentile(latencies, 50):6.0f} us, p99 {np.percentile(latencies, 99):6.0f} us, "
+              f"{len(events) / n_seen:.3f} events per item, {len(set(events)) / n_seen:.3f} items reported")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Type, TypeVar, Union
+
+import yaml
+
+T = TypeVar('T')
+DELTA_CONFIG_PATH = Path(__file__).parents[1] / "system" / "delta" / "config.yaml"
+
+
+@dataclass
+class RobotConfig:
+    name: str
+    camera_points: List[List[float]]
+    world_points: List[List[float]]
+    conveyor_speed_cm_per_s: float
+    xy_max_speed: float
+    xy_acceleration: float
+    pick_time_s: float
+    drop_time_s: float
+    reach_x: List[float]
+    drop_positions: Dict[str, List[float]]
+    kinematics: Dict[str, Any]
+
+
+def load_config(path: Union[str, Path], config_type: Type[T]) -> T: return config_type(**yaml.safe_load(Path(path).read_text()))
+def load_robot_config(path: Union[str, Path] = DELTA_CONFIG_PATH) -> RobotConfig: return load_config(path, RobotConfig)
@@ -1,9 +1,19 @@
 
 from pathlib import Path
 from dataclasses import dataclass, asdict, field, fields
-from typing import Union, Tuple
+from typing import Hashable, List, Optional, Union, Tuple
+from array import array
+import copy
 import json
 import os
+import sys
+import threading
+import time
+
+from easysort.common.logger import EasySortLogger
+from easysort.common.tracing import TRACER
+
+LOGGER = EasySortLogger()
 
 
 @dataclass
@@ -32,6 +42,175 @@ class Database:
 APPROVED_STATUSES = ["fail", "success"]
 APPROVED_MATERIALS = [field.name for field in fields(Database) if field.name not in ["path", "fails"]]
 APPROVED_FAILS_REASONS = [field.name for field in fields(Fails)]
+_STATUSES, _MATERIALS, _FAILS_REASONS = frozenset(APPROVED_STATUSES), frozenset(APPROVED_MATERIALS), frozenset(APPROVED_FAILS_REASONS)
+
+@dataclass
+class SortEvent:
+    timestamp: float
+    status: str
+    material: str
+    reason: str
+    confidence: Optional[float] = None # Detection confidence of the item
+    latency_s: Optional[float] = None # Time from detection until the robot reported the status
+
+    @property
+    def message(self) -> str: return f"{self.status}__{self.material}__{self.reason}"
+
+def database_from_dict(data: dict) -> Database:
+    """Builds a Database from its asdict representation, ignoring keys that are not counters."""
+    database = Database(fails=Fails(**data.get("fails", {})))
+    for material in APPROVED_MATERIALS:
+        if material in data: setattr(database, material, SortType(**data[material]))
+    return database
+
+def count_status_and_material(database: Database, status: str, material: str) -> None:
+    decoded_status = "n_fail" if status == "fail" else "n_success"
+    material_attribute = getattr(database, material)
+    current_count = getattr(material_attribute, decoded_status)
+    setattr(material_attribute, decoded_status, current_count + 1)
+
+def count_reason(database: Database, reason: str) -> None:
+    if reason not in APPROVED_FAILS_REASONS or reason == "none": return
+    current_count = getattr(database.fails, reason)
+    setattr(database.fails, reason, current_count + 1)
+
+class StatusDecoder():
+    """
+    Decodes raw bytes read from the robot in bulk. Every complete "{status}__{material}__{reason}" line in the
+    buffer is counted into flat arrays in a single pass; an incomplete last line is kept for the next feed.
+
+    Every valid line is known up front, so the common case is one dict lookup per line, without splitting
+    or decoding. Lines with an unknown reason are still counted for their status and material, like decode().
+    Call apply_to() to add the counts to a Database.
+    """
+
+    def __init__(self):
+        self.status_counts = array("Q", bytes(8 * 2 * len(APPROVED_MATERIALS))) # [material * 2 + is_success]
+        self.reason_counts = array("Q", bytes(8 * len(APPROVED_FAILS_REASONS)))
+        self.n_decoded, self.n_invalid = 0, 0
+        self._remainder = b""
+        self._table = {}
+        for m, material in enumerate(APPROVED_MATERIALS):
+            for s, status in enumerate(APPROVED_STATUSES):
+                for reason in APPROVED_FAILS_REASONS + ["none"]:
+                    entry = self._entry(status, material, reason, m * 2 + s)
+                    line = f"{status}__{material}__{reason}".encode()
+                    self._table[line] = self._table[line + b"\r"] = entry
+
+    @staticmethod
+    def _entry(status: str, material: str, reason: str, status_index: int) -> tuple:
+        reason_index = APPROVED_FAILS_REASONS.index(reason) if reason in _FAILS_REASONS and reason != "none" else -1
+        return status_index, reason_index, (sys.intern(status), sys.intern(material), sys.intern(reason))
+
+    def _decode_unknown(self, line: bytes) -> Optional[tuple]:
+        splits = line.rstrip(b"\r").split(b"__")
+        if len(splits) != 3: return None
+        status, material, reason = (split.decode(errors="replace") for split in splits)
+        if status not in _STATUSES or material not in _MATERIALS: return None
+        return self._entry(status, material, reason, APPROVED_MATERIALS.index(material) * 2 + APPROVED_STATUSES.index(status))
+
+    def feed(self, buffer: bytes, messages: Optional[list] = None) -> int:
+        """
+        Counts every complete line of buffer. Returns the number of valid messages.
+        If messages is given, the decoded (status, material, reason) tuples are appended to it.
+        """
+        if self._remainder: buffer = self._remainder + buffer
+        lines = buffer.split(b"\n")
+        self._remainder = lines.pop()
+        get, status_counts, reason_counts = self._table.get, self.status_counts, self.reason_counts
+        n_valid = 0
+        for line in lines:
+            entry = get(line)
+            if entry is None:
+                entry = self._decode_unknown(line)
+                if entry is None:
+                    if line.strip(): self.n_invalid += 1
+                    continue
+            status_counts[entry[0]] += 1
+            if entry[1] >= 0: reason_counts[entry[1]] += 1
+            if messages is not None: messages.append(entry[2])
+            n_valid += 1
+        self.n_decoded += n_valid
+        return n_valid
+
+    def apply_to(self, database: Database) -> None:
+        """Adds the counts to database and resets them."""
+        for index, count in enumerate(self.status_counts):
+            if not count: continue
+            material_attribute = getattr(database, APPROVED_MATERIALS[index // 2])
+            decoded_status = "n_success" if APPROVED_STATUSES[index % 2] == "success" else "n_fail"
+            setattr(material_attribute, decoded_status, getattr(material_attribute, decoded_status) + count)
+        for index, count in enumerate(self.reason_counts):
+            if count: setattr(database.fails, APPROVED_FAILS_REASONS[index], getattr(database.fails, APPROVED_FAILS_REASONS[index]) + count)
+        self.reset()
+
+    def reset(self) -> None:
+        self.status_counts = array("Q", bytes(len(self.status_counts) * 8))
+        self.reason_counts = array("Q", bytes(len(self.reason_counts) * 8))
+
+def atomic_write_json(path: Union[str, Path], data: dict, indent: Union[int, None] = None) -> None:
+    """Writes to a temporary file and swaps it in, so readers and crashes never see a half written file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as file:
+        json.dump(data, file, indent=indent)
+        file.flush(); os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+
+class JsonBackend():
+    """Keeps the whole database as one JSON file, rewritten on every save."""
+    keeps_events = False # Whether the backend needs every event, or only the counters
+
+    def __init__(self, database_path: Union[str, Path]):
+        self.database_path = str(database_path)
+
+    def load(self) -> Database:
+        if not os.path.exists(self.database_path): return Database()
+        with open(self.database_path) as file: return database_from_dict(json.load(file))
+
+    def record(self, event: SortEvent, database: Database) -> None: return
+    def record_many(self, events: List[SortEvent], database: Database) -> None: return
+    def save(self, database: Database) -> None: atomic_write_json(self.database_path, asdict(database), indent=4)
+    def close(self, database: Database) -> None: self.save(database)
+
+def make_backend(backend: str, database_path: Union[str, Path], **kwargs):
+    if backend == "json": return JsonBackend(database_path, **kwargs)
+    if backend == "eventlog":
+        from easysort.common.event_log import EventLogBackend
+        return EventLogBackend(database_path, **kwargs)
+    if backend == "sqlite":
+        from easysort.common.sqlite_backend import SQLiteBackend
+        return SQLiteBackend(database_path, **kwargs)
+    raise ValueError(f"Invalid backend: {backend}. Must be one of ['json', 'eventlog', 'sqlite']")
+
+class BackgroundFlusher(threading.Thread):
+    """
+    Flushes a DataSaver every interval_s seconds or every_n_events events, whichever comes first,
+    so the thread calling decode never waits for disk.
+    """
+
+    def __init__(self, datasaver: "DataSaver", interval_s: Optional[float] = None, every_n_events: Optional[int] = None):
+        super().__init__(name="DataSaverFlusher", daemon=True)
+        self.datasaver, self.interval_s, self.every_n_events = datasaver, interval_s, every_n_events
+        self.n_flushes = 0
+        self._n_events = 0
+        self._wake = threading.Event()
+        self._stopped = False
+
+    def events_counted(self, n_events: int = 1) -> None:
+        self._n_events += n_events
+        if self.every_n_events and self._n_events >= self.every_n_events: self._wake.set()
+
+    def run(self) -> None:
+        while not self._stopped:
+            self._wake.wait(self.interval_s)
+            self._wake.clear()
+            if self._stopped or not self._n_events: continue
+            self._n_events = 0
+            try: self.datasaver.flush(); self.n_flushes += 1
+            except OSError as err: LOGGER.error(f"Background flush of {self.datasaver.database_path} failed: {err}")
+
+    def stop(self) -> None:
+        self._stopped = True; self._wake.set(); self.join()
 
 class DataSaver():
     """
@@ -42,39 +221,87 @@ class DataSaver():
     - encode(status, container, reason) -> str: Encode the information into parsable message
     - is_valid_movement_message() -> bool: Checks if the message is one that could potentially be decoded and saved.
     - quit() -> None: Safely save and quit the database
+
+    With flush_interval_s and/or flush_every set, saved decodes only update the counters in memory and a
+    BackgroundFlusher writes snapshots in the background. A crash then loses at most one flush interval.
+
+    Storage backends:
+    - "json": the database is one JSON file, rewritten by save()
+    - "eventlog": every saved decode appends one record to a log, see easysort/common/event_log.py
+    - "sqlite": every saved decode is one row with timestamp, confidence and latency, see easysort/common/sqlite_backend.py
     """
 
-    def __init__(self, database_path: Union[str, Path]):
+    def __init__(self, database_path: Union[str, Path], backend: str = "json", flush_interval_s: Optional[float] = None,
+                 flush_every: Optional[int] = None, **backend_kwargs):
         self.database_path = str(database_path)
+        self.backend = make_backend(backend, self.database_path, **backend_kwargs)
         self.database = self._load_db()
+        self._lock = threading.Lock() # Guards the counters and pending events against the flusher
+        self._flush_lock = threading.Lock() # Serialises backend writes
+        self._pending_events: List[SortEvent] = []
+        self._decoder = StatusDecoder()
+        self.flusher = None
+        if flush_interval_s or flush_every:
+            self.flusher = BackgroundFlusher(self, flush_interval_s, flush_every); self.flusher.start()
 
     def _load_db(self) -> Database: # TODO: load from online db?
-        if not os.path.exists(self.database_path):
-            return Database()
-        data = json.load(open(self.database_path))
-        return Database(**data)
+        return self.backend.load()
 
     def save(self) -> None: # TODO: Save to online db?
-        with open(self.database_path, 'w') as file:
-            json.dump(asdict(self.database), file, indent=4)
+        if self.flusher is not None: self.flush(); return
+        with self._flush_lock: self.backend.save(self.database)
+
+    def flush(self) -> None:
+        """Writes a snapshot of the counters (and the pending events, for backends keeping every event)."""
+        with self._flush_lock:
+            with self._lock:
+                events, self._pending_events = self._pending_events, []
+                snapshot = copy.deepcopy(self.database)
+            if self.backend.keeps_events and events: self.backend.record_many(events, snapshot)
+            self.backend.save(snapshot)
 
-    def decode(self, response: bytes, save: bool = False) -> Tuple[str, str, str]:
+    def decode(self, response: bytes, save: bool = False, confidence: Optional[float] = None,
+               latency_s: Optional[float] = None, trace_id: Optional[Hashable] = None) -> Tuple[str, str, str]:
         """
         Decodes the response from robot. Has the option to save the reponse.
         Generally the format is {success/fail}__{material}__{reason}
+        confidence and latency_s are stored with the event by backends that keep per-event rows.
+        With tracing enabled, saving is a datasaver_update span of trace_id, which then ends the item's trace.
 
         Responses could be:
             success__paper__none
             fail__glass__pickup_failure
         """
+        if isinstance(response, bytes): response = response.decode(errors="replace")
         splits = response.split("__")
         if len(splits) != 3: return False
-        status, material, reason = splits[0], splits[1], splits[2]
-        if status not in APPROVED_STATUSES or material not in APPROVED_MATERIALS: return ("", "", "")
-        if save:    
-            self._save_status_and_material(status, material, save=save)
-            self._save_reason(reason, save=save)
+        status, material, reason = splits
+        if status not in _STATUSES or material not in _MATERIALS: return ("", "", "")
+        if save:
+            event = SortEvent(time.time(), status, material, reason, confidence, latency_s)
+            with TRACER.span("datasaver_update", trace_id), self._lock:
+                self._save_status_and_material(status, material)
+                self._save_reason(reason)
+                if self.flusher is None: self.backend.record(event, self.database)
+                else: self._pending_events.append(event); self.flusher.events_counted()
+            if trace_id is not None: TRACER.finish_item(trace_id)
         return status, material, reason
+
+    def decode_buffer(self, buffer: bytes, save: bool = True) -> List[Tuple[str, str, str]]:
+        """
+        Decodes every complete status line in a raw buffer read from the robot, see StatusDecoder.
+        A partial last line is kept and completed by the next buffer. Invalid lines are skipped.
+        """
+        messages = []
+        with TRACER.span("datasaver_update"), self._lock:
+            self._decoder.feed(buffer, messages)
+            if not save: self._decoder.reset(); return messages
+            self._decoder.apply_to(self.database)
+            timestamp = time.time()
+            events = [SortEvent(timestamp, *message) for message in messages]
+            if self.flusher is None: self.backend.record_many(events, self.database)
+            else: self._pending_events.extend(events); self.flusher.events_counted(len(events))
+        return messages
     
     def encode(self, status: str, container: str, reason: dict) -> str:
         """
@@ -85,23 +312,16 @@ class DataSaver():
         # container_str = get_matching_config_string(self.robot_config, container).replace("_position", "")
         return f"{status}__{container}__{reason}"
 
-    def _save_status_and_material(self, status: str, material: str) -> None: 
-        decoded_status = "n_fail" if status == "fail" else "n_success"
-        material_attribute = getattr(self.database, material)
-        current_count = getattr(material_attribute, decoded_status)
-        setattr(material_attribute, decoded_status, current_count + 1)
-    
-    def _save_reason(self, reason: str) -> None:
-        if reason not in APPROVED_FAILS_REASONS or reason == "none": return
-        current_count = getattr(self.database.fails, reason)
-        setattr(self.database.fails, reason, current_count + 1)
+    def _save_status_and_material(self, status: str, material: str) -> None: count_status_and_material(self.database, status, material)
+    def _save_reason(self, reason: str) -> None: count_reason(self.database, reason)
 
     def is_valid_movement_message(self, response: bytes) -> bool:
-        if len(response.split("__")) != 3: return False
-        if response.split("__")[1] not in APPROVED_STATUSES: return False
-        if response.split("__")[0] not in APPROVED_MATERIALS: return False
-        return True
+        if isinstance(response, bytes): response = response.decode(errors="replace")
+        splits = response.split("__")
+        return len(splits) == 3 and splits[0] in _STATUSES and splits[1] in _MATERIALS
     
-    def quit(self): self.save()
+    def quit(self):
+        if self.flusher is not None: self.flusher.stop(); self.flush()
+        self.backend.close(self.database)
 
 
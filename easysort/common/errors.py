@@ -0,0 +1,9 @@
+# Robot
+
+class RobotConnectionError(Exception):
+    def __init__(self, port: str, error: str):
+        super().__init__(f"Failed to connect to robot at {port}: {error}")
+
+class RobotCommunicationError(Exception):
+    def __init__(self, port: str, error: str):
+        super().__init__(f"Failed to communicate with robot at {port}: {error}")
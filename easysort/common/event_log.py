@@ -0,0 +1,134 @@
+import glob
+import json
+import os
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import List, Tuple, Union
+
+from easysort.common.datasaver import (APPROVED_MATERIALS, APPROVED_STATUSES, Database, SortEvent, atomic_write_json,
+                                       count_reason, count_status_and_material, database_from_dict)
+from easysort.common.logger import EasySortLogger
+
+LOGGER = EasySortLogger()
+DEFAULT_FSYNC_EVERY = 32
+DEFAULT_FSYNC_INTERVAL_S = 1.0
+DEFAULT_COMPACT_EVERY = 10_000
+
+
+class EventLogBackend():
+    """
+    Append-only storage for DataSaver. Every saved decode appends one line to the current log
+    ("<timestamp> <status>__<material>__<reason>"), so the cost per event does not depend on how
+    many events came before it.
+
+    Files:
+    - <database_path>: snapshot of the counters, {"generation": g, **asdict(Database)}
+    - <database_path>.log.<g>: events recorded after snapshot g was written
+
+    The log is fsynced every fsync_every events or fsync_interval_s seconds, whichever comes first.
+    Every compact_every events a new log generation is started, a snapshot pointing to it is written
+    atomically and the old log is deleted. At startup the snapshot is loaded and the logs of its generation
+    (and any newer) are replayed. A crash at any point therefore either keeps the old snapshot and replays
+    both logs, or keeps the new snapshot and ignores the old log.
+
+    args:
+        database_path: Path of the snapshot file, logs are placed next to it
+        fsync_every: Number of events between fsyncs
+        fsync_interval_s: Longest time between an event and its fsync (checked when the next event arrives)
+        compact_every: Number of events between snapshots, None to only snapshot on save()/quit()
+    """
+    keeps_events = False # In background flush mode snapshots alone are enough
+
+    def __init__(self, database_path: Union[str, Path], fsync_every: int = DEFAULT_FSYNC_EVERY,
+                 fsync_interval_s: float = DEFAULT_FSYNC_INTERVAL_S, compact_every: Union[int, None] = DEFAULT_COMPACT_EVERY):
+        self.database_path = str(database_path)
+        self.fsync_every, self.fsync_interval_s, self.compact_every = fsync_every, fsync_interval_s, compact_every
+        self.generation = 0
+        self._file = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._since_compaction = 0
+
+    def log_path(self, generation: int) -> str: return f"{self.database_path}.log.{generation}"
+
+    def _log_generations(self) -> List[int]:
+        prefix = f"{self.database_path}.log."
+        return sorted(int(path[len(prefix):]) for path in glob.glob(glob.escape(prefix) + "*") if path[len(prefix):].isdigit())
+
+    def load(self) -> Database:
+        database, self.generation = Database(), 0
+        if os.path.exists(self.database_path):
+            with open(self.database_path) as file: data = json.load(file)
+            database, self.generation = database_from_dict(data), data.get("generation", 0)
+        replayed = 0
+        for generation in self._log_generations():
+            if generation < self.generation: os.remove(self.log_path(generation)); continue
+            replayed += replay(self.log_path(generation), database)
+            self.generation = generation
+        if replayed: LOGGER.info(f"Replayed {replayed} events from the event log of {self.database_path}")
+        truncate_torn_tail(self.log_path(self.generation))
+        self._file = open(self.log_path(self.generation), "a")
+        return database
+
+    def record(self, event: SortEvent, database: Database) -> None: self.record_many([event], database)
+
+    def record_many(self, events: List[SortEvent], database: Database) -> None:
+        """Appends the events. database must already include them, it is what gets snapshotted on compaction."""
+        self._file.write("".join(f"{event.timestamp:.3f} {event.message}\n" for event in events))
+        self._unsynced += len(events); self._since_compaction += len(events)
+        if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval_s: self.sync()
+        if self.compact_every and self._since_compaction >= self.compact_every: self.compact(database)
+
+    def sync(self) -> None:
+        self._file.flush(); os.fsync(self._file.fileno())
+        self._unsynced, self._last_sync = 0, time.monotonic()
+
+    def compact(self, database: Database) -> None:
+        """Writes a snapshot of database and starts a new, empty log."""
+        self.sync()
+        old_generation, old_file = self.generation, self._file
+        self.generation += 1
+        self._file = open(self.log_path(self.generation), "a")
+        atomic_write_json(self.database_path, {"generation": self.generation, **asdict(database)})
+        old_file.close(); os.remove(self.log_path(old_generation))
+        self._since_compaction = 0
+
+    def save(self, database: Database) -> None: self.compact(database)
+
+    def close(self, database: Database) -> None:
+        self.compact(database); self._file.close()
+
+
+def parse_record(line: str) -> Union[Tuple[float, str, str, str], None]:
+    """Parses one log line into (timestamp, status, material, reason), None if the line is not a complete record."""
+    if not line.endswith("\n"): return None # Torn write at the end of the log
+    timestamp, _, message = line.rstrip("\n").partition(" ")
+    splits = message.split("__")
+    if len(splits) != 3 or splits[0] not in APPROVED_STATUSES or splits[1] not in APPROVED_MATERIALS: return None
+    try: return float(timestamp), splits[0], splits[1], splits[2]
+    except ValueError: return None
+
+
+def truncate_torn_tail(log_path: str) -> None:
+    """Cuts a log back to its last newline, so the next append does not continue a torn record of a crash."""
+    if not os.path.exists(log_path): return
+    with open(log_path, "rb+") as file:
+        data = file.read()
+        end = data.rfind(b"\n") + 1
+        if end == len(data): return
+        LOGGER.warning(f"Truncating torn record at the end of {log_path}: {data[end:]!r}")
+        file.truncate(end); file.flush(); os.fsync(file.fileno())
+
+
+def replay(log_path: str, database: Database) -> int:
+    """Applies every complete record of the log to database. Returns the number of events replayed."""
+    n_events = 0
+    with open(log_path) as file:
+        for line in file:
+            record = parse_record(line)
+            if record is None: LOGGER.warning(f"Skipping invalid record in {log_path}: {line!r}"); continue
+            _, status, material, reason = record
+            count_status_and_material(database, status, material); count_reason(database, reason)
+            n_events += 1
+    return n_events
@@ -0,0 +1,198 @@
+"""
+Shared-memory ring buffer of camera frames, to hand frames from a capture process to inference processes
+without pickling or copying them.
+
+One producer writes frames into preallocated slots (in place: acquire() gives the slot to decode into,
+publish() makes it visible). Any number of consumers attach by name and read read-only NumPy views of the
+slots. Every slot carries the sequence number and timestamp of its frame; a slot's sequence is set to -1 while
+it is being written, so a consumer can tell whether the frame it holds was overwritten (an overrun) with
+FrameReader.still_valid, and FrameReader counts the frames it missed because it fell more than n_slots behind.
+
+Layout of the shared block: spec (magic, n_slots, shape, dtype), head (last published sequence), per slot
+sequence and timestamp, then the 64 byte aligned frame slots.
+"""
+import struct
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Callable, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_SLOTS = 8
+DEFAULT_FRAME_SHAPE = (980, 1280, 3)
+DEFAULT_POLL_INTERVAL_S = 0.0002
+_MAGIC = b"ESRING01"
+_SPEC = struct.Struct("<8sQQ4Q8s") # magic, n_slots, ndim, shape (padded to 4), dtype string
+_HEAD_OFFSET = 64
+_SLOTS_OFFSET = 128
+_ALIGN = 64
+_WRITING = -1
+_ATTACH_LOCK = threading.Lock()
+
+
+def _align(n: int) -> int: return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+class FrameView(NamedTuple):
+    seq: int
+    timestamp: float
+    frame: np.ndarray # Read-only view into the shared slot, valid until the producer wraps around to it
+
+
+class FrameRing():
+    """
+    Use FrameRing.create in the producer and FrameRing.attach(name) in consumers. close() in every process,
+    unlink() once in the producer when done (or use the producer as a context manager, which does both).
+    """
+
+    def __init__(self, memory: shared_memory.SharedMemory, owner: bool):
+        self.memory, self.owner = memory, owner
+        magic, self.n_slots, ndim, *shape, dtype = _SPEC.unpack_from(memory.buf)
+        if magic != _MAGIC: raise ValueError(f"{memory.name} is not a frame ring")
+        self.frame_shape, self.dtype = tuple(shape[:ndim]), np.dtype(dtype.rstrip(b"\0").decode())
+        buffer = memory.buf
+        self._head = np.ndarray((1,), np.int64, buffer, _HEAD_OFFSET)
+        self._sequences = np.ndarray((self.n_slots,), np.int64, buffer, _SLOTS_OFFSET)
+        self._timestamps = np.ndarray((self.n_slots,), np.float64, buffer, _SLOTS_OFFSET + 8 * self.n_slots)
+        frames_offset = _align(_SLOTS_OFFSET + 16 * self.n_slots)
+        self._frames = np.ndarray((self.n_slots, *self.frame_shape), self.dtype, buffer, frames_offset)
+        self._readonly = self._frames.view()
+        self._readonly.flags.writeable = False
+        self._writing: Optional[int] = None
+
+    @classmethod
+    def create(cls, n_slots: int = DEFAULT_SLOTS, frame_shape: Tuple[int, ...] = DEFAULT_FRAME_SHAPE, dtype=np.uint8,
+               name: Optional[str] = None) -> "FrameRing":
+        if n_slots < 2: raise ValueError(f"n_slots must be at least 2, got {n_slots}")
+        if not 1 <= len(frame_shape) <= 4: raise ValueError(f"Frames must have 1 to 4 dimensions, got shape {frame_shape}")
+        dtype = np.dtype(dtype)
+        frame_bytes = int(np.prod(frame_shape)) * dtype.itemsize
+        memory = shared_memory.SharedMemory(name, create=True, size=_align(_SLOTS_OFFSET + 16 * n_slots) + n_slots * _align(frame_bytes))
+        shape = tuple(frame_shape) + (0,) * (4 - len(frame_shape))
+        _SPEC.pack_into(memory.buf, 0, _MAGIC, n_slots, len(frame_shape), *shape, dtype.str.encode())
+        ring = cls(memory, owner=True)
+        ring._head[0] = 0
+        ring._sequences[:] = 0
+        return ring
+
+    @classmethod
+    def attach(cls, name: str) -> "FrameRing":
+        try: memory = shared_memory.SharedMemory(name, track=False) # Python >= 3.13
+        except TypeError:
+            # Older versions register attached blocks with the resource tracker too, which unlinks them when this
+            # process exits, or double-unregisters them when the tracker is shared with the producer
+            with _ATTACH_LOCK:
+                register, resource_tracker.register = resource_tracker.register, lambda *args: None
+                try: memory = shared_memory.SharedMemory(name)
+                finally: resource_tracker.register = register
+        return cls(memory, owner=False)
+
+    @property
+    def name(self) -> str: return self.memory.name
+
+    @property
+    def head(self) -> int:
+        """Sequence number of the last published frame, 0 before the first one. Sequences start at 1."""
+        return int(self._head[0])
+
+    # Producer
+
+    def acquire(self) -> np.ndarray:
+        """Writable view of the next slot, to decode the next frame into (e.g. cap.read(image=view)). Then publish()."""
+        seq = self.head + 1
+        slot = seq % self.n_slots
+        self._sequences[slot] = _WRITING
+        self._writing = seq
+        return self._frames[slot]
+
+    def publish(self, timestamp: Optional[float] = None) -> int:
+        """Makes the acquired slot visible to consumers, returns its sequence number."""
+        if self._writing is None: raise RuntimeError("publish() without acquire()")
+        seq, self._writing = self._writing, None
+        slot = seq % self.n_slots
+        self._timestamps[slot] = time.perf_counter() if timestamp is None else timestamp
+        self._sequences[slot] = seq
+        self._head[0] = seq
+        return seq
+
+    def write(self, frame: np.ndarray, timestamp: Optional[float] = None) -> int:
+        """Copies a frame into the next slot and publishes it."""
+        np.copyto(self.acquire(), frame)
+        return self.publish(timestamp)
+
+    # Consumers
+
+    def get(self, seq: int) -> Optional[FrameView]:
+        """The frame with sequence seq, None if it is not published yet or was already overwritten."""
+        slot = seq % self.n_slots
+        if self._sequences[slot] != seq: return None
+        return FrameView(seq, float(self._timestamps[slot]), self._readonly[slot])
+
+    def latest(self) -> Optional[FrameView]:
+        head = self.head
+        return self.get(head) if head else None
+
+    def still_valid(self, view: FrameView) -> bool:
+        """Whether the slot of view still holds its frame, i.e. the data read from it was not overwritten meanwhile."""
+        return bool(self._sequences[view.seq % self.n_slots] == view.seq)
+
+    def close(self) -> None:
+        self._head = self._sequences = self._timestamps = self._frames = self._readonly = None # Views must go before the buffer
+        self.memory.close()
+
+    def unlink(self) -> None: self.memory.unlink()
+
+    def __enter__(self) -> "FrameRing": return self
+    def __exit__(self, *exc) -> None:
+        self.close()
+        if self.owner: self.unlink()
+
+
+class FrameReader():
+    """
+    A consumer's position in a FrameRing. next() returns every frame in order while the consumer keeps up;
+    when it falls more than n_slots behind, the overwritten frames are skipped and counted in n_missed.
+
+    args:
+        latest_only: Always jump to the newest frame (what inference wants), missed frames are still counted
+    """
+
+    def __init__(self, ring: FrameRing, latest_only: bool = False, poll_interval_s: float = DEFAULT_POLL_INTERVAL_S):
+        self.ring, self.latest_only, self.poll_interval_s = ring, latest_only, poll_interval_s
+        self.next_seq = ring.head + 1
+        self.n_read = self.n_missed = self.n_torn = 0
+
+    def next(self, timeout: Optional[float] = None) -> Optional[FrameView]:
+        """Waits for the next frame, None on timeout."""
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while True:
+            head = self.ring.head
+            if head >= self.next_seq:
+                oldest = max(self.next_seq, head - self.ring.n_slots + 2) # The slot after head may be being overwritten
+                seq = head if self.latest_only else oldest
+                view = self.ring.get(seq)
+                if view is not None:
+                    self.n_missed += seq - self.next_seq
+                    self.n_read += 1
+                    self.next_seq = seq + 1
+                    return view
+                self.n_missed += seq - self.next_seq + 1 # Overwritten between reading head and the slot
+                self.next_seq = seq + 1
+                continue
+            if deadline is not None and time.perf_counter() >= deadline: return None
+            time.sleep(self.poll_interval_s)
+
+    def still_valid(self, view: FrameView) -> bool:
+        valid = self.ring.still_valid(view)
+        if not valid: self.n_torn += 1
+        return valid
+
+
+def ring_source(reader: FrameReader, timeout: Optional[float] = 1.0) -> Callable[[], np.ndarray]:
+    """Wraps a FrameReader as a pipeline source, like pipeline.camera_source. Returns read-only views."""
+    def capture():
+        view = reader.next(timeout)
+        if view is None: raise TimeoutError(f"No frame from {reader.ring.name} within {timeout} s")
+        return view.frame
+    return capture
@@ -0,0 +1,9 @@
+"""Motion profiles shared by the sorting planner (intercept.py) and the robot model (kinematics.py)."""
+import numpy as np
+
+
+def travel_time(distance: np.ndarray, max_speed: float, acceleration: float) -> np.ndarray:
+    """Time to travel distance from standstill to standstill with a trapezoidal (or triangular) velocity profile."""
+    distance = np.asarray(distance, dtype=np.float64)
+    ramp_distance = max_speed * max_speed / acceleration # Accelerating to max speed and braking again
+    return np.where(distance < ramp_distance, 2 * np.sqrt(distance / acceleration), distance / max_speed + max_speed / acceleration)
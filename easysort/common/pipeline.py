@@ -0,0 +1,212 @@
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from queue import Empty
+from typing import Any, Callable, List, NamedTuple, Optional, Tuple
+
+from easysort.common.logger import EasySortLogger
+from easysort.common.tracing import TRACER
+
+LOGGER = EasySortLogger()
+SORTING_STAGES = ["capture", "inference", "world_transform", "dispatch"]
+_GET_TIMEOUT = 0.1 # seconds, how often blocked stages check if the pipeline is stopping
+_SOURCE_BACKOFF_S = 0.01 # seconds, wait after a failing source call, doubled per consecutive failure
+_MAX_SOURCE_BACKOFF_S = 1.0
+
+
+class LatestQueue:
+    """
+    Bounded queue with a "keep latest, drop oldest" policy: putting into a full queue never blocks,
+    it evicts the oldest item instead. Consumers therefore always work on the freshest data.
+    """
+
+    def __init__(self, maxsize: int = 1):
+        if maxsize < 1: raise ValueError(f"maxsize must be at least 1, got {maxsize}")
+        self.maxsize = maxsize
+        self.n_put = 0
+        self.n_dropped = 0
+        self._items = deque()
+        self._cond = threading.Condition()
+
+    def put(self, item: Any) -> None:
+        with self._cond:
+            if len(self._items) >= self.maxsize: self._items.popleft(); self.n_dropped += 1
+            self._items.append(item); self.n_put += 1
+            self._cond.notify()
+
+    def get(self, timeout: Optional[float] = None) -> Any:
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items, timeout): raise Empty
+            return self._items.popleft()
+
+    @property
+    def depth(self) -> int: return len(self._items)
+
+
+@dataclass
+class Packet:
+    seq: int
+    t_capture: float
+    payload: Any
+
+
+class CaptureTimed(NamedTuple):
+    """Stage fn to be called as fn(payload, t_capture), with the time.perf_counter() its frame was captured at."""
+    fn: Callable
+
+
+@dataclass
+class StageStats:
+    name: str
+    processed: int = 0
+    skipped: int = 0
+    errors: int = 0
+    queue_depth: int = 0
+    dropped: int = 0
+    busy_s: float = 0.0
+    last_age_s: float = 0.0 # Time from capture until this stage finished the latest packet
+
+
+class Stage:
+    """
+    One step of the pipeline, running in its own thread.
+
+    The first stage is the source: fn() is called repeatedly and returns a new payload (raise StopIteration to end).
+    After a failing call (e.g. an unplugged camera) the source waits before retrying, from _SOURCE_BACKOFF_S doubling
+    up to _MAX_SOURCE_BACKOFF_S while it keeps failing.
+    Every other stage gets the latest payload from its inbox: fn(payload) returns the payload for the next stage,
+    or None when there is nothing to forward. Wrap fn in CaptureTimed to also get the packet's capture time, e.g. for
+    a tracker that must not see the processing jitter of the stages before it.
+    With tracing enabled, every call is a span named after the stage under the trace id ("frame", seq).
+    """
+
+    def __init__(self, name: str, fn: Callable, inbox: Optional[LatestQueue] = None, outbox: Optional[LatestQueue] = None):
+        self.name, self.inbox, self.outbox = name, inbox, outbox
+        self.with_capture_time = isinstance(fn, CaptureTimed)
+        self.fn = fn.fn if self.with_capture_time else fn
+        self.stats = StageStats(name)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"Stage-{name}", daemon=True)
+        self._seq = 0
+        self._consecutive_errors = 0
+
+    def start(self) -> None: self._thread.start()
+    def stop(self) -> None: self._stop.set()
+    def join(self, timeout: Optional[float] = None) -> None: self._thread.join(timeout)
+
+    @property
+    def is_alive(self) -> bool: return self._thread.is_alive()
+
+    def _next_packet(self) -> Optional[Packet]:
+        if self.inbox is not None:
+            try: return self.inbox.get(timeout=_GET_TIMEOUT)
+            except Empty: return None
+        start_ns = time.perf_counter_ns() if TRACER.enabled else 0
+        payload = self.fn()
+        self._seq += 1
+        if start_ns: TRACER.record(self.name, start_ns, time.perf_counter_ns(), ("frame", self._seq))
+        return Packet(self._seq, time.perf_counter(), payload)
+
+    def _call(self, packet: Packet) -> Any:
+        args = (packet.payload, packet.t_capture) if self.with_capture_time else (packet.payload,)
+        if not TRACER.enabled: return self.fn(*args)
+        with TRACER.trace(("frame", packet.seq)), TRACER.span(self.name): return self.fn(*args)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                packet = self._next_packet()
+                if packet is None: continue
+                t0 = time.perf_counter()
+                payload = packet.payload if self.inbox is None else self._call(packet)
+                t1 = time.perf_counter()
+            except StopIteration: LOGGER.info(f"Stage {self.name} reached end of input"); return
+            except Exception as err:
+                self.stats.errors += 1; LOGGER.error(f"Stage {self.name} failed: {err}")
+                if self.inbox is None: self._backoff()
+                continue
+            self._consecutive_errors = 0
+            self.stats.busy_s += t1 - t0
+            self.stats.last_age_s = t1 - packet.t_capture
+            if payload is None: self.stats.skipped += 1; continue
+            self.stats.processed += 1
+            if self.outbox is not None: self.outbox.put(Packet(packet.seq, packet.t_capture, payload))
+
+
+    def _backoff(self) -> None:
+        delay = min(_SOURCE_BACKOFF_S * 2 ** self._consecutive_errors, _MAX_SOURCE_BACKOFF_S)
+        self._consecutive_errors += 1
+        self._stop.wait(delay)
+
+
+class Pipeline:
+    """
+    Runs stages concurrently, connected by bounded LatestQueues. A slow stage makes the stages before it
+    drop frames rather than letting a backlog build up, so downstream data is never older than one queue.
+
+    args:
+        stages: (name, fn) pairs, the first one being the source. See Stage for the fn contracts.
+        queue_size: Capacity of each queue between two stages
+    """
+
+    def __init__(self, stages: List[Tuple[str, Callable]], queue_size: int = 1):
+        if len(stages) < 2: raise ValueError("A pipeline needs a source and at least one more stage")
+        queues = [LatestQueue(queue_size) for _ in stages[1:]]
+        self.stages = [Stage(name, fn, inbox=queues[i - 1] if i > 0 else None, outbox=queues[i] if i < len(queues) else None)
+                       for i, (name, fn) in enumerate(stages)]
+
+    def start(self) -> "Pipeline":
+        for stage in reversed(self.stages): stage.start()
+        LOGGER.info(f"Pipeline started: {' -> '.join(stage.name for stage in self.stages)}")
+        return self
+
+    def stop(self, timeout: Optional[float] = 1.0) -> None:
+        for stage in self.stages: stage.stop()
+        for stage in self.stages: stage.join(timeout)
+
+    def stats(self) -> List[StageStats]:
+        for stage in self.stages:
+            if stage.inbox is not None: stage.stats.queue_depth, stage.stats.dropped = stage.inbox.depth, stage.inbox.n_dropped
+        return [stage.stats for stage in self.stages]
+
+    def log_stats(self) -> None:
+        for s in self.stats():
+            LOGGER.info(f"{s.name}: processed={s.processed} skipped={s.skipped} errors={s.errors} "
+                        f"depth={s.queue_depth} dropped={s.dropped} age={s.last_age_s * 1000:.1f}ms")
+
+    def __enter__(self) -> "Pipeline": return self.start()
+    def __exit__(self, *exc) -> None: self.stop()
+
+
+def camera_source(cap) -> Callable[[], Any]:
+    """Wraps a cv2.VideoCapture as a pipeline source."""
+    def capture():
+        ret, frame = cap.read()
+        if not ret: raise StopIteration
+        return frame
+    return capture
+
+
+def sorting_pipeline(capture: Callable[[], Any], classifier, dispatch: Callable[[Any], Any], queue_size: int = 1,
+                     tracker=None, gate=None) -> Pipeline:
+    """
+    Builds the capture -> inference -> world transform -> robot dispatch pipeline.
+
+    args:
+        capture: Source returning camera frames, e.g. camera_source(cv2.VideoCapture(0))
+        classifier: easysort.sorting.classifier.Classifier
+        dispatch: Called with the world view detections of the freshest frame, sends the pick to the robot
+        tracker: Optional easysort.sorting.tracker.Tracker. Adds a "track" stage before dispatch, and dispatch is
+            then only called with the detections of items seen for the first time (once per item). The tracker gets
+            the capture time of every frame (time.perf_counter()), not the time the track stage runs
+        gate: Optional easysort.sorting.gate.MotionGate. Adds a "gate" stage before inference that drops frames in
+            which the belt did not change, its skipped count is the number of frames that did not reach the model
+    """
+    def dispatch_stage(detections):
+        dispatch(detections)
+        return detections
+    stages = list(zip(SORTING_STAGES, [capture, classifier.detect, classifier.cam_view_to_world_view, dispatch_stage]))
+    if tracker is not None: stages.insert(-1, ("track", CaptureTimed(tracker.new_items)))
+    if gate is not None: stages.insert(1, ("gate", gate.filter))
+    return Pipeline(stages, queue_size=queue_size)
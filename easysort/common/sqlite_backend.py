@@ -0,0 +1,98 @@
+import sqlite3
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+from easysort.common.datasaver import APPROVED_FAILS_REASONS, APPROVED_MATERIALS, Database, SortEvent
+
+DEFAULT_BATCH_SIZE = 64
+DEFAULT_COMMIT_INTERVAL_S = 1.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sort_events (
+    id INTEGER PRIMARY KEY,
+    timestamp REAL NOT NULL,
+    status TEXT NOT NULL,
+    material TEXT NOT NULL,
+    reason TEXT NOT NULL,
+    confidence REAL,
+    latency_s REAL
+);
+CREATE INDEX IF NOT EXISTS idx_sort_events_timestamp ON sort_events (timestamp);
+CREATE INDEX IF NOT EXISTS idx_sort_events_material_timestamp ON sort_events (material, timestamp);
+"""
+_INSERT = "INSERT INTO sort_events (timestamp, status, material, reason, confidence, latency_s) VALUES (?, ?, ?, ?, ?, ?)"
+
+
+class SQLiteBackend():
+    """
+    Stores one row per sort event in a SQLite database in WAL mode.
+
+    Rows are buffered and group-committed: one transaction per batch_size events, or once commit_interval_s
+    has passed since the last commit. The Database counters are not stored, they are derived from the rows
+    with aggregate queries at startup.
+
+    args:
+        database_path: Path of the SQLite file
+        batch_size: Number of events per transaction
+        commit_interval_s: Longest time an event waits for its transaction (checked when the next event arrives)
+    """
+    keeps_events = True
+
+    def __init__(self, database_path: Union[str, Path], batch_size: int = DEFAULT_BATCH_SIZE,
+                 commit_interval_s: float = DEFAULT_COMMIT_INTERVAL_S):
+        self.database_path = str(database_path)
+        self.batch_size, self.commit_interval_s = batch_size, commit_interval_s
+        self.connection = sqlite3.connect(self.database_path, check_same_thread=False) # DataSaver serialises access
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL") # Durable at every checkpoint, WAL keeps the db consistent
+        self.connection.executescript(_SCHEMA)
+        self._pending: List[Tuple] = []
+        self._last_commit = time.monotonic()
+
+    def load(self) -> Database:
+        database = Database()
+        for material, status, count in self.connection.execute("SELECT material, status, COUNT(*) FROM sort_events GROUP BY material, status"):
+            if material in APPROVED_MATERIALS: setattr(getattr(database, material), "n_fail" if status == "fail" else "n_success", count)
+        for reason, count in self.connection.execute("SELECT reason, COUNT(*) FROM sort_events WHERE reason != 'none' GROUP BY reason"):
+            if reason in APPROVED_FAILS_REASONS: setattr(database.fails, reason, count)
+        return database
+
+    def record(self, event: SortEvent, database: Database) -> None:
+        self._pending.append((event.timestamp, event.status, event.material, event.reason, event.confidence, event.latency_s))
+        if len(self._pending) >= self.batch_size or time.monotonic() - self._last_commit >= self.commit_interval_s: self.flush()
+
+    def record_many(self, events: List[SortEvent], database: Database) -> None:
+        self._pending.extend((e.timestamp, e.status, e.material, e.reason, e.confidence, e.latency_s) for e in events)
+        self.flush()
+
+    def flush(self) -> None:
+        """Inserts the buffered events in one transaction."""
+        if self._pending:
+            with self.connection: self.connection.executemany(_INSERT, self._pending)
+            self._pending = []
+        self._last_commit = time.monotonic()
+
+    def save(self, database: Database) -> None: self.flush()
+
+    def close(self, database: Database) -> None:
+        self.flush(); self.connection.close()
+
+    def picks_per_minute(self, window_s: float = 3600, material: Optional[str] = None, status: str = "success",
+                         now: Optional[float] = None) -> List[Tuple[float, int]]:
+        """
+        Returns (minute start timestamp, count) for every minute with events in the last window_s seconds,
+        optionally only for one material. Served by the (timestamp) and (material, timestamp) indexes.
+        """
+        self.flush()
+        since = (time.time() if now is None else now) - window_s
+        query = "SELECT CAST(timestamp / 60 AS INTEGER) * 60 AS minute, COUNT(*) FROM sort_events WHERE timestamp >= ? AND status = ?"
+        params = [since, status]
+        if material is not None: query += " AND material = ?"; params.append(material)
+        return [(float(minute), count) for minute, count in self.connection.execute(query + " GROUP BY minute ORDER BY minute", params)]
+
+    def events(self, since: float = 0.0, material: Optional[str] = None) -> List[SortEvent]:
+        self.flush()
+        query, params = "SELECT timestamp, status, material, reason, confidence, latency_s FROM sort_events WHERE timestamp >= ?", [since]
+        if material is not None: query += " AND material = ?"; params.append(material)
+        return [SortEvent(*row) for row in self.connection.execute(query + " ORDER BY timestamp", params)]
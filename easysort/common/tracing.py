@@ -0,0 +1,243 @@
+"""
+Per-item latency tracing, from the camera exposure to the robot's status update and the DataSaver write.
+
+A span is one stage of work (TRACE_STAGES, or any other name) with a start and end from time.perf_counter_ns,
+recorded under a trace id: ("frame", seq) for the frame stages of the pipeline, ("item", track_id) for the
+stages of a picked item. The Tracker links every item to the frame it was first seen in and the frame it was
+reported in, so an item's timeline covers its frames. Code inside `with TRACER.trace(trace_id)` records its
+spans under that id without passing it around (the pipeline stages do this per packet), so nested spans such as
+preprocess inside inference land on the right frame.
+
+Every span updates a per-stage histogram (log-spaced buckets, 8 per factor of 2 from 1 us to ~70 s) and the last
+max_spans spans are kept for timelines and the Chrome trace export (chrome://tracing or ui.perfetto.dev).
+Tracing is off unless EASYSORT_TRACE=1 is set or TRACER.enable() is called; span() then returns a shared no-op.
+A span costs about a microsecond when enabled (see benchmarks/bench_tracing.py).
+"""
+import bisect
+import json
+import os
+import signal
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, Hashable, List, NamedTuple, Optional, Union
+
+from easysort.common.logger import EasySortLogger
+
+LOGGER = EasySortLogger()
+TRACE_STAGES = ["capture", "gate", "preprocess", "inference", "world_transform", "scheduling", "serial_send", "robot_ack",
+                "robot_move", "datasaver_update"]
+END_TO_END = "end_to_end" # From the first span of an item's frames to finish_item
+DEFAULT_MAX_SPANS = 100_000
+BUCKETS_PER_OCTAVE = 8
+BUCKET_BOUNDS_NS = [int(1_000 * 2 ** (i / BUCKETS_PER_OCTAVE)) for i in range(26 * BUCKETS_PER_OCTAVE)] # 1 us to ~70 s
+ENV_VAR = "EASYSORT_TRACE"
+
+
+class Span(NamedTuple):
+    name: str
+    trace_id: Optional[Hashable]
+    start_ns: int
+    end_ns: int
+    thread_id: int
+
+
+class Histogram():
+    """Counts of durations in the BUCKET_BOUNDS_NS buckets, percentiles are bucket upper bounds."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS_NS) + 1)
+        self.n, self.total_ns, self.max_ns = 0, 0, 0
+
+    def add(self, duration_ns: int) -> None:
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS_NS, duration_ns)] += 1
+        self.n += 1; self.total_ns += duration_ns
+        if duration_ns > self.max_ns: self.max_ns = duration_ns
+
+    def percentile(self, q: float) -> int:
+        """Upper bound of the bucket holding the q-th percentile, in ns (max_ns for the overflow bucket)."""
+        if not self.n: return 0
+        rank, cumulative = q / 100 * self.n, 0
+        for i, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= rank and count: return min(BUCKET_BOUNDS_NS[i], self.max_ns) if i < len(BUCKET_BOUNDS_NS) else self.max_ns
+        return self.max_ns
+
+    def summary(self) -> Dict[str, float]:
+        return {"count": self.n, "mean_ms": self.total_ns / max(self.n, 1) / 1e6, "p50_ms": self.percentile(50) / 1e6,
+                "p90_ms": self.percentile(90) / 1e6, "p99_ms": self.percentile(99) / 1e6, "max_ms": self.max_ns / 1e6}
+
+
+class _NoSpan():
+    def __enter__(self): return self
+    def __exit__(self, *exc) -> None: pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+class _Span():
+    __slots__ = ("tracer", "name", "trace_id", "start_ns")
+
+    def __init__(self, tracer: "Tracer", name: str, trace_id: Optional[Hashable]):
+        self.tracer, self.name, self.trace_id = tracer, name, trace_id
+
+    def __enter__(self):
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc) -> None: self.tracer.record(self.name, self.start_ns, time.perf_counter_ns(), self.trace_id)
+
+
+class _Trace():
+    __slots__ = ("local", "trace_id", "previous")
+
+    def __init__(self, local: threading.local, trace_id: Hashable): self.local, self.trace_id = local, trace_id
+
+    def __enter__(self):
+        self.previous = getattr(self.local, "trace_id", None)
+        self.local.trace_id = self.trace_id
+        return self
+
+    def __exit__(self, *exc) -> None: self.local.trace_id = self.previous
+
+
+class Tracer():
+    """
+    Use the module-level TRACER in instrumented code. All methods are thread safe.
+
+    args:
+        enabled: Record spans. When False, span(), trace() and record() do nothing
+        max_spans: Spans kept for timeline() and export_chrome_trace(), oldest dropped first, and as many trace ids
+            for links and finish_item. Histograms keep all
+    """
+
+    def __init__(self, enabled: bool = False, max_spans: int = DEFAULT_MAX_SPANS):
+        self.enabled, self.max_spans = enabled, max_spans
+        self.spans: "deque[Span]" = deque(maxlen=max_spans)
+        self.histograms: Dict[str, Histogram] = {}
+        self.links: Dict[Hashable, List[Hashable]] = {}
+        self._first_start_ns: Dict[Hashable, int] = {} # Of every trace id, so finish_item does not scan the spans
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def enable(self) -> None: self.enabled = True
+    def disable(self) -> None: self.enabled = False
+
+    def reset(self) -> None:
+        with self._lock: self.spans.clear(); self.histograms.clear(); self.links.clear(); self._first_start_ns.clear()
+
+    @property
+    def current(self) -> Optional[Hashable]:
+        """Trace id set by the innermost trace() of this thread."""
+        return getattr(self._local, "trace_id", None)
+
+    def trace(self, trace_id: Hashable):
+        """Context in which spans without an explicit trace id are recorded under trace_id."""
+        return _Trace(self._local, trace_id) if self.enabled else _NO_SPAN
+
+    def span(self, name: str, trace_id: Optional[Hashable] = None):
+        """Times the with block as a span of stage name, under trace_id or the current trace."""
+        return _Span(self, name, trace_id) if self.enabled else _NO_SPAN
+
+    def record(self, name: str, start_ns: int, end_ns: int, trace_id: Optional[Hashable] = None) -> None:
+        """Records a span measured elsewhere, e.g. from a command being sent to its ack arriving."""
+        if not self.enabled: return
+        if trace_id is None: trace_id = getattr(self._local, "trace_id", None)
+        span = Span(name, trace_id, start_ns, end_ns, threading.get_ident())
+        with self._lock:
+            self.spans.append(span)
+            histogram = self.histograms.get(name)
+            if histogram is None: histogram = self.histograms[name] = Histogram()
+            histogram.add(end_ns - start_ns)
+            if trace_id not in self._first_start_ns:
+                self._first_start_ns[trace_id] = start_ns
+                if len(self._first_start_ns) > self.max_spans: del self._first_start_ns[next(iter(self._first_start_ns))]
+
+    def link(self, trace_id: Hashable, to: Optional[Hashable] = None) -> None:
+        """Adds the spans of to (default the current trace, e.g. the frame an item was seen in) to trace_id's timeline."""
+        if not self.enabled: return
+        to = self.current if to is None else to
+        if to is None or to == trace_id: return
+        with self._lock:
+            linked = self.links.setdefault(trace_id, [])
+            if to not in linked: linked.append(to)
+            if len(self.links) > self.max_spans: del self.links[next(iter(self.links))]
+
+    def timeline(self, trace_id: Hashable) -> List[Span]:
+        """Spans of trace_id and of the traces linked to it, by start time."""
+        with self._lock:
+            ids = {trace_id, *self.links.get(trace_id, [])}
+            spans = [span for span in self.spans if span.trace_id in ids]
+        return sorted(spans, key=lambda span: span.start_ns)
+
+    def finish_item(self, trace_id: Hashable, end_ns: Optional[int] = None) -> Optional[int]:
+        """
+        Records the END_TO_END span of an item, from the first span of it or its linked traces (the capture of the
+        frame it was first seen in) to end_ns, default now. Returns the duration in ns, None if nothing was traced.
+        """
+        if not self.enabled: return None
+        end_ns = time.perf_counter_ns() if end_ns is None else end_ns
+        with self._lock:
+            starts = [self._first_start_ns[i] for i in [trace_id, *self.links.get(trace_id, [])] if i in self._first_start_ns]
+        if not starts: return None
+        self.record(END_TO_END, min(starts), end_ns, trace_id)
+        return end_ns - min(starts)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Histogram summary of every stage, stages of TRACE_STAGES first."""
+        with self._lock: histograms = dict(self.histograms)
+        order = {name: i for i, name in enumerate(TRACE_STAGES + [END_TO_END])}
+        return {name: histograms[name].summary() for name in sorted(histograms, key=lambda name: (order.get(name, len(order)), name))}
+
+    def format_summary(self) -> str:
+        lines = [f"{'stage':18s} {'count':>7s} {'mean ms':>9s} {'p50 ms':>9s} {'p90 ms':>9s} {'p99 ms':>9s} {'max ms':>9s}"]
+        for name, s in self.summary().items():
+            lines.append(f"{name:18s} {s['count']:7d} {s['mean_ms']:9.3f} {s['p50_ms']:9.3f} {s['p90_ms']:9.3f} {s['p99_ms']:9.3f} {s['max_ms']:9.3f}")
+        return "\n".join(lines)
+
+    def dump(self, path: Optional[Union[str, Path]] = None) -> Dict[str, Dict[str, float]]:
+        """Logs the histogram summary, and writes it as JSON to path if given."""
+        summary = self.summary()
+        LOGGER.info("Trace summary\n" + self.format_summary())
+        if path is not None: Path(path).write_text(json.dumps(summary, indent=2))
+        return summary
+
+    def chrome_trace(self) -> dict:
+        """
+        The kept spans as Chrome trace events: one complete ("X") event per span, times in microseconds, the trace
+        id in its args. The item to frame links are in otherData.
+        """
+        pid = os.getpid()
+        with self._lock: spans, links = list(self.spans), {key: list(value) for key, value in self.links.items()}
+        events = [{"name": span.name, "cat": "easysort", "ph": "X", "ts": span.start_ns / 1e3, "dur": (span.end_ns - span.start_ns) / 1e3,
+                   "pid": pid, "tid": span.thread_id, "args": {"id": trace_id_str(span.trace_id)}} for span in spans]
+        return {"traceEvents": events, "displayTimeUnit": "ms",
+                "otherData": {"links": {trace_id_str(item): [trace_id_str(to) for to in linked] for item, linked in links.items()}}}
+
+    def export_chrome_trace(self, path: Union[str, Path]) -> Path:
+        path = Path(path)
+        trace = self.chrome_trace()
+        path.write_text(json.dumps(trace))
+        LOGGER.info(f"Wrote {len(trace['traceEvents'])} spans to {path}")
+        return path
+
+
+def trace_id_str(trace_id: Optional[Hashable]) -> str:
+    """("item", 3) -> "item:3", for JSON."""
+    if isinstance(trace_id, tuple): return ":".join(str(part) for part in trace_id)
+    return "" if trace_id is None else str(trace_id)
+
+
+def dump_on_signal(tracer: Optional[Tracer] = None, signum: int = signal.SIGUSR1, path: Optional[Union[str, Path]] = None,
+                   chrome_trace_path: Optional[Union[str, Path]] = None) -> None:
+    """Dumps the summary (and the Chrome trace) whenever the process receives signum, e.g. kill -USR1 <pid>."""
+    tracer = TRACER if tracer is None else tracer
+    def handler(*_):
+        tracer.dump(path)
+        if chrome_trace_path is not None: tracer.export_chrome_trace(chrome_trace_path)
+    signal.signal(signum, handler)
+
+
+TRACER = Tracer(enabled=os.environ.get(ENV_VAR, "") not in ("", "0"))
@@ -0,0 +1,211 @@
+"""
+Detector backends for Classifier. A backend turns a list of BGR frames into one supervision Detections per
+frame, in camera pixels, with class_id indexing backend.classes.
+
+- "yolo_world": zero-shot YOLOWorld from the inference package (GPU oriented, heavy)
+- "onnx": a YOLOv8 model exported to ONNX (see easysort/sorting/export.py), run with ONNX Runtime on CPU,
+  with the NumPy letterbox and NMS of postprocess.py
+- "tinygrad": the same YOLOv8 model in tinygrad (yolov8_tinygrad.py) with JIT compiled CPU kernels
+- "ultralytics": the trained YOLOv8 weights on torch through ultralytics, the reference for the others
+
+The model files default to the training output (see export.py) and the backends raise FileNotFoundError
+if they are missing.
+"""
+import ast
+from pathlib import Path
+from typing import List, Optional, Sequence, Union
+
+import numpy as np
+
+from easysort.common.logger import EasySortLogger
+from easysort.common.tracing import TRACER
+from easysort.sorting.embedding_cache import TextEmbeddingCache
+from easysort.sorting.export import DEFAULT_WEIGHTS_PATH, require_model_file
+from easysort.sorting.postprocess import (DEFAULT_CONF_THRESHOLD, DEFAULT_INPUT_SIZE, DEFAULT_IOU_THRESHOLD, RawDetections,
+                                          decode_yolov8, preprocess)
+
+LOGGER = EasySortLogger()
+BACKENDS = ["yolo_world", "onnx", "tinygrad", "ultralytics"]
+YOLO_WORLD_CLASSES = ["plastic-bottle", "cardboard-box", "plastic-packaging", "other"]
+DEFAULT_ONNX_MODEL_PATH = DEFAULT_WEIGHTS_PATH.with_suffix(".onnx")
+DEFAULT_SAFETENSORS_PATH = DEFAULT_WEIGHTS_PATH.with_suffix(".safetensors")
+
+
+class DetectorBackend():
+    """
+    Interface of the Classifier backends.
+
+    batched: infer runs a list of frames as one forward pass. Only then do Classifier.infer_batch and FrameBatcher
+        save time, otherwise a batch costs the same as its frames one by one.
+    """
+    classes: List[str]
+    batched: bool = True
+
+    def infer(self, frames: Sequence[np.ndarray]) -> list:
+        """One sv.Detections per frame, in the same order."""
+        raise NotImplementedError
+
+    def set_classes(self, classes: Sequence[str]) -> None:
+        raise NotImplementedError(f"{type(self).__name__} detects the fixed classes it was trained on")
+
+
+def to_detections(raw: RawDetections, classes: Sequence[str]):
+    import supervision as sv
+    return sv.Detections(xyxy=raw.xyxy, confidence=raw.confidence, class_id=raw.class_id,
+                         data={"class_name": np.asarray(classes)[raw.class_id] if len(raw.class_id) else np.empty(0, dtype=str)})
+
+
+class YOLOWorldBackend(DetectorBackend):
+    """
+    Not batched: inference's YOLOWorld runs one image per call.
+
+    args:
+        embedding_cache: Cache of the class prompt text embeddings, so set_classes only runs the CLIP text
+            encoder for class lists it has not seen before. Defaults to ~/.cache/easysort/text_embeddings
+    """
+    batched = False
+
+    def __init__(self, model_id: str = "yolo_world/l", classes: Sequence[str] = YOLO_WORLD_CLASSES,
+                 embedding_cache: Optional[TextEmbeddingCache] = None):
+        from inference.models.yolo_world.yolo_world import YOLOWorld
+        self.model_id = model_id
+        self.model = YOLOWorld(model_id=model_id)
+        self.embedding_cache = embedding_cache if embedding_cache is not None else TextEmbeddingCache()
+        self.set_classes(classes)
+
+    def set_classes(self, classes: Sequence[str]) -> None:
+        classes = list(classes)
+        embeddings = self.embedding_cache.get_or_compute(self.model_id, classes, lambda: self._encode(classes))
+        self._apply_embeddings(classes, embeddings)
+        self.classes = classes
+
+    def _encode(self, classes: List[str]) -> np.ndarray:
+        self.model.set_classes(classes) # Runs the CLIP text encoder
+        return self.model.model.model.txt_feats.detach().float().cpu().numpy()
+
+    def _apply_embeddings(self, classes: List[str], embeddings: np.ndarray) -> None:
+        """What set_classes of inference's YOLOWorld and ultralytics' YOLOWorld do after encoding the prompts."""
+        import torch
+        yolo = self.model.model          # ultralytics YOLOWorld
+        world = yolo.model               # ultralytics WorldModel
+        world.txt_feats = torch.tensor(np.asarray(embeddings), device=next(world.parameters()).device)
+        world.model[-1].nc = len(classes)
+        world.names = classes
+        if yolo.predictor: yolo.predictor.model.names = classes
+        self.model.class_names = classes
+
+    def infer_responses(self, frames: Sequence[np.ndarray]) -> list:
+        """
+        One inference response per frame. inference's YOLOWorld.infer takes a single image, so there is no batched
+        forward pass: a batch (Classifier.infer_batch, the tiles of detect_tiled) costs one model call per frame.
+        """
+        return [self.model.infer(frame) for frame in frames]
+
+    def infer(self, frames: Sequence[np.ndarray]) -> list:
+        import supervision as sv
+        return [sv.Detections.from_inference(response) for response in self.infer_responses(frames)]
+
+
+class OnnxBackend(DetectorBackend):
+    """
+    YOLOv8 ONNX model on the CPU execution provider.
+
+    args:
+        model_path: Model exported with easysort/sorting/export.py (raw output, no NMS in the graph)
+        classes: Class names, read from the model metadata written by the ultralytics exporter if None
+        intra_op_threads: Threads used inside one operator (convolutions), ONNX Runtime picks if None
+        inter_op_threads: Threads running independent operators in parallel
+    """
+
+    def __init__(self, model_path: Union[str, Path] = DEFAULT_ONNX_MODEL_PATH, classes: Optional[Sequence[str]] = None,
+                 conf_threshold: float = DEFAULT_CONF_THRESHOLD, iou_threshold: float = DEFAULT_IOU_THRESHOLD,
+                 intra_op_threads: Optional[int] = None, inter_op_threads: int = 1):
+        require_model_file(model_path)
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        if intra_op_threads is not None: options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = inter_op_threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(str(model_path), options, providers=["CPUExecutionProvider"])
+        self.conf_threshold, self.iou_threshold = conf_threshold, iou_threshold
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.input_size = model_input.shape[2] if isinstance(model_input.shape[2], int) else DEFAULT_INPUT_SIZE
+        self.dynamic_batch = not isinstance(model_input.shape[0], int)
+        self.batched = self.dynamic_batch # Fixed batch exports run frame by frame
+        self.classes = list(classes) if classes is not None else model_classes(self.session)
+        LOGGER.info(f"Loaded ONNX model {model_path} ({len(self.classes)} classes, input {self.input_size}, "
+                    f"{'dynamic' if self.dynamic_batch else 'fixed'} batch)")
+
+    def infer_raw(self, frames: Sequence[np.ndarray]) -> List[RawDetections]:
+        with TRACER.span("preprocess"): batch, boxes = preprocess(frames, self.input_size)
+        if self.dynamic_batch: output = self.session.run(None, {self.input_name: batch})[0]
+        else: output = np.concatenate([self.session.run(None, {self.input_name: batch[i:i + 1]})[0] for i in range(len(batch))])
+        return decode_yolov8(output, boxes, self.conf_threshold, self.iou_threshold)
+
+    def infer(self, frames: Sequence[np.ndarray]) -> list:
+        return [to_detections(raw, self.classes) for raw in self.infer_raw(frames)]
+
+
+class TinygradBackend(DetectorBackend):
+    """
+    args:
+        weights_path: Safetensors written by easysort/sorting/export.py --format safetensors
+        device: tinygrad device the kernels are compiled for
+    """
+
+    def __init__(self, weights_path: Union[str, Path] = DEFAULT_SAFETENSORS_PATH, classes: Optional[Sequence[str]] = None,
+                 conf_threshold: float = DEFAULT_CONF_THRESHOLD, iou_threshold: float = DEFAULT_IOU_THRESHOLD,
+                 input_size: int = DEFAULT_INPUT_SIZE, device: str = "CPU"):
+        require_model_file(weights_path)
+        from easysort.sorting.yolov8_tinygrad import YOLOv8
+        self.model = YOLOv8.load(weights_path, input_size, device)
+        self.classes = list(classes) if classes is not None else self.model.classes
+        self.conf_threshold, self.iou_threshold = conf_threshold, iou_threshold
+        LOGGER.info(f"Loaded tinygrad model {weights_path} ({len(self.classes)} classes, input {input_size}, device {device})")
+
+    def infer_raw(self, frames: Sequence[np.ndarray]) -> List[RawDetections]:
+        with TRACER.span("preprocess"): batch, boxes = preprocess(frames, self.model.input_size)
+        return decode_yolov8(self.model.run(batch), boxes, self.conf_threshold, self.iou_threshold)
+
+    def infer(self, frames: Sequence[np.ndarray]) -> list:
+        return [to_detections(raw, self.classes) for raw in self.infer_raw(frames)]
+
+
+class UltralyticsBackend(DetectorBackend):
+    def __init__(self, weights_path: Union[str, Path] = DEFAULT_WEIGHTS_PATH, conf_threshold: float = DEFAULT_CONF_THRESHOLD,
+                 iou_threshold: float = DEFAULT_IOU_THRESHOLD, input_size: int = DEFAULT_INPUT_SIZE, device: str = "cpu"):
+        require_model_file(weights_path)
+        from ultralytics import YOLO
+        self.model = YOLO(str(weights_path))
+        self.classes = [self.model.names[i] for i in sorted(self.model.names)]
+        self.conf_threshold, self.iou_threshold, self.input_size, self.device = conf_threshold, iou_threshold, input_size, device
+
+    def _predict(self, frames: Sequence[np.ndarray]) -> list:
+        return self.model.predict(list(frames), imgsz=self.input_size, conf=self.conf_threshold, iou=self.iou_threshold,
+                                  device=self.device, verbose=False)
+
+    def infer_raw(self, frames: Sequence[np.ndarray]) -> List[RawDetections]:
+        return [RawDetections(r.boxes.xyxy.cpu().numpy().astype(np.float32), r.boxes.conf.cpu().numpy().astype(np.float32),
+                              r.boxes.cls.cpu().numpy().astype(np.int64)) for r in self._predict(frames)]
+
+    def infer(self, frames: Sequence[np.ndarray]) -> list:
+        import supervision as sv
+        return [sv.Detections.from_ultralytics(result) for result in self._predict(frames)]
+
+
+def model_classes(session) -> List[str]:
+    """Class names from the "names" metadata ultralytics writes into exported models, {0: 'name', ...}."""
+    names = session.get_modelmeta().custom_metadata_map.get("names")
+    if names is None: raise ValueError("The model has no class names in its metadata, pass classes explicitly")
+    names = ast.literal_eval(names)
+    return [names[i] for i in sorted(names)]
+
+
+def make_backend(backend: Union[str, DetectorBackend], **kwargs) -> DetectorBackend:
+    if isinstance(backend, DetectorBackend): return backend
+    if backend == "yolo_world": return YOLOWorldBackend(**kwargs)
+    if backend == "onnx": return OnnxBackend(**kwargs)
+    if backend == "tinygrad": return TinygradBackend(**kwargs)
+    if backend == "ultralytics": return UltralyticsBackend(**kwargs)
+    raise ValueError(f"Invalid backend: {backend}. Must be one of {BACKENDS}")
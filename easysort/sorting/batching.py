@@ -0,0 +1,105 @@
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Tuple
+
+from easysort.common.logger import EasySortLogger
+
+LOGGER = EasySortLogger()
+DEFAULT_MAX_BATCH_SIZE = 8
+DEFAULT_MAX_WAIT_S = 0.005
+
+
+def chunked(items: List[Any], size: int) -> List[List[Any]]:
+    if size < 1: raise ValueError(f"Batch size must be at least 1, got {size}")
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+class FrameBatcher:
+    """
+    Collects frames submitted from several producers (cameras, queued frames, clients) and runs them
+    through one batched forward pass.
+
+    A batch is dispatched as soon as it holds max_batch_size frames, or when the oldest waiting frame
+    has waited max_wait_s seconds, whichever comes first. If a batch fails, its frames are retried one at a
+    time, so a frame that makes inference raise only fails its own future and not those of the frames (and
+    producers) it happened to share the batch with.
+
+    args:
+        infer_batch: Callable taking a list of frames and returning one result per frame, e.g. Classifier.infer_batch
+        max_batch_size: Largest number of frames per forward pass
+        max_wait_s: Longest time a frame waits for others to join its batch
+    """
+
+    def __init__(self, infer_batch: Callable[[List[Any]], List[Any]], max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_s: float = DEFAULT_MAX_WAIT_S):
+        if max_batch_size < 1: raise ValueError(f"max_batch_size must be at least 1, got {max_batch_size}")
+        self.infer_batch = infer_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_s = max_wait_s
+        self.n_batches = 0
+        self.n_frames = 0
+        self._pending: List[Tuple[Any, Future, float]] = []
+        self._cond = threading.Condition()
+        self._running = True
+        self._worker = threading.Thread(target=self._run, name="FrameBatcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, frame: Any) -> Future:
+        """Queue a frame for inference. The returned future resolves to the result for this frame."""
+        future = Future()
+        with self._cond:
+            if not self._running: raise RuntimeError("FrameBatcher has been closed")
+            self._pending.append((frame, future, time.perf_counter()))
+            if len(self._pending) >= self.max_batch_size or len(self._pending) == 1: self._cond.notify()
+        return future
+
+    def __call__(self, frame: Any, timeout: Optional[float] = None) -> Any: return self.submit(frame).result(timeout)
+
+    @property
+    def mean_batch_size(self) -> float: return self.n_frames / self.n_batches if self.n_batches else 0.0
+
+    def _next_batch(self) -> List[Tuple[Any, Future, float]]:
+        with self._cond:
+            while self._running and not self._pending: self._cond.wait()
+            while self._running and len(self._pending) < self.max_batch_size:
+                remaining = self._pending[0][2] + self.max_wait_s - time.perf_counter()
+                if remaining <= 0: break
+                self._cond.wait(remaining)
+            batch, self._pending = self._pending[:self.max_batch_size], self._pending[self.max_batch_size:]
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                if not self._running: return
+                continue
+            frames = [frame for frame, _, _ in batch]
+            try: results = self._infer(frames)
+            except Exception as err:  # Propagate to the waiting producers instead of killing the worker
+                LOGGER.error(f"Batched inference failed: {err}")
+                if len(batch) == 1: batch[0][1].set_exception(err); continue
+                for frame, future, _ in batch: # Find the frames that fail on their own
+                    try: future.set_result(self._infer([frame])[0])
+                    except Exception as frame_err: future.set_exception(frame_err)
+                continue
+            for (_, future, _), result in zip(batch, results): future.set_result(result)
+
+    def _infer(self, frames: List[Any]) -> List[Any]:
+        results = self.infer_batch(frames)
+        if len(results) != len(frames): raise RuntimeError(f"infer_batch returned {len(results)} results for {len(frames)} frames")
+        self.n_batches += 1; self.n_frames += len(frames)
+        return results
+
+    def close(self) -> None:
+        """Stops the worker after the frames already submitted have been processed."""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        self._worker.join()
+        for _, future, _ in self._pending: future.cancel()
+        self._pending = []
+
+    def __enter__(self) -> "FrameBatcher": return self
+    def __exit__(self, *exc) -> None: self.close()
@@ -0,0 +1,222 @@
+"""
+Inference benchmark suite, replaces Classifier.test_speed.
+
+For every backend, input size and batch size: warmup iterations, then timed iterations of backend.infer on
+batches of the bundled dataset images (27-06-2024.v1i.yolov8), timed with time.perf_counter_ns. Reports latency
+percentiles per batch, throughput in frames per second and the peak resident memory of the process. Every
+backend and input size runs in a fresh process, so imports, compilation and memory start from scratch.
+
+Results are written as JSON with the machine and commit they ran on. compare flags the configurations whose
+p50 latency grew (or throughput fell) by more than the threshold against a baseline file, and the ones that are
+in the baseline but did not run (e.g. a backend that no longer loads). It exits 1 if there are any.
+
+Run from the repository root:
+    python -m easysort.sorting.benchmark run --backends onnx tinygrad --input-sizes 320 640 --batch-sizes 1 4 --output bench.json
+    python -m easysort.sorting.benchmark compare baseline.json bench.json --threshold 0.1
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from queue import Empty
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from easysort.common.logger import EasySortLogger
+
+LOGGER = EasySortLogger()
+DEFAULT_WARMUP = 5
+DEFAULT_ITERATIONS = 50
+DEFAULT_BATCH_SIZES = [1]
+DEFAULT_SPLIT = "test"
+DEFAULT_REGRESSION_THRESHOLD = 0.10 # Relative change
+INPUT_SIZE_BACKENDS = {"tinygrad", "ultralytics"} # Backends that take input_size, the others use their model's
+REPO_ROOT = Path(__file__).parents[2]
+
+
+def peak_rss_mb() -> float:
+    """Peak resident memory of this process. ru_maxrss is in KiB on Linux and bytes on macOS."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+
+
+def summarize(latencies_ns: Sequence[int], batch_size: int) -> Dict[str, float]:
+    """Latency percentiles of one batch in ms and throughput in frames per second."""
+    latencies_ms = np.asarray(latencies_ns, dtype=np.float64) / 1e6
+    p50, p90, p99 = np.percentile(latencies_ms, [50, 90, 99])
+    return {"p50_ms": float(p50), "p90_ms": float(p90), "p99_ms": float(p99), "mean_ms": float(latencies_ms.mean()),
+            "throughput_fps": float(batch_size * len(latencies_ms) / latencies_ms.sum() * 1e3)}
+
+
+def time_batches(infer, frames: Sequence[np.ndarray], batch_size: int, warmup: int, iterations: int) -> List[int]:
+    """Nanoseconds of every timed infer call, on batches cycling through frames."""
+    batches = [[frames[(i * batch_size + j) % len(frames)] for j in range(batch_size)] for i in range(max(1, len(frames) // batch_size))]
+    for i in range(warmup): infer(batches[i % len(batches)])
+    latencies = []
+    for i in range(iterations):
+        batch = batches[i % len(batches)]
+        start = time.perf_counter_ns()
+        infer(batch)
+        latencies.append(time.perf_counter_ns() - start)
+    return latencies
+
+
+def run_backend(backend: str, input_size: Optional[int], batch_sizes: Sequence[int], split: str, limit: Optional[int],
+                warmup: int, iterations: int, backend_kwargs: dict) -> List[dict]:
+    """Benchmarks one backend at one input size for every batch size, in the calling process."""
+    from easysort.sorting.backends import make_backend
+    from easysort.sorting.dataset import load_images
+    frames = load_images(split, limit)
+    if not frames: raise ValueError(f"No images in the {split} split")
+    kwargs = dict(backend_kwargs, input_size=input_size) if input_size is not None else dict(backend_kwargs)
+    start = time.perf_counter()
+    model = make_backend(backend, **kwargs)
+    load_s = time.perf_counter() - start
+    results = []
+    for batch_size in batch_sizes:
+        latencies = time_batches(model.infer, frames, batch_size, warmup, iterations)
+        results.append({"backend": backend, "input_size": input_size if input_size is not None else getattr(model, "input_size", None),
+                        "batch_size": batch_size, "warmup": warmup, "iterations": iterations, "n_images": len(frames),
+                        "load_s": load_s, **summarize(latencies, batch_size), "peak_rss_mb": peak_rss_mb()})
+    return results
+
+
+def _run_in_child(queue, *args) -> None:
+    try: queue.put(("ok", run_backend(*args)))
+    except Exception as e: queue.put(("error", f"{type(e).__name__}: {e}"))
+
+
+def environment() -> dict:
+    try: commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError: commit = ""
+    return {"time": datetime.now(timezone.utc).isoformat(timespec="seconds"), "commit": commit, "python": platform.python_version(),
+            "platform": platform.platform(), "machine": platform.machine(), "cpu_count": os.cpu_count(), "numpy": np.__version__}
+
+
+def run_suite(backends: Sequence[str], input_sizes: Sequence[Optional[int]] = (None,), batch_sizes: Sequence[int] = DEFAULT_BATCH_SIZES,
+              split: str = DEFAULT_SPLIT, limit: Optional[int] = None, warmup: int = DEFAULT_WARMUP,
+              iterations: int = DEFAULT_ITERATIONS, backend_kwargs: Optional[Dict[str, dict]] = None) -> dict:
+    """
+    Runs every configuration, each backend and input size in its own process. Input sizes only apply to
+    INPUT_SIZE_BACKENDS, the others run once at their model's size. Failing backends are reported in "errors".
+    """
+    report = {"environment": environment(), "split": split, "results": [], "errors": {}}
+    context = mp.get_context("spawn")
+    for backend in backends:
+        for input_size in (input_sizes if backend in INPUT_SIZE_BACKENDS else [None]):
+            queue = context.Queue()
+            args = (backend, input_size, list(batch_sizes), split, limit, warmup, iterations, (backend_kwargs or {}).get(backend, {}))
+            process = context.Process(target=_run_in_child, args=(queue, *args))
+            process.start()
+            while True:
+                try: status, value = queue.get(timeout=1.0); break
+                except Empty:
+                    if not process.is_alive(): status, value = "error", f"Benchmark process exited with code {process.exitcode}"; break
+            process.join()
+            name = backend if input_size is None else f"{backend}@{input_size}"
+            if status == "ok": report["results"].extend(value); LOGGER.info(f"Benchmarked {name}")
+            else: report["errors"][name] = value; LOGGER.warning(f"Skipped {name}: {value}")
+    return report
+
+
+def result_key(result: dict) -> str: return f"{result['backend']}/{result['input_size']}/b{result['batch_size']}"
+
+
+def error_name(result: dict) -> str:
+    """Name run_suite reports errors of result's backend and input size under."""
+    return result["backend"] if result["backend"] not in INPUT_SIZE_BACKENDS else f"{result['backend']}@{result['input_size']}"
+
+
+def compare(baseline: dict, current: dict, threshold: float = DEFAULT_REGRESSION_THRESHOLD) -> List[dict]:
+    """
+    One row per configuration of the baseline: relative change of the p50 latency and the throughput, and whether
+    either got worse by more than threshold. Configurations missing from current, and backends that fail in current
+    but did not in the baseline, are regressions with an "error" instead of the changes.
+    """
+    results = {result_key(result): result for result in current["results"]}
+    errors, previous_errors = current.get("errors", {}), baseline.get("errors", {})
+    rows = []
+    for before in baseline["results"]:
+        key, result = result_key(before), results.get(result_key(before))
+        if result is None:
+            rows.append({"key": key, "p50_ms_before": before["p50_ms"], "p50_ms": None, "p50_change": None, "throughput_change": None,
+                         "error": errors.get(error_name(before), "missing from the current results"), "regressed": True})
+            continue
+        latency_change = result["p50_ms"] / before["p50_ms"] - 1
+        throughput_change = result["throughput_fps"] / before["throughput_fps"] - 1
+        rows.append({"key": key, "p50_ms_before": before["p50_ms"], "p50_ms": result["p50_ms"], "p50_change": latency_change,
+                     "throughput_change": throughput_change, "regressed": bool(latency_change > threshold or throughput_change < -threshold)})
+    reported = {error_name(before) for before in baseline["results"]}
+    for name, error in errors.items():
+        if name not in previous_errors and name not in reported:
+            rows.append({"key": name, "p50_ms_before": None, "p50_ms": None, "p50_change": None, "throughput_change": None,
+                         "error": error, "regressed": True})
+    return rows
+
+
+def format_results(report: dict) -> str:
+    lines = [f"{'backend':12s} {'size':>5s} {'batch':>5s} {'p50 ms':>8s} {'p90 ms':>8s} {'p99 ms':>8s} {'frames/s':>9s} {'RSS MB':>7s}"]
+    for r in report["results"]:
+        lines.append(f"{r['backend']:12s} {str(r['input_size']):>5s} {r['batch_size']:5d} {r['p50_ms']:8.2f} {r['p90_ms']:8.2f} "
+                     f"{r['p99_ms']:8.2f} {r['throughput_fps']:9.1f} {r['peak_rss_mb']:7.0f}")
+    lines.extend(f"{name:12s} skipped: {error}" for name, error in report.get("errors", {}).items())
+    return "\n".join(lines)
+
+
+def format_comparison(rows: List[dict], threshold: float) -> str:
+    lines = [f"{'configuration':24s} {'p50 before':>10s} {'p50 now':>8s} {'p50':>7s} {'frames/s':>8s}"]
+    for row in rows:
+        if row.get("error") is not None: lines.append(f"{row['key']:24s} {'FAILED':>10s}: {row['error']}  REGRESSION"); continue
+        lines.append(f"{row['key']:24s} {row['p50_ms_before']:10.2f} {row['p50_ms']:8.2f} {row['p50_change']:+7.1%} "
+                     f"{row['throughput_change']:+8.1%}{'  REGRESSION' if row['regressed'] else ''}")
+    n_regressed = sum(row["regressed"] for row in rows)
+    lines.append(f"{n_regressed} of {len(rows)} configurations regressed by more than {threshold:.0%} or did not run")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="Benchmark backends and write the results as JSON")
+    run.add_argument("--backends", nargs="+", default=["onnx"])
+    run.add_argument("--input-sizes", type=int, nargs="+", default=[None], help=f"Only for {sorted(INPUT_SIZE_BACKENDS)}")
+    run.add_argument("--batch-sizes", type=int, nargs="+", default=DEFAULT_BATCH_SIZES)
+    run.add_argument("--warmup", type=int, default=DEFAULT_WARMUP)
+    run.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS)
+    run.add_argument("--split", default=DEFAULT_SPLIT)
+    run.add_argument("--limit", type=int, default=None, help="Use only the first images of the split")
+    run.add_argument("--backend-kwargs", type=json.loads, default={}, help='JSON per backend, e.g. {"onnx": {"intra_op_threads": 4}}')
+    run.add_argument("--output", default="benchmark.json")
+    run.add_argument("--baseline", default=None, help="Also compare against this earlier result file")
+    run.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD)
+    diff = commands.add_parser("compare", help="Flag regressions of a result file against a baseline")
+    diff.add_argument("baseline")
+    diff.add_argument("current")
+    diff.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD)
+    args = parser.parse_args()
+
+    if args.command == "run":
+        report = run_suite(args.backends, args.input_sizes, args.batch_sizes, args.split, args.limit, args.warmup, args.iterations,
+                           args.backend_kwargs)
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(format_results(report))
+        print(f"Results written to {args.output}")
+        if args.baseline is None: sys.exit(0 if report["results"] else 1)
+        baseline, current = json.loads(Path(args.baseline).read_text()), report
+    else:
+        baseline, current = json.loads(Path(args.baseline).read_text()), json.loads(Path(args.current).read_text())
+    rows = compare(baseline, current, args.threshold)
+    print(format_comparison(rows, args.threshold))
+    sys.exit(1 if any(row["regressed"] for row in rows) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+from functools import lru_cache
+from pathlib import Path
+from typing import Union
+
+import numpy as np
+
+from easysort.common.config import DELTA_CONFIG_PATH, RobotConfig, load_robot_config
+
+
+def homography_from_points(camera_points: np.ndarray, world_points: np.ndarray) -> np.ndarray:
+    """
+    Least squares homography H (3x3) mapping camera pixels to world coordinates, [X, Y, W] = H @ [u, v, 1].
+    Uses the normalised direct linear transform, so at least 4 non-collinear correspondences are needed.
+    """
+    src, dst = np.asarray(camera_points, dtype=np.float64), np.asarray(world_points, dtype=np.float64)
+    if src.shape != dst.shape or src.ndim != 2 or src.shape[1] != 2 or len(src) < 4:
+        raise ValueError(f"Need at least 4 matching 2D point pairs, got {src.shape} and {dst.shape}")
+
+    def normaliser(points):
+        mean = points.mean(axis=0); scale = np.sqrt(2) / max(np.linalg.norm(points - mean, axis=1).mean(), 1e-12)
+        return np.array([[scale, 0, -scale * mean[0]], [0, scale, -scale * mean[1]], [0, 0, 1]])
+
+    T_src, T_dst = normaliser(src), normaliser(dst)
+    s = src @ T_src[:2, :2].T + T_src[:2, 2]
+    d = dst @ T_dst[:2, :2].T + T_dst[:2, 2]
+    n, zeros, ones = len(s), np.zeros(len(s)), np.ones(len(s))
+    A = np.empty((2 * n, 9))
+    A[0::2] = np.stack([-s[:, 0], -s[:, 1], -ones, zeros, zeros, zeros, d[:, 0] * s[:, 0], d[:, 0] * s[:, 1], d[:, 0]], axis=1)
+    A[1::2] = np.stack([zeros, zeros, zeros, -s[:, 0], -s[:, 1], -ones, d[:, 1] * s[:, 0], d[:, 1] * s[:, 1], d[:, 1]], axis=1)
+    H = np.linalg.svd(A)[2][-1].reshape(3, 3)
+    H = np.linalg.inv(T_dst) @ H @ T_src
+    return H / H[2, 2]
+
+
+class CameraCalibration:
+    """
+    Plane projection from camera pixels to belt/robot coordinates.
+
+    The homography is split into its linear and translation parts up front, so mapping N points is
+    one matrix product and one division, without building homogeneous coordinates per call.
+    """
+
+    def __init__(self, homography: np.ndarray):
+        self.homography = np.asarray(homography, dtype=np.float64)
+        self._linear = np.ascontiguousarray(self.homography[:, :2].T)  # (2, 3)
+        self._offset = self.homography[:, 2].copy()                     # (3,)
+        # Box centres are (x1 + x2, y1 + y2) / 2, fold the 1/2 into the matrix
+        self._box_linear = self._linear * 0.5
+
+    @classmethod
+    def from_config(cls, robot_config: RobotConfig) -> "CameraCalibration":
+        return cls(homography_from_points(robot_config.camera_points, robot_config.world_points))
+
+    def project(self, points: np.ndarray) -> np.ndarray:
+        """Maps (N, 2) pixel positions to (N, 2) world positions."""
+        return self._apply(np.asarray(points, dtype=np.float64), self._linear)
+
+    def boxes_to_world(self, xyxy: np.ndarray) -> np.ndarray:
+        """Maps the centres of (N, 4) xyxy pixel boxes to (N, 2) world positions."""
+        xyxy = np.asarray(xyxy, dtype=np.float64)
+        return self._apply(xyxy[:, :2] + xyxy[:, 2:], self._box_linear)
+
+    def _apply(self, points: np.ndarray, linear: np.ndarray) -> np.ndarray:
+        projected = points @ linear
+        projected += self._offset
+        return projected[:, :2] / projected[:, 2:]
+
+
+@lru_cache(maxsize=None)
+def _load_calibration(path: str) -> CameraCalibration: return CameraCalibration.from_config(load_robot_config(path))
+def load_calibration(path: Union[str, Path] = DELTA_CONFIG_PATH) -> CameraCalibration:
+    """Loads the calibration of a robot config. Computed once per config file and cached afterwards."""
+    return _load_calibration(str(Path(path).resolve()))
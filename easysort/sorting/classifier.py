@@ -3,45 +3,139 @@
 # !pip install -q supervision==0.19.0rc3
 # From: https://colab.research.google.com/github/roboflow/supervision/blob/develop/docs/notebooks/zero-shot-object-detection-with-yolo-world.ipynb#scrollTo=37CMTxw0jSyH
 
-import cv2
-import supervision as sv
-from typing import Union
+# cv2, supervision and the model packages are imported where they are used, so importing this module stays
+# cheap for tooling and tests (see test/test_import_time.py). Call Classifier.warmup() before the first frame.
+from typing import TYPE_CHECKING, List, Optional, Tuple, Union
 from pathlib import Path
 
+import numpy as np
+
 from easysort.common.logger import EasySortLogger
-from inference.models.yolo_world.yolo_world import YOLOWorld
+from easysort.common.config import DELTA_CONFIG_PATH
+from easysort.common.tracing import TRACER
+from easysort.sorting.batching import FrameBatcher, chunked, DEFAULT_MAX_BATCH_SIZE, DEFAULT_MAX_WAIT_S
+from easysort.sorting.backends import DetectorBackend, make_backend, to_detections
+from easysort.sorting.calibration import load_calibration
+from easysort.sorting.gate import MotionGate
+from easysort.sorting.postprocess import RawDetections
+from easysort.sorting.tiling import Tiler
 import time
 
+if TYPE_CHECKING: import supervision as sv
+
 LOGGER = EasySortLogger()
-SOURCE_IMAGE_PATH = "easysort/helpers/test.jpg"
+DEFAULT_WARMUP_RUNS = 3
+DEFAULT_WARMUP_SHAPE = (980, 1280, 3) # Camera frame, height x width x BGR
+
+def load_image(image) -> np.ndarray:
+    """Frames pass through, image paths are read with cv2 (BGR)."""
+    if isinstance(image, (str, Path)):
+        import cv2
+        image = cv2.imread(str(image))
+    return image
+
 
 class Classifier: 
-    def __init__(self):
-        self.model = YOLOWorld(model_id="yolo_world/l")
-        self.classes = ["plastic-bottle", "cardboard-box", "plastic-packaging", "other"]
-        self.model.set_classes(self.classes); LOGGER.info("Classifier initialized")
-
-    def __call__(self, image):
-        results = self.model.infer(image)
-        detections = sv.Detections.from_inference(results)
-        world_view_detections = self.cam_view_to_world_view(detections)
+    """
+    args:
+        backend: One of backends.BACKENDS or a DetectorBackend instance, see easysort/sorting/backends.py
+        backend_kwargs: Passed to the backend, e.g. model_path and intra_op_threads for "onnx"
+        gate: Optional MotionGate, __call__ then returns None without running the model for frames it skips
+        tiler: Optional Tiler, frames are then detected as one batch of overlapping tiles, for small items on
+            frames much larger than the model input (see easysort/sorting/tiling.py)
+    """
+    def __init__(self, max_batch_size: int = DEFAULT_MAX_BATCH_SIZE, max_wait_s: float = DEFAULT_MAX_WAIT_S,
+                 robot_config_path: Union[Path, str] = DELTA_CONFIG_PATH, backend: Union[str, DetectorBackend] = "yolo_world",
+                 gate: Optional[MotionGate] = None, tiler: Optional[Tiler] = None, **backend_kwargs):
+        self.calibration = load_calibration(robot_config_path)
+        self.gate, self.tiler = gate, tiler
+        self.backend = make_backend(backend, **backend_kwargs)
+        self.classes = self.backend.classes
+        self.max_batch_size, self.max_wait_s = max_batch_size, max_wait_s
+        LOGGER.info(f"Classifier initialized with the {type(self.backend).__name__}")
+
+    def set_classes(self, classes: List[str]) -> None:
+        """Switches the classes of an open-vocabulary backend, cheap for class lists seen before."""
+        self.backend.set_classes(classes)
+        self.classes = self.backend.classes
+
+    def __call__(self, image) -> Optional["sv.Detections"]:
+        image = load_image(image)
+        if self.gate is not None:
+            with TRACER.span("gate"): forward = self.gate(image)
+            if not forward: return None
+        with TRACER.span("inference"): detections = self.detect(image)
+        with TRACER.span("world_transform"): world_view_detections = self.cam_view_to_world_view(detections)
         LOGGER.info("Inference done")
         return world_view_detections
-    
-    def test_speed(self) -> None: time0 = time.time(); self(SOURCE_IMAGE_PATH); print(f"Time taken: {round(time.time() - time0, 2)} seconds")
+
+    def warmup(self, n_runs: int = DEFAULT_WARMUP_RUNS, frame_shape: Tuple[int, int, int] = DEFAULT_WARMUP_SHAPE,
+               batch_sizes: Optional[List[int]] = None) -> float:
+        """
+        Runs dummy frames through the model so one-time costs (lazy imports, allocator growth, kernel selection or
+        JIT compilation, which tinygrad does per batch size) are paid before the first real frame. n_runs single
+        frames, then one batch of each of batch_sizes (default [max_batch_size]). Returns the seconds it took.
+        """
+        start = time.perf_counter()
+        frame = np.random.default_rng(0).integers(0, 256, frame_shape, dtype=np.uint8)
+        for _ in range(n_runs): self.backend.infer([frame])
+        for batch_size in batch_sizes if batch_sizes is not None else [self.max_batch_size]:
+            if batch_size > 1: self.backend.infer([frame] * batch_size)
+        elapsed = time.perf_counter() - start
+        LOGGER.info(f"Classifier warmed up in {elapsed:.2f} s")
+        return elapsed
+
+    def detect(self, image) -> "sv.Detections":
+        """Runs the model on one frame (array or image path) and returns the detections in camera view."""
+        image = load_image(image)
+        if self.tiler is not None: return self.detect_tiled(image)
+        return self.backend.infer([image])[0]
+
+    def detect_tiled(self, image: np.ndarray) -> "sv.Detections":
+        """Runs the tiles of one frame as one batch and merges their detections, in camera view frame pixels."""
+        tiler = self.tiler if self.tiler is not None else Tiler()
+        crops, tiles = tiler.split(image)
+        results = self.backend.infer(crops)
+        raw = tiler.merge([RawDetections(d.xyxy, d.confidence, d.class_id) for d in results], tiles, image.shape)
+        return to_detections(raw, self.classes)
+
+    def infer_batch(self, frames: List) -> List["sv.Detections"]:
+        """
+        Runs the frames through the backend max_batch_size frames per infer call. Returns one detections object per
+        frame, in the same order as frames. This is one forward pass per chunk only on backends with batched set
+        (onnx with a dynamic batch export, tinygrad, ultralytics). The default yolo_world backend runs the frames one
+        by one, so batching gains nothing there.
+        """
+        detections = []
+        for chunk in chunked(list(frames), self.max_batch_size):
+            results = self.backend.infer(chunk) if self.tiler is None else [self.detect_tiled(frame) for frame in chunk]
+            detections.extend(self.cam_view_to_world_view(result) for result in results)
+        LOGGER.debug(f"Batched inference done on {len(detections)} frames")
+        return detections
+
+    def batcher(self) -> FrameBatcher:
+        """Returns a FrameBatcher so several cameras or queued frames can share forward passes. Close it when done."""
+        if not self.backend.batched: LOGGER.warning(f"{type(self.backend).__name__} runs frames one by one, batching will not speed it up")
+        return FrameBatcher(self.infer_batch, self.max_batch_size, self.max_wait_s)
 
     def visualize(self, image_path: Union[Path, str]) -> None:
+        import cv2
+        import supervision as sv
         image = cv2.imread(image_path); detections = self(image)
         sv.plot_image(sv.BoundingBoxAnnotator(thickness=2).annotate(image, detections), (10, 10))
     
-    def cam_view_to_world_view(self, detections):
-        # Do computations hehe..
+    def cam_view_to_world_view(self, detections: "sv.Detections") -> "sv.Detections":
+        """Adds the belt/robot coordinates (cm) of every box centre as detections.data["world_xy"], shape (N, 2)."""
+        detections.data["world_xy"] = self.calibration.boxes_to_world(detections.xyxy)
         return detections
 
 if __name__ == "__main__":
+    import cv2
+    import supervision as sv
     SOURCE_IMAGE_PATH = "_old/helpers/test.jpg"
     image = cv2.imread(SOURCE_IMAGE_PATH)
     classifier = Classifier()
+    classifier.warmup()
     detections = classifier(image)
     annotated_image = image.copy()
 
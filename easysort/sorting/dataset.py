@@ -0,0 +1,50 @@
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+import numpy as np
+
+DATASET_PATH = Path(__file__).parent / "27-06-2024.v1i.yolov8"
+SPLITS = ["train", "valid", "test"]
+RECORDINGS_PATH = Path(__file__).parents[2] / "data" # Written by the data engine (_old/data_engine), not in git
+RECORDING_STATES = ["new", "verified", "labelled"]
+RECORDING_FPS = 10
+
+
+def image_paths(split: str = "test", dataset_path: Path = DATASET_PATH) -> List[Path]:
+    if split not in SPLITS: raise ValueError(f"Invalid split: {split}. Must be one of {SPLITS}")
+    return sorted((Path(dataset_path) / split / "images").glob("*.jpg"))
+
+
+def load_images(split: str = "test", limit: Optional[int] = None, dataset_path: Path = DATASET_PATH) -> list:
+    """Loads the BGR images of a split of the bundled dataset, as cv2.imread would."""
+    import cv2
+    return [cv2.imread(str(path)) for path in image_paths(split, dataset_path)[:limit]]
+
+
+def load_labels(split: str = "test", limit: Optional[int] = None, dataset_path: Path = DATASET_PATH) -> List[np.ndarray]:
+    """
+    Ground truth of the images of a split, in the order of image_paths: one (N, 5) array per image with rows
+    (class_id, cx, cy, w, h), coordinates normalized to the image size as in the YOLO label files.
+    """
+    labels = []
+    for path in image_paths(split, dataset_path)[:limit]:
+        label_path = path.parent.parent / "labels" / f"{path.stem}.txt"
+        rows = np.loadtxt(label_path, ndmin=2) if label_path.exists() and label_path.stat().st_size else np.empty((0, 5))
+        labels.append(rows.reshape(-1, 5))
+    return labels
+
+
+def recordings(state: str = "verified", recordings_path: Path = RECORDINGS_PATH) -> List[Path]:
+    """Folders of the data engine recordings in a state, each holding frame_0000.jpg, frame_0001.jpg, ..."""
+    if state not in RECORDING_STATES: raise ValueError(f"Invalid state: {state}. Must be one of {RECORDING_STATES}")
+    folder = Path(recordings_path) / state
+    return sorted(path for path in folder.iterdir() if path.is_dir()) if folder.exists() else []
+
+
+def recording_frame_paths(recording: Path) -> List[Path]: return sorted(Path(recording).glob("frame_*.jpg"))
+
+
+def replay_recording(recording: Path) -> Iterator[np.ndarray]:
+    """The BGR frames of a recording in order. They were captured at RECORDING_FPS."""
+    import cv2
+    for path in recording_frame_paths(recording): yield cv2.imread(str(path))
@@ -0,0 +1,79 @@
+"""
+Cache of the CLIP text embeddings YOLOWorld computes for its class prompts.
+
+Embeddings are stored as .npy files keyed by the model id and a hash of the ordered class list, and loaded
+memory-mapped, so a restart with unchanged classes skips the text encoder. The last few class sets also stay
+in memory, which makes switching between them at runtime nearly free.
+"""
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from easysort.common.logger import EasySortLogger
+
+LOGGER = EasySortLogger()
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "easysort" / "text_embeddings"
+DEFAULT_MEMORY_SIZE = 8 # Class sets kept in memory
+
+
+def cache_key(model_id: str, classes: Sequence[str]) -> str:
+    digest = hashlib.sha256(json.dumps([model_id, list(classes)]).encode()).hexdigest()[:16]
+    return f"{model_id.replace('/', '-')}-{digest}"
+
+
+class TextEmbeddingCache():
+    """
+    args:
+        cache_dir: Directory of the .npy files, created when the first embeddings are stored
+        memory_size: Class sets kept in memory, least recently used evicted first
+    """
+
+    def __init__(self, cache_dir: Union[str, Path] = DEFAULT_CACHE_DIR, memory_size: int = DEFAULT_MEMORY_SIZE):
+        self.cache_dir, self.memory_size = Path(cache_dir), memory_size
+        self._memory: "OrderedDict[Tuple[str, Tuple[str, ...]], np.ndarray]" = OrderedDict()
+        self.n_memory_hits = self.n_disk_hits = self.n_misses = 0
+
+    def path(self, model_id: str, classes: Sequence[str]) -> Path: return self.cache_dir / f"{cache_key(model_id, classes)}.npy"
+
+    def _remember(self, key: Tuple[str, Tuple[str, ...]], embeddings: np.ndarray) -> None:
+        self._memory[key] = embeddings
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size: self._memory.popitem(last=False)
+
+    def get(self, model_id: str, classes: Sequence[str]) -> Optional[np.ndarray]:
+        """Embeddings of classes from memory or disk (memory-mapped, read only), None if not cached."""
+        key = (model_id, tuple(classes))
+        if key in self._memory:
+            self._memory.move_to_end(key); self.n_memory_hits += 1
+            return self._memory[key]
+        path = self.path(model_id, classes)
+        if not path.exists(): return None
+        try: embeddings = np.load(path, mmap_mode="r")
+        except (ValueError, OSError) as e:
+            LOGGER.warning(f"Ignoring unreadable text embedding cache {path}: {e}")
+            return None
+        self.n_disk_hits += 1
+        self._remember(key, embeddings)
+        return embeddings
+
+    def put(self, model_id: str, classes: Sequence[str], embeddings: np.ndarray) -> None:
+        path = self.path(model_id, classes)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp.npy") # Written whole then swapped in, like atomic_write_json
+        np.save(tmp_path, np.asarray(embeddings, dtype=np.float32))
+        os.replace(tmp_path, path)
+        self._remember((model_id, tuple(classes)), np.asarray(embeddings, dtype=np.float32))
+
+    def get_or_compute(self, model_id: str, classes: Sequence[str], compute: Callable[[], np.ndarray]) -> np.ndarray:
+        embeddings = self.get(model_id, classes)
+        if embeddings is not None: return embeddings
+        self.n_misses += 1
+        embeddings = np.asarray(compute(), dtype=np.float32)
+        self.put(model_id, classes, embeddings)
+        LOGGER.info(f"Cached text embeddings of {len(classes)} classes for {model_id} in {self.path(model_id, classes)}")
+        return embeddings
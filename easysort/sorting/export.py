@@ -0,0 +1,78 @@
+"""
+Exports trained YOLOv8 weights for the "onnx" and "tinygrad" Classifier backends.
+
+    python -m easysort.sorting.export [--weights easysort/sorting/train/weights/best.pt] [--format safetensors]
+
+The weights default to the checkpoint train_yolov8_ultralytics.py writes (project easysort/sorting, run "train").
+
+The ONNX graph is exported without NMS, which is done in NumPy (see postprocess.py), and with a dynamic batch
+dimension so FrameBatcher batches run as one inference. The safetensors file holds the state dict with batch
+norms fused into the convolutions and the class names as metadata, as yolov8_tinygrad.py loads it.
+"""
+import argparse
+import json
+import shutil
+from pathlib import Path
+from typing import Optional, Union
+
+from easysort.common.logger import EasySortLogger
+from easysort.sorting.postprocess import DEFAULT_INPUT_SIZE
+
+LOGGER = EasySortLogger()
+DEFAULT_WEIGHTS_PATH = Path(__file__).parent / "train" / "weights" / "best.pt" # Written by train_yolov8_ultralytics.py
+DEFAULT_OPSET = 17
+FORMATS = ["onnx", "safetensors"]
+
+
+def require_model_file(path: Union[str, Path]) -> Path:
+    """
+    Raises FileNotFoundError with how to produce the file if path does not exist, instead of letting ultralytics
+    try to download it or fall back to the pretrained COCO model with the wrong classes.
+    """
+    path = Path(path)
+    if path.exists(): return path
+    raise FileNotFoundError(f"No model at {path}. Train one with easysort/sorting/train_yolov8_ultralytics.py (writes "
+                            f"{DEFAULT_WEIGHTS_PATH}), export it with python -m easysort.sorting.export [--format safetensors], "
+                            f"or pass the path explicitly")
+
+
+def export_onnx(weights: Union[str, Path] = DEFAULT_WEIGHTS_PATH, output: Optional[Union[str, Path]] = None,
+                input_size: int = DEFAULT_INPUT_SIZE, dynamic: bool = True, opset: int = DEFAULT_OPSET) -> Path:
+    """Exports weights to ONNX, next to the weights unless output is given. Returns the path of the model."""
+    require_model_file(weights)
+    from ultralytics import YOLO
+    exported = Path(YOLO(str(weights)).export(format="onnx", imgsz=input_size, dynamic=dynamic, simplify=True, opset=opset))
+    if output is not None and Path(output) != exported: exported = Path(shutil.move(str(exported), str(output)))
+    LOGGER.info(f"Exported {weights} to {exported}")
+    return exported
+
+
+def export_safetensors(weights: Union[str, Path] = DEFAULT_WEIGHTS_PATH, output: Optional[Union[str, Path]] = None) -> Path:
+    """Exports the fused float32 state dict, to weights with a .safetensors suffix unless output is given."""
+    require_model_file(weights)
+    from safetensors.torch import save_file
+    from ultralytics import YOLO
+    model = YOLO(str(weights))
+    model.fuse()
+    state_dict = {key: value.float().contiguous() for key, value in model.model.state_dict().items() if value.is_floating_point()}
+    output = Path(output) if output is not None else Path(weights).with_suffix(".safetensors")
+    save_file(state_dict, str(output), metadata={"names": json.dumps({str(i): name for i, name in model.names.items()})})
+    LOGGER.info(f"Exported {weights} to {output}")
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--weights", default=str(DEFAULT_WEIGHTS_PATH))
+    parser.add_argument("--format", choices=FORMATS, default="onnx")
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--input-size", type=int, default=DEFAULT_INPUT_SIZE)
+    parser.add_argument("--static", action="store_true", help="Fixed batch size of 1")
+    parser.add_argument("--opset", type=int, default=DEFAULT_OPSET)
+    args = parser.parse_args()
+    if args.format == "safetensors": export_safetensors(args.weights, args.output)
+    else: export_onnx(args.weights, args.output, args.input_size, not args.static, args.opset)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Motion gate in front of the detector: skips frames in which nothing on the belt changed since the last frame
+that was sent to the model, so an empty or unchanged belt costs no inference.
+
+A frame is compared with the last forwarded frame on one channel sampled every downscale pixels (a 980x1280
+frame at downscale 8 is 123x160 pixels, tens of microseconds). A pixel changed when its difference, minus the
+mean difference of the frame (global exposure or lighting changes), exceeds threshold. The frame is forwarded
+when the changed fraction exceeds min_changed_fraction, or when refresh_interval_s passed since the last
+forwarded frame, so the detector still sees the belt regularly (items that stopped, a change below the
+threshold). The first frame is always forwarded.
+"""
+import time
+from typing import Optional
+
+import numpy as np
+
+DEFAULT_DOWNSCALE = 8
+DEFAULT_THRESHOLD = 25 # Grey levels
+DEFAULT_MIN_CHANGED_FRACTION = 0.002 # ~40 of the 123x160 sampled pixels, an item of ~50x50 camera pixels
+DEFAULT_REFRESH_INTERVAL_S = 1.0
+DEFAULT_CHANNEL = 1 # Green, closest to luminance for BGR frames
+
+
+class MotionGate():
+    """
+    Call with every frame, forward it to the detector when it returns True. Classifier(gate=...) and
+    sorting_pipeline(gate=...) do this.
+
+    args:
+        downscale: Sampling stride in pixels, in both directions
+        threshold: Difference in grey levels for a sampled pixel to count as changed
+        min_changed_fraction: Fraction of changed pixels for the frame to be forwarded
+        refresh_interval_s: Forward a frame at least this often, None to only forward changes
+        channel: Channel compared for frames with several channels
+    """
+
+    def __init__(self, downscale: int = DEFAULT_DOWNSCALE, threshold: int = DEFAULT_THRESHOLD,
+                 min_changed_fraction: float = DEFAULT_MIN_CHANGED_FRACTION,
+                 refresh_interval_s: Optional[float] = DEFAULT_REFRESH_INTERVAL_S, channel: int = DEFAULT_CHANNEL):
+        if downscale < 1: raise ValueError(f"downscale must be at least 1, got {downscale}")
+        self.downscale, self.threshold, self.min_changed_fraction = downscale, threshold, min_changed_fraction
+        self.refresh_interval_s, self.channel = refresh_interval_s, channel
+        self.n_frames = self.n_forwarded = self.n_forced = 0
+        self.last_changed_fraction = 0.0
+        self._reference: Optional[np.ndarray] = None
+        self._last_forwarded_at = 0.0
+
+    @property
+    def n_skipped(self) -> int: return self.n_frames - self.n_forwarded
+
+    @property
+    def skip_ratio(self) -> float:
+        """Fraction of the frames seen that were not forwarded."""
+        return self.n_skipped / self.n_frames if self.n_frames else 0.0
+
+    def reset(self) -> None:
+        """Forgets the reference frame, the next frame is forwarded. Counters are kept."""
+        self._reference = None
+
+    def sample(self, frame: np.ndarray) -> np.ndarray:
+        """The downscaled single channel image the gate compares, as int16."""
+        small = frame[::self.downscale, ::self.downscale]
+        if small.ndim == 3: small = small[..., self.channel]
+        return small.astype(np.int16)
+
+    def changed_fraction(self, small: np.ndarray, reference: np.ndarray) -> float:
+        diff = small - reference
+        diff -= np.int16(diff.mean())
+        return np.count_nonzero(np.abs(diff) > self.threshold) / diff.size
+
+    def __call__(self, frame: np.ndarray, timestamp: Optional[float] = None) -> bool:
+        """Whether frame should go to the detector. timestamp in seconds, default time.perf_counter()."""
+        timestamp = time.perf_counter() if timestamp is None else timestamp
+        self.n_frames += 1
+        small = self.sample(frame)
+        if self._reference is None or self._reference.shape != small.shape: self.last_changed_fraction, forward = 1.0, True
+        else:
+            self.last_changed_fraction = self.changed_fraction(small, self._reference)
+            forward = self.last_changed_fraction > self.min_changed_fraction
+            if not forward and self.refresh_interval_s is not None and timestamp - self._last_forwarded_at >= self.refresh_interval_s:
+                forward = True; self.n_forced += 1
+        if forward: self._reference, self._last_forwarded_at, self.n_forwarded = small, timestamp, self.n_forwarded + 1
+        return forward
+
+    def filter(self, frame: np.ndarray) -> Optional[np.ndarray]:
+        """Pipeline stage: the frame when it should go to the detector, None to skip it."""
+        return frame if self(frame) else None
@@ -3,35 +3,31 @@
 # !pip install -q supervision==0.19.0rc3
 # From: https://colab.research.google.com/github/roboflow/supervision/blob/develop/docs/notebooks/zero-shot-object-detection-with-yolo-world.ipynb#scrollTo=37CMTxw0jSyH
 
-import cv2
-import supervision as sv
 from typing import Union
 from pathlib import Path
 
 from easysort.common.logger import EasySortLogger
-from inference.models.yolo_world.yolo_world import YOLOWorld
-import time
-from torch import rand
 
 LOGGER = EasySortLogger()
-RANDOM_IMAGE_TENSOR = rand((980, 1280, 3))
 
 class Classifier: 
     def __init__(self):
+        from inference.models.yolo_world.yolo_world import YOLOWorld
         self.model = YOLOWorld(model_id="yolo_world/l")
         self.classes = ["plastic-bottle", "cardboard-box", "plastic-packaging", "other"]
         self.model.set_classes(self.classes); LOGGER.info("Classifier initialized")
 
     def __call__(self, image):
+        import supervision as sv
         results = self.model.infer(image)
         detections = sv.Detections.from_inference(results)
         world_view_detections = self.cam_view_to_world_view(detections)
         LOGGER.info("Inference done")
         return world_view_detections
-    
-    def test_speed(self) -> None: time0 = time.time(); self(RANDOM_IMAGE_TENSOR); print(f"Time taken: {round(time.time() - time0, 2)} seconds")
 
     def visualize(self, image_path: Union[Path, str]) -> None:
+        import cv2
+        import supervision as sv
         image = cv2.imread(image_path); detections = self(image)
         sv.plot_image(sv.BoundingBoxAnnotator(thickness=2).annotate(image, detections), (10, 10))
     
@@ -40,6 +36,8 @@ class Classifier:
         return detections
 
 if __name__ == "__main__":
+    import cv2
+    import supervision as sv
     SOURCE_IMAGE_PATH = "_old/helpers/test.jpg"
     image = cv2.imread(SOURCE_IMAGE_PATH)
     classifier = Classifier()
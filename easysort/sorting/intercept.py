@@ -0,0 +1,121 @@
+from typing import NamedTuple, Optional, Sequence, Union
+
+import numpy as np
+
+from easysort.common.config import RobotConfig
+from easysort.common.motion import travel_time
+
+_NEWTON_ITERATIONS = 5
+_TOLERANCE_S = 1e-6
+_SCAN_POINTS = 64
+_BISECTIONS = 30
+
+
+class Intercept(NamedTuple):
+    t: np.ndarray         # (N,) time the robot meets the item, same clock as the timestamps
+    positions: np.ndarray # (N, 2) where it meets the item
+    feasible: np.ndarray  # (N,) bool, False if the item leaves reach_x first
+
+
+class InterceptSolver():
+    """
+    Earliest time and place the robot can meet items moving on the belt.
+
+    The robot is at rest at robot_xy from t_free and moves point to point with a trapezoidal velocity profile
+    (max_speed, acceleration), so reaching a point at distance d takes travel_time(d). Items move towards x = 0
+    at conveyor_speed. The meeting time is the earliest t >= t_free with travel_time(|item(t) - robot_xy|) <= t - t_free,
+    and no earlier than the item enters reach_x.
+
+    With the robot faster than the belt, t - t_free - travel_time(distance at t) increases with t (except within
+    conveyor_speed^2 / acceleration of the robot, a fraction of a mm), so the meeting time is its only root:
+    - while the move reaches max_speed, distance = max_speed * (t - t_free - max_speed / acceleration) is a
+      quadratic in t, solved in closed form
+    - otherwise distance = acceleration * (t - t_free)^2 / 4 is a quartic, solved with a few Newton steps from
+      an upper bound, so they converge from above
+    Both are evaluated for all items at once.
+
+    args:
+        reach_x: (x_min, x_max) part of the belt the robot can pick from, None for no limit
+    """
+
+    def __init__(self, conveyor_speed: float, max_speed: float, acceleration: float, reach_x: Optional[Sequence[float]] = None):
+        if conveyor_speed >= max_speed: raise ValueError(f"The robot ({max_speed} cm/s) must be faster than the belt ({conveyor_speed} cm/s)")
+        self.conveyor_speed, self.max_speed, self.acceleration = conveyor_speed, max_speed, acceleration
+        self.reach_x = (-np.inf, np.inf) if reach_x is None else (float(reach_x[0]), float(reach_x[1]))
+        self.ramp_time = max_speed / acceleration
+        self.ramp_distance = max_speed * self.ramp_time
+
+    @classmethod
+    def from_config(cls, robot_config: RobotConfig) -> "InterceptSolver":
+        return cls(robot_config.conveyor_speed_cm_per_s, robot_config.xy_max_speed, robot_config.xy_acceleration, robot_config.reach_x)
+
+    def travel_time(self, distance: np.ndarray) -> np.ndarray: return travel_time(distance, self.max_speed, self.acceleration)
+
+    def position(self, positions: np.ndarray, timestamps: Union[float, np.ndarray], t: Union[float, np.ndarray]) -> np.ndarray:
+        """Where items seen at positions at timestamps are at time t."""
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+        x = positions[:, 0] - self.conveyor_speed * (np.asarray(t) - np.asarray(timestamps))
+        return np.stack([x, np.broadcast_to(positions[:, 1], x.shape)], axis=-1)
+
+    def reach_times(self, positions: np.ndarray, timestamps: Union[float, np.ndarray]):
+        """Times at which the items enter and leave reach_x."""
+        x0 = np.asarray(positions, dtype=np.float64).reshape(-1, 2)[:, 0] + self.conveyor_speed * np.asarray(timestamps) # x at time 0
+        x_min, x_max = self.reach_x
+        return (x0 - x_max) / self.conveyor_speed, (x0 - x_min) / self.conveyor_speed
+
+    def _scan(self, wx: np.ndarray, wy: np.ndarray, upper: np.ndarray) -> np.ndarray:
+        """
+        Earliest root in [0, upper] by a grid scan and bisection, for the items Newton does not settle: those passing
+        within conveyor_speed^2 / acceleration of the robot, where there can be several roots.
+        """
+        def slack(tau): return tau - self.travel_time(np.hypot(wx[:, None] - self.conveyor_speed * tau, wy[:, None]) if np.ndim(tau) > 1
+                                                      else np.hypot(wx - self.conveyor_speed * tau, wy))
+        grid = upper[:, None] * np.linspace(0.0, 1.0, _SCAN_POINTS)
+        first = np.argmax(slack(grid) >= 0, axis=1) # upper is feasible, so there is one
+        rows = np.arange(len(wx))
+        lo, hi = grid[rows, np.maximum(first - 1, 0)], grid[rows, first]
+        for _ in range(_BISECTIONS):
+            mid = (lo + hi) / 2
+            feasible = slack(mid) >= 0
+            hi, lo = np.where(feasible, mid, hi), np.where(feasible, lo, mid)
+        return hi
+
+    def solve(self, positions: np.ndarray, timestamps: Union[float, np.ndarray], robot_xy: Sequence[float], t_free: float) -> Intercept:
+        """
+        args:
+            positions: (N, 2) item positions in cm
+            timestamps: Time of each position (or one time for all), same clock as t_free
+            robot_xy: Where the robot is at rest from t_free
+            t_free: Earliest time the robot can start moving
+        """
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+        v, a, ramp_time = self.conveyor_speed, self.acceleration, self.ramp_time
+        # Item relative to the robot at t_free: (wx - v * tau, wy) at tau seconds after t_free
+        wx = positions[:, 0] - v * (t_free - np.asarray(timestamps, dtype=np.float64)) - robot_xy[0]
+        wy = positions[:, 1] - robot_xy[1]
+        w2 = wx * wx + wy * wy
+
+        # Trapezoidal: |w + u tau| = max_speed * (tau - ramp_time), the larger root of the squared equation
+        vm2 = self.max_speed * self.max_speed
+        qa, qb, qc = v * v - vm2, 2 * vm2 * ramp_time - 2 * v * wx, w2 - vm2 * ramp_time * ramp_time
+        tau = (-qb - np.sqrt(np.maximum(qb * qb - 4 * qa * qc, 0.0))) / (2 * qa)
+
+        triangular = np.hypot(wx - v * tau, wy) < self.ramp_distance
+        if triangular.any():
+            # Triangular: a * tau^2 / 4 = |w + u tau|, Newton on the squared form starting from the root of
+            # a * tau^2 / 4 = |w| + v * tau, an upper bound
+            twx, tw2 = wx[triangular], w2[triangular]
+            s = upper = np.minimum(2 * (v + np.sqrt(v * v + a * np.sqrt(tw2))) / a, 2 * ramp_time)
+            a2 = a * a / 16
+            for _ in range(_NEWTON_ITERATIONS):
+                f = a2 * s ** 4 - (tw2 - 2 * v * twx * s + v * v * s * s)
+                df = 4 * a2 * s ** 3 + 2 * v * twx - 2 * v * v * s
+                s = np.maximum(s - f / np.where(df > 0, df, np.inf), 0.0)
+            twy = wy[triangular]
+            unsolved = np.abs(self.travel_time(np.hypot(twx - v * s, twy)) - s) > _TOLERANCE_S
+            if unsolved.any(): s[unsolved] = self._scan(twx[unsolved], twy[unsolved], upper[unsolved])
+            tau[triangular] = s
+
+        t_enter, t_leave = self.reach_times(positions, timestamps)
+        t = np.maximum(t_free + tau, t_enter)
+        return Intercept(t, self.position(positions, timestamps, t), t <= t_leave)
@@ -0,0 +1,97 @@
+"""
+Detection accuracy: COCO-style mean average precision over IoU thresholds 0.5:0.95, in NumPy.
+
+Predictions are matched to ground truth per image and IoU threshold, highest confidence first, each ground
+truth box at most once and only to a prediction of the same class. AP is the area under the interpolated
+precision-recall curve sampled at 101 recall points; mAP averages over the classes present in the ground truth.
+"""
+from typing import List, NamedTuple
+
+import numpy as np
+
+IOU_THRESHOLDS = np.linspace(0.5, 0.95, 10)
+RECALL_POINTS = np.linspace(0, 1, 101)
+
+
+class DetectionMetrics(NamedTuple):
+    map50: float
+    map50_95: float
+    ap50_per_class: np.ndarray # NaN for classes without ground truth
+
+
+def iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """(N, M) IoU of (N, 4) and (M, 4) xyxy boxes."""
+    top_left = np.maximum(a[:, None, :2], b[None, :, :2])
+    bottom_right = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    intersection = np.clip(bottom_right - top_left, 0, None).prod(axis=2)
+    area_a, area_b = (a[:, 2:] - a[:, :2]).prod(axis=1), (b[:, 2:] - b[:, :2]).prod(axis=1)
+    return intersection / np.maximum(area_a[:, None] + area_b[None] - intersection, 1e-9)
+
+
+def yolo_to_xyxy(labels: np.ndarray, width: int, height: int) -> np.ndarray:
+    """Normalized (cx, cy, w, h) rows of YOLO label files to xyxy pixels."""
+    cx, cy, w, h = (labels[:, 1:5] * [width, height, width, height]).T
+    return np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+
+
+def match(pred_xyxy: np.ndarray, pred_confidence: np.ndarray, pred_class: np.ndarray, gt_xyxy: np.ndarray, gt_class: np.ndarray,
+          iou_thresholds: np.ndarray = IOU_THRESHOLDS) -> np.ndarray:
+    """(N_pred, N_thresholds) true positive flags of the predictions of one image."""
+    true_positive = np.zeros((len(pred_xyxy), len(iou_thresholds)), dtype=bool)
+    if not len(pred_xyxy) or not len(gt_xyxy): return true_positive
+    iou = iou_matrix(pred_xyxy, gt_xyxy)
+    iou[pred_class[:, None] != gt_class[None]] = 0.0
+    order = np.argsort(-pred_confidence, kind="stable")
+    for t, threshold in enumerate(iou_thresholds):
+        taken = np.zeros(len(gt_xyxy), dtype=bool)
+        for i in order:
+            candidates = np.where(taken, 0.0, iou[i])
+            best = candidates.argmax()
+            if candidates[best] >= threshold: true_positive[i, t], taken[best] = True, True
+    return true_positive
+
+
+class MeanAveragePrecision():
+    """Accumulates images with update(), then compute() the metrics of all of them."""
+
+    def __init__(self, n_classes: int, iou_thresholds: np.ndarray = IOU_THRESHOLDS):
+        self.n_classes, self.iou_thresholds = n_classes, np.asarray(iou_thresholds)
+        self._true_positive: List[np.ndarray] = []
+        self._confidence: List[np.ndarray] = []
+        self._class: List[np.ndarray] = []
+        self.n_ground_truth = np.zeros(n_classes, dtype=np.int64)
+
+    def update(self, pred_xyxy: np.ndarray, pred_confidence: np.ndarray, pred_class: np.ndarray, gt_xyxy: np.ndarray,
+               gt_class: np.ndarray) -> None:
+        pred_class, gt_class = np.asarray(pred_class, dtype=np.int64), np.asarray(gt_class, dtype=np.int64)
+        self._true_positive.append(match(np.asarray(pred_xyxy, dtype=np.float64).reshape(-1, 4), np.asarray(pred_confidence), pred_class,
+                                         np.asarray(gt_xyxy, dtype=np.float64).reshape(-1, 4), gt_class, self.iou_thresholds))
+        self._confidence.append(np.asarray(pred_confidence, dtype=np.float64))
+        self._class.append(pred_class)
+        self.n_ground_truth += np.bincount(gt_class, minlength=self.n_classes)
+
+    def compute(self) -> DetectionMetrics:
+        true_positive = np.concatenate(self._true_positive) if self._true_positive else np.zeros((0, len(self.iou_thresholds)), dtype=bool)
+        confidence = np.concatenate(self._confidence) if self._confidence else np.zeros(0)
+        classes = np.concatenate(self._class) if self._class else np.zeros(0, dtype=np.int64)
+        ap = np.full((self.n_classes, len(self.iou_thresholds)), np.nan)
+        for c in np.flatnonzero(self.n_ground_truth):
+            mine = classes == c
+            hits = true_positive[mine][np.argsort(-confidence[mine], kind="stable")]
+            ap[c] = average_precision(hits, self.n_ground_truth[c])
+        if not self.n_ground_truth.any(): return DetectionMetrics(0.0, 0.0, ap[:, 0])
+        return DetectionMetrics(float(np.nanmean(ap[:, 0])), float(np.nanmean(ap)), ap[:, 0])
+
+
+def average_precision(hits: np.ndarray, n_ground_truth: int) -> np.ndarray:
+    """AP per IoU threshold from (N, N_thresholds) true positive flags sorted by decreasing confidence."""
+    if not len(hits): return np.zeros(hits.shape[1])
+    true_positives = np.cumsum(hits, axis=0)
+    recall = true_positives / n_ground_truth
+    precision = true_positives / np.arange(1, len(hits) + 1)[:, None]
+    precision = np.maximum.accumulate(precision[::-1], axis=0)[::-1] # Interpolated: best precision at this recall or higher
+    ap = np.empty(hits.shape[1])
+    for t in range(hits.shape[1]):
+        index = np.searchsorted(recall[:, t], RECALL_POINTS, side="left")
+        ap[t] = np.where(index < len(hits), precision[np.minimum(index, len(hits) - 1), t], 0.0).mean()
+    return ap
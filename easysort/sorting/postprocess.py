@@ -0,0 +1,105 @@
+"""
+NumPy pre- and post-processing for YOLOv8 detectors exported without their own NMS (ONNX, tinygrad, ...).
+
+Preprocessing letterboxes BGR frames to a square input: resize keeping the aspect ratio, pad with grey,
+convert to RGB NCHW float32 in [0, 1]. The raw YOLOv8 output is (batch, 4 + n_classes, n_anchors) with
+(cx, cy, w, h) boxes in input pixels and per-class scores; decode_yolov8 turns it into boxes in frame pixels.
+"""
+from typing import List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_INPUT_SIZE = 640
+DEFAULT_CONF_THRESHOLD = 0.25
+DEFAULT_IOU_THRESHOLD = 0.45
+DEFAULT_MAX_DETECTIONS = 300
+PAD_VALUE = 114
+
+
+class Letterbox(NamedTuple):
+    """How a frame was mapped into the model input: input = frame * scale + (pad_x, pad_y)."""
+    scale: float
+    pad_x: float
+    pad_y: float
+    frame_shape: Tuple[int, int]
+
+
+class RawDetections(NamedTuple):
+    xyxy: np.ndarray       # (N, 4) float32, frame pixels
+    confidence: np.ndarray # (N,) float32
+    class_id: np.ndarray   # (N,) int
+
+
+def letterbox(frame: np.ndarray, size: int = DEFAULT_INPUT_SIZE) -> Tuple[np.ndarray, Letterbox]:
+    """Resizes a HxWx3 frame to fit size x size keeping its aspect ratio, centred on a grey square."""
+    import cv2
+    height, width = frame.shape[:2]
+    scale = min(size / height, size / width)
+    new_width, new_height = round(width * scale), round(height * scale)
+    left, top = (size - new_width) // 2, (size - new_height) // 2
+    out = np.full((size, size, 3), PAD_VALUE, dtype=np.uint8)
+    resized = frame if (new_width, new_height) == (width, height) else cv2.resize(frame, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+    out[top:top + new_height, left:left + new_width] = resized
+    return out, Letterbox(scale, left, top, (height, width))
+
+
+def preprocess(frames: Sequence[np.ndarray], size: int = DEFAULT_INPUT_SIZE) -> Tuple[np.ndarray, List[Letterbox]]:
+    """Letterboxes BGR frames into one (N, 3, size, size) float32 RGB batch in [0, 1]."""
+    batch = np.empty((len(frames), 3, size, size), dtype=np.float32)
+    boxes = []
+    for i, frame in enumerate(frames):
+        image, box = letterbox(frame, size)
+        np.multiply(image[:, :, ::-1].transpose(2, 0, 1), 1 / 255, out=batch[i], casting="unsafe")
+        boxes.append(box)
+    return batch, boxes
+
+
+def box_iou(box: np.ndarray, boxes: np.ndarray) -> np.ndarray:
+    """IoU of one xyxy box with (N, 4) xyxy boxes."""
+    width = np.clip(np.minimum(box[2], boxes[:, 2]) - np.maximum(box[0], boxes[:, 0]), 0, None)
+    height = np.clip(np.minimum(box[3], boxes[:, 3]) - np.maximum(box[1], boxes[:, 1]), 0, None)
+    intersection = width * height
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    return intersection / np.maximum((box[2] - box[0]) * (box[3] - box[1]) + areas - intersection, 1e-9)
+
+
+def nms(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float = DEFAULT_IOU_THRESHOLD,
+        max_detections: int = DEFAULT_MAX_DETECTIONS) -> np.ndarray:
+    """Greedy non-maximum suppression. Returns the indices of the kept boxes, highest score first."""
+    order = np.argsort(-scores, kind="stable")
+    keep = []
+    while len(order) and len(keep) < max_detections:
+        best, order = order[0], order[1:]
+        keep.append(best)
+        order = order[box_iou(boxes[best], boxes[order]) <= iou_threshold]
+    return np.asarray(keep, dtype=np.int64)
+
+
+def batched_nms(boxes: np.ndarray, scores: np.ndarray, class_ids: np.ndarray, iou_threshold: float = DEFAULT_IOU_THRESHOLD,
+                max_detections: int = DEFAULT_MAX_DETECTIONS) -> np.ndarray:
+    """Per-class NMS in one pass: boxes of different classes are moved apart so they never overlap."""
+    if not len(boxes): return np.empty(0, dtype=np.int64)
+    offsets = class_ids.astype(boxes.dtype)[:, None] * (boxes.max() + 1)
+    return nms(boxes + offsets, scores, iou_threshold, max_detections)
+
+
+def decode_yolov8(output: np.ndarray, boxes: Sequence[Letterbox], conf_threshold: float = DEFAULT_CONF_THRESHOLD,
+                  iou_threshold: float = DEFAULT_IOU_THRESHOLD, max_detections: int = DEFAULT_MAX_DETECTIONS) -> List[RawDetections]:
+    """
+    Turns raw (batch, 4 + n_classes, n_anchors) YOLOv8 output into per-frame detections in frame pixels:
+    best class per anchor, confidence threshold, per-class NMS, undo the letterbox.
+    """
+    results = []
+    for prediction, box in zip(output, boxes):
+        scores_per_class = prediction[4:]
+        class_id = scores_per_class.argmax(axis=0)
+        confidence = scores_per_class[class_id, np.arange(prediction.shape[1])]
+        candidates = np.flatnonzero(confidence > conf_threshold)
+        cx, cy, w, h = prediction[:4, candidates]
+        xyxy = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+        keep = batched_nms(xyxy, confidence[candidates], class_id[candidates], iou_threshold, max_detections)
+        xyxy = (xyxy[keep] - [box.pad_x, box.pad_y, box.pad_x, box.pad_y]) / box.scale
+        height, width = box.frame_shape
+        xyxy = np.clip(xyxy, 0, [width, height, width, height]).astype(np.float32)
+        results.append(RawDetections(xyxy, confidence[candidates][keep].astype(np.float32), class_id[candidates][keep]))
+    return results
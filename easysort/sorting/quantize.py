@@ -0,0 +1,149 @@
+"""
+Post-training int8 quantization of an exported ONNX detector, gated on accuracy.
+
+    python -m easysort.sorting.quantize --model easysort/sorting/train/weights/best.onnx --tolerance 0.01
+
+1. Static QDQ quantization (int8 weights per channel, int8 activations) calibrated on train images
+2. fp32 and int8 evaluated on the valid and test splits: mAP50, mAP50-95 and single-frame latency
+3. The int8 model is kept as <model>.int8.onnx only if its mAP50-95 is at most tolerance below fp32 on every
+   split, otherwise it is deleted and the command exits with status 1. The report is written as JSON either way.
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from easysort.common.logger import EasySortLogger
+from easysort.sorting.backends import DEFAULT_ONNX_MODEL_PATH, OnnxBackend
+from easysort.sorting.dataset import load_images, load_labels
+from easysort.sorting.metrics import MeanAveragePrecision, yolo_to_xyxy
+from easysort.sorting.postprocess import DEFAULT_INPUT_SIZE, preprocess
+
+LOGGER = EasySortLogger()
+DEFAULT_TOLERANCE = 0.01                # Largest accepted mAP50-95 drop, absolute
+DEFAULT_CALIBRATION_IMAGES = 100
+EVALUATION_SPLITS = ["valid", "test"]
+EVALUATION_CONF_THRESHOLD = 0.001       # mAP is computed over the whole precision-recall curve
+LATENCY_FRAMES = 20
+
+
+class CalibrationImages():
+    """Feeds letterboxed frames one by one to the calibrator (the onnxruntime CalibrationDataReader interface)."""
+
+    def __init__(self, frames: Sequence[np.ndarray], input_name: str, input_size: int = DEFAULT_INPUT_SIZE):
+        self.frames, self.input_name, self.input_size = list(frames), input_name, input_size
+        self._index = 0
+
+    def get_next(self) -> Optional[Dict[str, np.ndarray]]:
+        if self._index >= len(self.frames): return None
+        batch, _ = preprocess(self.frames[self._index:self._index + 1], self.input_size)
+        self._index += 1
+        return {self.input_name: batch}
+
+    def rewind(self) -> None: self._index = 0
+
+
+def quantize(model_path: Union[str, Path], output_path: Union[str, Path], calibration_frames: Sequence[np.ndarray]) -> Path:
+    """Static int8 quantization of model_path to output_path in QDQ format."""
+    import onnxruntime as ort
+    from onnxruntime.quantization import CalibrationMethod, QuantFormat, QuantType, quantize_static
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+    session = ort.InferenceSession(str(model_path), providers=["CPUExecutionProvider"])
+    model_input = session.get_inputs()[0]
+    input_size = model_input.shape[2] if isinstance(model_input.shape[2], int) else DEFAULT_INPUT_SIZE
+    prepared = Path(output_path).with_suffix(".prep.onnx")
+    quant_pre_process(str(model_path), str(prepared))
+    try:
+        quantize_static(str(prepared), str(output_path), CalibrationImages(calibration_frames, model_input.name, input_size),
+                        quant_format=QuantFormat.QDQ, activation_type=QuantType.QInt8, weight_type=QuantType.QInt8,
+                        per_channel=True, calibrate_method=CalibrationMethod.MinMax)
+    finally: prepared.unlink(missing_ok=True)
+    LOGGER.info(f"Quantized {model_path} to {output_path} with {len(calibration_frames)} calibration images")
+    return Path(output_path)
+
+
+def evaluate(backend: OnnxBackend, frames: List[np.ndarray], labels: List[np.ndarray], latency_frames: int = LATENCY_FRAMES) -> dict:
+    """mAP on frames at the evaluation threshold, then latency percentiles of one frame at the backend threshold."""
+    metric = MeanAveragePrecision(len(backend.classes))
+    deploy_threshold, backend.conf_threshold = backend.conf_threshold, EVALUATION_CONF_THRESHOLD
+    try:
+        for frame, label in zip(frames, labels):
+            detections, = backend.infer_raw([frame])
+            height, width = frame.shape[:2]
+            metric.update(detections.xyxy, detections.confidence, detections.class_id, yolo_to_xyxy(label, width, height), label[:, 0])
+    finally: backend.conf_threshold = deploy_threshold
+    backend.infer_raw(frames[:1]) # warmup
+    latencies = []
+    for frame in frames[:latency_frames]:
+        start = time.perf_counter()
+        backend.infer_raw([frame])
+        latencies.append((time.perf_counter() - start) * 1e3)
+    result = metric.compute()
+    return {"map50": result.map50, "map50_95": result.map50_95,
+            "latency_ms_p50": float(np.percentile(latencies, 50)), "latency_ms_p90": float(np.percentile(latencies, 90))}
+
+
+def quantize_and_evaluate(model_path: Union[str, Path] = DEFAULT_ONNX_MODEL_PATH, output_path: Optional[Union[str, Path]] = None,
+                          tolerance: float = DEFAULT_TOLERANCE, n_calibration: int = DEFAULT_CALIBRATION_IMAGES,
+                          splits: Sequence[str] = EVALUATION_SPLITS, limit: Optional[int] = None,
+                          intra_op_threads: Optional[int] = None, keep_rejected: bool = False) -> dict:
+    """Runs the whole pipeline, returns the report. The int8 model only stays on disk if report["accepted"]."""
+    model_path = Path(model_path)
+    output_path = Path(output_path) if output_path is not None else model_path.with_suffix(".int8.onnx")
+    quantize(model_path, output_path, load_images("train", n_calibration))
+    fp32 = OnnxBackend(model_path, intra_op_threads=intra_op_threads)
+    int8 = OnnxBackend(output_path, classes=fp32.classes, intra_op_threads=intra_op_threads)
+    report = {"tolerance": tolerance, "models": {}}
+    for name, backend, path in [("fp32", fp32, model_path), ("int8", int8, output_path)]:
+        report["models"][name] = {"path": str(path), "size_mb": path.stat().st_size / 1e6, "splits": {}}
+    for split in splits:
+        frames, labels = load_images(split, limit), load_labels(split, limit)
+        for name, backend in [("fp32", fp32), ("int8", int8)]:
+            report["models"][name]["splits"][split] = evaluate(backend, frames, labels)
+    drops = {split: report["models"]["fp32"]["splits"][split]["map50_95"] - report["models"]["int8"]["splits"][split]["map50_95"]
+             for split in splits}
+    report["map50_95_drop"] = drops
+    report["accepted"] = bool(max(drops.values()) <= tolerance)
+    if not report["accepted"]:
+        LOGGER.warning(f"Rejected {output_path}: mAP50-95 drop {max(drops.values()):.4f} is above the tolerance {tolerance}")
+        if not keep_rejected: output_path.unlink(missing_ok=True)
+    return report
+
+
+def format_report(report: dict) -> str:
+    lines = [f"{'model':6s} {'split':6s} {'size MB':>8s} {'mAP50':>7s} {'mAP50-95':>9s} {'p50 ms':>8s} {'p90 ms':>8s}"]
+    for name, model in report["models"].items():
+        for split, result in model["splits"].items():
+            lines.append(f"{name:6s} {split:6s} {model['size_mb']:8.1f} {result['map50']:7.3f} {result['map50_95']:9.3f} "
+                         f"{result['latency_ms_p50']:8.1f} {result['latency_ms_p90']:8.1f}")
+    drop = max(report["map50_95_drop"].values())
+    lines.append(f"int8 {'accepted' if report['accepted'] else 'REJECTED'}: largest mAP50-95 drop {drop:.4f} (tolerance {report['tolerance']})")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=str(DEFAULT_ONNX_MODEL_PATH))
+    parser.add_argument("--output", default=None, help="Quantized model, <model>.int8.onnx by default")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Largest accepted mAP50-95 drop")
+    parser.add_argument("--calibration-images", type=int, default=DEFAULT_CALIBRATION_IMAGES)
+    parser.add_argument("--limit", type=int, default=None, help="Evaluate on the first images of each split only")
+    parser.add_argument("--threads", type=int, default=None, help="ONNX Runtime intra-op threads")
+    parser.add_argument("--report", default=None, help="JSON report, next to the quantized model by default")
+    parser.add_argument("--keep-rejected", action="store_true")
+    args = parser.parse_args()
+    report = quantize_and_evaluate(args.model, args.output, args.tolerance, args.calibration_images, limit=args.limit,
+                                   intra_op_threads=args.threads, keep_rejected=args.keep_rejected)
+    report_path = Path(args.report) if args.report else Path(report["models"]["int8"]["path"]).with_suffix(".report.json")
+    report_path.write_text(json.dumps(report, indent=2))
+    print(format_report(report))
+    print(f"Report written to {report_path}")
+    sys.exit(0 if report["accepted"] else 1)
+
+
+if __name__ == "__main__":
+    main()
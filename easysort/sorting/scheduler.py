@@ -0,0 +1,146 @@
+import time
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+from easysort.common.config import RobotConfig
+from easysort.common.tracing import TRACER
+from easysort.sorting.intercept import Intercept, InterceptSolver
+
+DEFAULT_HORIZON = 4
+DEFAULT_SEARCH_CANDIDATES = 6
+
+
+class Plan(NamedTuple):
+    """Picks in execution order. order indexes the items passed to PickScheduler.plan, times are relative to the plan."""
+    order: np.ndarray          # (k,) int
+    pick_times: np.ndarray     # (k,)
+    pick_positions: np.ndarray # (k, 2)
+    finish_times: np.ndarray   # (k,) item dropped, robot free again
+
+
+class PickScheduler():
+    """
+    Chooses the order in which to pick the items on the belt, to sort as many items per minute as possible.
+
+    A pick cycle is: travel from where the robot is to where it meets the item (see InterceptSolver), pick, travel to the drop
+    container of the item's class, drop. The plan is the order of up to horizon picks that sorts the most items
+    and, among those, finishes the last pick first, i.e. the most items per minute over the horizon. It is
+    searched exactly over every ordering of the search_candidates items whose cycle would finish first from
+    the current state, level by level with one vectorized intercept solve per pick depth: 6 candidates and
+    horizon 4 is 360 orderings in well under a millisecond. Items outside the candidates only come after
+    them, greedily (earliest finish next), benchmarks/bench_scheduler.py measures what this costs against
+    searching all items.
+    Only the first pick is meant to be executed, then plan again from the new robot state and detections.
+
+    Items move towards x = 0 at conveyor_speed. Items of classes without a drop position are never picked.
+
+    args:
+        horizon: Maximum number of picks planned ahead
+        search_candidates: Items the orderings are searched over, the search grows as search_candidates^horizon
+    """
+
+    def __init__(self, conveyor_speed: float, max_speed: float, acceleration: float, drop_positions: Dict[str, Sequence[float]],
+                 reach_x: Sequence[float], pick_time_s: float, drop_time_s: float, horizon: int = DEFAULT_HORIZON,
+                 search_candidates: int = DEFAULT_SEARCH_CANDIDATES):
+        self.conveyor_speed, self.max_speed, self.acceleration = conveyor_speed, max_speed, acceleration
+        self.solver = InterceptSolver(conveyor_speed, max_speed, acceleration, reach_x)
+        self.classes = list(drop_positions)
+        self.drop_positions = np.asarray([drop_positions[name] for name in self.classes], dtype=np.float64).reshape(-1, 2)
+        self.reach_x = (float(reach_x[0]), float(reach_x[1]))
+        self.pick_time_s, self.drop_time_s, self.horizon, self.search_candidates = pick_time_s, drop_time_s, horizon, search_candidates
+        self._class_index = {name: i for i, name in enumerate(self.classes)}
+
+    @classmethod
+    def from_config(cls, robot_config: RobotConfig, horizon: int = DEFAULT_HORIZON,
+                    search_candidates: int = DEFAULT_SEARCH_CANDIDATES) -> "PickScheduler":
+        return cls(robot_config.conveyor_speed_cm_per_s, robot_config.xy_max_speed, robot_config.xy_acceleration,
+                   robot_config.drop_positions, robot_config.reach_x, robot_config.pick_time_s, robot_config.drop_time_s, horizon,
+                   search_candidates)
+
+    def travel_time(self, distance: np.ndarray) -> np.ndarray: return self.solver.travel_time(distance)
+
+    def intercept(self, positions: np.ndarray, robot_xy: Sequence[float], t_free: float) -> Intercept:
+        """When and where the robot, at rest at robot_xy from t_free, can meet each item (positions at time 0)."""
+        return self.solver.solve(positions, 0.0, robot_xy, t_free)
+
+    def class_indices(self, classes: Sequence[str]) -> np.ndarray:
+        """Drop container index of every class name, -1 for classes that are not sorted."""
+        return np.fromiter((self._class_index.get(name, -1) for name in classes), dtype=np.int64, count=len(classes))
+
+    def _cycles(self, positions, containers, robot_xy, t) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Finish time, pick time and pick position of picking each item next. Finish is inf if the item cannot be reached.
+        robot_xy and t may be per item, (xs, ys) and (N,), to evaluate picks from different robot states at once.
+        """
+        t_pick, xy, feasible = self.intercept(positions, robot_xy, t)
+        finish = t_pick + self.pick_time_s + self.travel_time(np.linalg.norm(self.drop_positions[containers] - xy, axis=1)) + self.drop_time_s
+        finish[~feasible] = np.inf
+        return finish, t_pick, xy
+
+    def _search(self, positions, containers, robot_xy, t: float, depth: int) -> List[Tuple[int, float, np.ndarray, float]]:
+        """
+        Exact search over all orderings of up to depth of the given items. Each level extends every ordering
+        of the previous level by every unused item, all in one _cycles call, and keeps the feasible ones.
+        The deepest level holds the orderings with the most picks, its earliest finishing one is the best.
+        Returns its (item, pick time, pick position, finish) steps.
+        """
+        n = len(positions)
+        used = np.zeros((1, n), dtype=bool)
+        xs, ys, ts = np.array([robot_xy[0]], dtype=np.float64), np.array([robot_xy[1]], dtype=np.float64), np.array([t])
+        levels = [] # Per level: parent ordering, item, pick time, pick position, finish of every ordering
+        for _ in range(depth):
+            parents, items = np.nonzero(~used)
+            if not len(parents): break
+            finish, t_pick, xy = self._cycles(positions[items], containers[items], (xs[parents], ys[parents]), ts[parents])
+            keep = np.isfinite(finish)
+            if not keep.any(): break
+            parents, items, finish, t_pick, xy = parents[keep], items[keep], finish[keep], t_pick[keep], xy[keep]
+            levels.append((parents, items, t_pick, xy, finish))
+            used = used[parents]; used[np.arange(len(items)), items] = True
+            drops = self.drop_positions[containers[items]]
+            xs, ys, ts = drops[:, 0], drops[:, 1], finish
+        if not levels: return []
+        steps, row = [], int(np.argmin(levels[-1][4]))
+        for parents, items, t_pick, xy, finish in reversed(levels):
+            steps.append((int(items[row]), float(t_pick[row]), xy[row], float(finish[row])))
+            row = int(parents[row])
+        return steps[::-1]
+
+    def plan(self, positions: np.ndarray, classes: Sequence[str], robot_xy: Sequence[float], t_free: float = 0.0) -> Plan:
+        """
+        Plans up to horizon picks.
+
+        args:
+            positions: (N, 2) item positions in cm at time 0
+            classes: Class name of every item
+            robot_xy: Where the robot is when it becomes free
+            t_free: When the robot becomes free, in seconds after time 0
+        """
+        start_ns = time.perf_counter_ns()
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+        containers = self.class_indices(classes)
+        _, t_leave = self.solver.reach_times(positions, 0.0)
+        candidates = np.flatnonzero((containers >= 0) & (t_leave >= t_free))
+        order, pick_times, pick_positions, finish_times = [], [], [], []
+        robot_xy, t = (float(robot_xy[0]), float(robot_xy[1])), float(t_free)
+        if len(candidates) and self.horizon:
+            finish, _, _ = self._cycles(positions[candidates], containers[candidates], robot_xy, t)
+            nearest = np.argsort(finish)[:self.search_candidates]
+            searched = candidates[nearest[np.isfinite(finish[nearest])]]
+            for item, t_pick, xy, t_finish in self._search(positions[searched], containers[searched], robot_xy, t, self.horizon):
+                order.append(searched[item]); pick_times.append(t_pick); pick_positions.append(xy); finish_times.append(t_finish)
+            if order:
+                drop = self.drop_positions[containers[order[-1]]]
+                robot_xy, t = (drop[0], drop[1]), finish_times[-1]
+                candidates = candidates[~np.isin(candidates, order)]
+        for _ in range(min(self.horizon - len(order), len(candidates))):
+            finish, t_pick, xy = self._cycles(positions[candidates], containers[candidates], robot_xy, t)
+            best = int(np.argmin(finish))
+            if finish[best] == np.inf: break
+            drops = self.drop_positions[containers[candidates]]
+            order.append(candidates[best]); pick_times.append(t_pick[best]); pick_positions.append(xy[best]); finish_times.append(finish[best])
+            robot_xy, t = (drops[best, 0], drops[best, 1]), float(finish[best])
+            candidates = np.delete(candidates, best)
+        TRACER.record("scheduling", start_ns, time.perf_counter_ns())
+        return Plan(np.asarray(order, dtype=np.int64), np.asarray(pick_times), np.asarray(pick_positions).reshape(-1, 2), np.asarray(finish_times))
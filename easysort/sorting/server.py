@@ -0,0 +1,266 @@
+"""
+Inference server: one process holds the model and serves frames from any number of local clients over a Unix
+socket, so the sorter, pre-labelling and evaluation tools share one warm model instead of loading their own.
+
+    python -m easysort.sorting.server --backend onnx                       # serve
+    python -m easysort.sorting.server --health                             # query a running server
+
+Requests from all clients go through one FrameBatcher, so concurrent frames share forward passes.
+
+Wire format, both directions: <payload length: u32><message type: u8><payload>, little endian.
+    INFER   <height: u16><width: u16><channels: u8> + raw uint8 frame bytes (C order)
+    RESULT  <n: u32> + xyxy f32 (n, 4) + confidence f32 (n,) + class_id i32 (n,) + world_xy f32 (n, 2)
+    HEALTH  empty, answered with HEALTH_REPLY holding a JSON object (status, classes, request latency, ...)
+    ERROR   UTF-8 message
+"""
+import argparse
+import json
+import socket
+import socketserver
+import struct
+import threading
+import time
+from collections import deque
+from enum import IntEnum
+from pathlib import Path
+from typing import NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+from easysort.common.logger import EasySortLogger
+from easysort.sorting.batching import FrameBatcher
+
+LOGGER = EasySortLogger()
+DEFAULT_SOCKET_PATH = Path("/tmp/easysort-inference.sock")
+DEFAULT_KEEP_WARM_S = 30.0   # Idle time after which a dummy frame is run, so caches and clocks stay warm
+LATENCY_WINDOW = 1000        # Requests the health latency percentiles are computed over
+DEFAULT_FRAME_SHAPE = (980, 1280, 3)
+_HEADER = struct.Struct("<IB")
+_FRAME_HEADER = struct.Struct("<HHB")
+_COUNT = struct.Struct("<I")
+
+
+class MessageType(IntEnum):
+    INFER = 1
+    HEALTH = 2
+    RESULT = 0x81
+    HEALTH_REPLY = 0x82
+    ERROR = 0xFF
+
+
+class ServedDetections(NamedTuple):
+    xyxy: np.ndarray        # (N, 4) camera pixels
+    confidence: np.ndarray  # (N,)
+    class_id: np.ndarray    # (N,)
+    world_xy: np.ndarray    # (N, 2) belt cm, NaN if the server has no calibration
+
+
+def send_message(connection: socket.socket, message_type: MessageType, *payload: bytes) -> None:
+    """Sends the payload parts as one message without joining them, frames are sent straight from their array."""
+    connection.sendall(_HEADER.pack(sum(memoryview(part).nbytes for part in payload), message_type))
+    for part in payload: connection.sendall(part)
+
+
+def _receive_exactly(connection: socket.socket, n: int) -> bytearray:
+    buffer = bytearray(n)
+    view, received = memoryview(buffer), 0
+    while received < n:
+        chunk = connection.recv_into(view[received:], n - received)
+        if not chunk: raise ConnectionError("Connection closed")
+        received += chunk
+    return buffer
+
+
+def receive_message(connection: socket.socket) -> Tuple[MessageType, bytearray]:
+    length, message_type = _HEADER.unpack(_receive_exactly(connection, _HEADER.size))
+    return MessageType(message_type), _receive_exactly(connection, length)
+
+
+def encode_frame(frame: np.ndarray) -> Tuple[bytes, memoryview]:
+    """Header and the frame buffer itself, no copy for contiguous uint8 frames."""
+    frame = np.ascontiguousarray(frame, dtype=np.uint8)
+    height, width = frame.shape[:2]
+    return _FRAME_HEADER.pack(height, width, frame.shape[2] if frame.ndim == 3 else 1), memoryview(frame).cast("B")
+
+
+def decode_frame(payload: bytearray) -> np.ndarray:
+    height, width, channels = _FRAME_HEADER.unpack_from(payload)
+    frame = np.frombuffer(payload, dtype=np.uint8, offset=_FRAME_HEADER.size)
+    return frame.reshape(height, width, channels) if channels > 1 else frame.reshape(height, width)
+
+
+def encode_detections(detections) -> bytes:
+    """Any detections with xyxy, confidence, class_id and optionally data["world_xy"] (sv.Detections, ServedDetections)."""
+    n = len(detections.xyxy)
+    world_xy = getattr(detections, "world_xy", None)
+    if world_xy is None: world_xy = getattr(detections, "data", {}).get("world_xy", np.full((n, 2), np.nan))
+    return (_COUNT.pack(n) + np.asarray(detections.xyxy, dtype=np.float32).tobytes() + np.asarray(detections.confidence, dtype=np.float32).tobytes()
+            + np.asarray(detections.class_id, dtype=np.int32).tobytes() + np.asarray(world_xy, dtype=np.float32).tobytes())
+
+
+def decode_detections(payload: bytearray) -> ServedDetections:
+    n, = _COUNT.unpack_from(payload)
+    arrays, offset = [], _COUNT.size
+    for dtype, shape in [(np.float32, (n, 4)), (np.float32, (n,)), (np.int32, (n,)), (np.float32, (n, 2))]:
+        array = np.frombuffer(payload, dtype=dtype, count=int(np.prod(shape)), offset=offset).reshape(shape)
+        arrays.append(array); offset += array.nbytes
+    return ServedDetections(*arrays)
+
+
+class InferenceServer():
+    """
+    args:
+        classifier: Classifier (or anything with infer_batch, classes, max_batch_size and max_wait_s)
+        keep_warm_s: Run a dummy frame after this long without requests, None to never
+        warmup: Run Classifier.warmup before accepting clients
+    """
+
+    def __init__(self, classifier, socket_path: Union[str, Path] = DEFAULT_SOCKET_PATH, keep_warm_s: Optional[float] = DEFAULT_KEEP_WARM_S,
+                 warmup: bool = True):
+        self.classifier, self.socket_path, self.keep_warm_s, self.warmup = classifier, Path(socket_path), keep_warm_s, warmup
+        self.batcher: Optional[FrameBatcher] = None
+        self.n_requests = self.n_errors = 0
+        self.started_at = self.last_request_at = time.monotonic()
+        self._latencies_ms = deque(maxlen=LATENCY_WINDOW)
+        self._frame_shape = DEFAULT_FRAME_SHAPE # Of the last request, for the keep-warm frames
+        self._n_clients = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._server: Optional[socketserver.ThreadingUnixStreamServer] = None
+        self._threads = []
+
+    def start(self) -> "InferenceServer":
+        if self.warmup: self.classifier.warmup()
+        self.batcher = FrameBatcher(self.classifier.infer_batch, self.classifier.max_batch_size, self.classifier.max_wait_s)
+        if self.socket_path.exists(): self.socket_path.unlink() # Left over by a server that did not stop cleanly
+        server = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self): server._serve_client(self.request)
+
+        self._server = socketserver.ThreadingUnixStreamServer(str(self.socket_path), Handler)
+        self._server.daemon_threads = True
+        self._threads = [threading.Thread(target=self._server.serve_forever, name="InferenceServer", daemon=True)]
+        if self.keep_warm_s is not None: self._threads.append(threading.Thread(target=self._keep_warm, name="InferenceServerKeepWarm", daemon=True))
+        for thread in self._threads: thread.start()
+        self.started_at = self.last_request_at = time.monotonic()
+        LOGGER.info(f"Inference server listening on {self.socket_path}")
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._server is not None: self._server.shutdown(); self._server.server_close()
+        for thread in self._threads: thread.join()
+        if self.batcher is not None: self.batcher.close()
+        if self.socket_path.exists(): self.socket_path.unlink()
+
+    def __enter__(self) -> "InferenceServer": return self.start()
+    def __exit__(self, *exc) -> None: self.stop()
+
+    def serve_forever(self) -> None:
+        self.start()
+        try: self._stop.wait()
+        except KeyboardInterrupt: pass
+        finally: self.stop()
+
+    def health(self) -> dict:
+        with self._lock: latencies = np.asarray(self._latencies_ms)
+        percentiles = dict(zip(["p50", "p90", "p99"], np.percentile(latencies, [50, 90, 99]).tolist())) if len(latencies) else {}
+        return {"status": "ok", "classes": list(self.classifier.classes), "uptime_s": time.monotonic() - self.started_at,
+                "n_clients": self._n_clients, "n_requests": self.n_requests, "n_errors": self.n_errors,
+                "n_batches": self.batcher.n_batches if self.batcher else 0,
+                "mean_batch_size": self.batcher.mean_batch_size if self.batcher else 0.0, "latency_ms": percentiles}
+
+    def _serve_client(self, connection: socket.socket) -> None:
+        with self._lock: self._n_clients += 1
+        try:
+            while not self._stop.is_set():
+                try: message_type, payload = receive_message(connection)
+                except (ConnectionError, OSError): return
+                if message_type == MessageType.HEALTH:
+                    send_message(connection, MessageType.HEALTH_REPLY, json.dumps(self.health()).encode()); continue
+                if message_type != MessageType.INFER:
+                    send_message(connection, MessageType.ERROR, f"Unexpected message {message_type.name}".encode()); continue
+                start = time.perf_counter()
+                try:
+                    frame = decode_frame(payload)
+                    self._frame_shape = frame.shape
+                    reply = MessageType.RESULT, encode_detections(self.batcher(frame))
+                except Exception as err:
+                    with self._lock: self.n_errors += 1
+                    reply = MessageType.ERROR, f"{type(err).__name__}: {err}".encode()
+                with self._lock:
+                    self.n_requests += 1; self.last_request_at = time.monotonic()
+                    self._latencies_ms.append((time.perf_counter() - start) * 1e3)
+                send_message(connection, *reply)
+        finally:
+            with self._lock: self._n_clients -= 1
+
+    def _keep_warm(self) -> None:
+        while not self._stop.wait(self.keep_warm_s / 2):
+            if time.monotonic() - self.last_request_at < self.keep_warm_s: continue
+            try: self.batcher(np.zeros(self._frame_shape, dtype=np.uint8)) # Through the batcher, backends need not be thread safe
+            except Exception as err: LOGGER.warning(f"Keep-warm inference failed: {err}")
+            self.last_request_at = time.monotonic()
+
+
+class InferenceClient():
+    """Connection to an InferenceServer. Safe to share between threads, requests are serialized per client."""
+
+    def __init__(self, socket_path: Union[str, Path] = DEFAULT_SOCKET_PATH, timeout: Optional[float] = None):
+        self.socket_path = Path(socket_path)
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.settimeout(timeout)
+        self._socket.connect(str(self.socket_path))
+        self._lock = threading.Lock()
+        self._classes = None
+
+    def _request(self, message_type: MessageType, *payload: bytes) -> Tuple[MessageType, bytearray]:
+        with self._lock:
+            send_message(self._socket, message_type, *payload)
+            reply_type, reply = receive_message(self._socket)
+        if reply_type == MessageType.ERROR: raise RuntimeError(f"Inference server error: {reply.decode()}")
+        return reply_type, reply
+
+    def infer_raw(self, frame: np.ndarray) -> ServedDetections: return decode_detections(self._request(MessageType.INFER, *encode_frame(frame))[1])
+
+    def health(self) -> dict: return json.loads(self._request(MessageType.HEALTH)[1])
+
+    @property
+    def classes(self) -> list:
+        if self._classes is None: self._classes = self.health()["classes"]
+        return self._classes
+
+    def __call__(self, frame: np.ndarray):
+        """Same result as Classifier.__call__: sv.Detections with class names and data["world_xy"]."""
+        import supervision as sv
+        result = self.infer_raw(frame)
+        return sv.Detections(xyxy=result.xyxy.copy(), confidence=result.confidence.copy(), class_id=result.class_id.astype(int),
+                             data={"class_name": np.asarray(self.classes)[result.class_id], "world_xy": result.world_xy.copy()})
+
+    def close(self) -> None: self._socket.close()
+    def __enter__(self) -> "InferenceClient": return self
+    def __exit__(self, *exc) -> None: self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--socket", default=str(DEFAULT_SOCKET_PATH))
+    parser.add_argument("--health", action="store_true", help="Print the health of a running server and exit")
+    parser.add_argument("--backend", default="yolo_world")
+    parser.add_argument("--model-path", default=None, help="Model file of the onnx / tinygrad backends")
+    parser.add_argument("--max-batch-size", type=int, default=None)
+    parser.add_argument("--max-wait-s", type=float, default=None)
+    parser.add_argument("--keep-warm-s", type=float, default=DEFAULT_KEEP_WARM_S)
+    args = parser.parse_args()
+    if args.health:
+        with InferenceClient(args.socket, timeout=5.0) as client: print(json.dumps(client.health(), indent=2))
+        return
+    from easysort.sorting.classifier import Classifier
+    kwargs = {key: value for key, value in [("max_batch_size", args.max_batch_size), ("max_wait_s", args.max_wait_s)] if value is not None}
+    if args.model_path is not None: kwargs["weights_path" if args.backend == "tinygrad" else "model_path"] = args.model_path
+    InferenceServer(Classifier(backend=args.backend, **kwargs), args.socket, args.keep_warm_s).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
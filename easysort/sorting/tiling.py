@@ -0,0 +1,123 @@
+"""
+Tiled inference for frames much wider than the model input, where small items (caps, cans) would shrink to
+a few pixels when the whole frame is letterboxed into the model.
+
+The frame is split into a grid of overlapping tiles, optionally plus the whole frame for items larger than a
+tile. All of them go through the model as one batch, the boxes are shifted back to frame pixels, and duplicates
+(an item seen by two tiles, or cut at a tile edge and also seen whole) are merged by one NMS over all tiles.
+That NMS compares boxes by intersection over the smaller box, so a box cut off at a tile edge is suppressed
+by the whole box of the same item, which plain IoU would keep. Boxes touching a tile edge inside the frame are
+ranked after whole boxes, so the whole box wins even when the cut one scored higher.
+"""
+import math
+from typing import List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+from easysort.sorting.postprocess import DEFAULT_MAX_DETECTIONS, RawDetections
+
+DEFAULT_GRID = (2, 2) # Rows, columns
+DEFAULT_OVERLAP = 0.2 # Fraction of a tile shared with its neighbour
+DEFAULT_MERGE_THRESHOLD = 0.6 # Intersection over the smaller box
+MERGE_METRICS = ["ios", "iou"]
+EDGE_MARGIN = 2 # Pixels, a box this close to a tile edge inside the frame is cut off by the tile
+
+
+class Tile(NamedTuple):
+    x0: int
+    y0: int
+    x1: int
+    y1: int
+
+
+def tile_grid(frame_shape: Tuple[int, ...], grid: Tuple[int, int] = DEFAULT_GRID, overlap: float = DEFAULT_OVERLAP) -> List[Tile]:
+    """Equally sized tiles covering the frame, row by row, neighbours sharing overlap of their size."""
+    if not 0 <= overlap < 1: raise ValueError(f"overlap must be in [0, 1), got {overlap}")
+    (height, width), (rows, cols) = frame_shape[:2], grid
+    if rows < 1 or cols < 1: raise ValueError(f"grid must have at least one row and column, got {grid}")
+    tile_height = min(height, math.ceil(height / (rows - (rows - 1) * overlap)))
+    tile_width = min(width, math.ceil(width / (cols - (cols - 1) * overlap)))
+    ys = np.linspace(0, height - tile_height, rows).round().astype(int)
+    xs = np.linspace(0, width - tile_width, cols).round().astype(int)
+    return [Tile(int(x), int(y), int(x) + tile_width, int(y) + tile_height) for y in ys for x in xs]
+
+
+def overlap_matrix(a: np.ndarray, b: np.ndarray, metric: str = "ios") -> np.ndarray:
+    """(N, M) intersection over union ("iou") or over the smaller of the two boxes ("ios") of xyxy boxes."""
+    top_left = np.maximum(a[:, None, :2], b[None, :, :2])
+    bottom_right = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    intersection = np.clip(bottom_right - top_left, 0, None).prod(axis=2)
+    area_a, area_b = (a[:, 2:] - a[:, :2]).prod(axis=1), (b[:, 2:] - b[:, :2]).prod(axis=1)
+    if metric == "ios": denominator = np.minimum(area_a[:, None], area_b[None])
+    elif metric == "iou": denominator = area_a[:, None] + area_b[None] - intersection
+    else: raise ValueError(f"Invalid metric: {metric}. Must be one of {MERGE_METRICS}")
+    return intersection / np.maximum(denominator, 1e-9)
+
+
+def cut_at_tile_edge(xyxy: np.ndarray, tile: Tile, frame_shape: Tuple[int, ...]) -> np.ndarray:
+    """(N,) whether boxes in tile pixels touch an edge of the tile that is not an edge of the frame."""
+    height, width = frame_shape[:2]
+    inner = np.array([tile.x0 > 0, tile.y0 > 0, tile.x1 < width, tile.y1 < height])
+    at_edge = np.concatenate([xyxy[:, :2] <= EDGE_MARGIN, xyxy[:, 2:] >= [tile.x1 - tile.x0 - EDGE_MARGIN, tile.y1 - tile.y0 - EDGE_MARGIN]], axis=1)
+    return (at_edge & inner).any(axis=1)
+
+
+def merge_nms(boxes: np.ndarray, scores: np.ndarray, class_ids: np.ndarray, threshold: float = DEFAULT_MERGE_THRESHOLD,
+              metric: str = "ios", max_detections: int = DEFAULT_MAX_DETECTIONS) -> np.ndarray:
+    """
+    Per-class greedy NMS with the overlaps of all pairs computed in one vectorized step, then only boolean row
+    lookups per kept box. Returns the indices of the kept boxes, highest score first.
+    """
+    if not len(boxes): return np.empty(0, dtype=np.int64)
+    order = np.argsort(-scores, kind="stable")
+    sorted_boxes, sorted_classes = boxes[order], class_ids[order]
+    suppresses = (overlap_matrix(sorted_boxes, sorted_boxes, metric) > threshold) & (sorted_classes[:, None] == sorted_classes[None])
+    suppresses = np.triu(suppresses, k=1) # A box only suppresses lower scoring ones
+    removed = np.zeros(len(boxes), dtype=bool)
+    keep = []
+    for i in range(len(boxes)):
+        if removed[i]: continue
+        keep.append(i)
+        if len(keep) == max_detections: break
+        removed |= suppresses[i]
+    return order[keep]
+
+
+class Tiler():
+    """
+    Splits frames for Classifier(tiler=...) and merges the detections of the tiles.
+
+    args:
+        grid: Rows and columns of tiles
+        overlap: Fraction of a tile shared with its neighbour, at least the size of the smallest items relative to
+            a tile so every item is whole in some tile
+        full_frame: Also run the whole frame, for items larger than the overlap
+        merge_threshold: Overlap above which two boxes of the same class are the same item
+        merge_metric: "ios" (intersection over the smaller box) or "iou"
+    """
+
+    def __init__(self, grid: Tuple[int, int] = DEFAULT_GRID, overlap: float = DEFAULT_OVERLAP, full_frame: bool = True,
+                 merge_threshold: float = DEFAULT_MERGE_THRESHOLD, merge_metric: str = "ios",
+                 max_detections: int = DEFAULT_MAX_DETECTIONS):
+        if merge_metric not in MERGE_METRICS: raise ValueError(f"Invalid metric: {merge_metric}. Must be one of {MERGE_METRICS}")
+        self.grid, self.overlap, self.full_frame = tuple(grid), overlap, full_frame
+        self.merge_threshold, self.merge_metric, self.max_detections = merge_threshold, merge_metric, max_detections
+
+    def tiles(self, frame_shape: Tuple[int, ...]) -> List[Tile]:
+        tiles = tile_grid(frame_shape, self.grid, self.overlap)
+        return tiles + [Tile(0, 0, frame_shape[1], frame_shape[0])] if self.full_frame else tiles
+
+    def split(self, frame: np.ndarray) -> Tuple[List[np.ndarray], List[Tile]]:
+        """The crops of a frame (views, no copies) and their tiles, to run as one batch."""
+        tiles = self.tiles(frame.shape)
+        return [frame[tile.y0:tile.y1, tile.x0:tile.x1] for tile in tiles], tiles
+
+    def merge(self, detections: Sequence[RawDetections], tiles: Sequence[Tile], frame_shape: Tuple[int, ...]) -> RawDetections:
+        """Detections of every tile, in tile pixels, to one set in frame pixels without duplicates."""
+        boxes = [np.asarray(d.xyxy, dtype=np.float32).reshape(-1, 4) for d in detections]
+        cut = np.concatenate([cut_at_tile_edge(b, t, frame_shape) for b, t in zip(boxes, tiles)])
+        xyxy = np.concatenate([b + np.array([t.x0, t.y0, t.x0, t.y0], dtype=np.float32) for b, t in zip(boxes, tiles)])
+        confidence = np.concatenate([np.asarray(d.confidence, dtype=np.float32).reshape(-1) for d in detections])
+        class_id = np.concatenate([np.asarray(d.class_id, dtype=np.int64).reshape(-1) for d in detections])
+        keep = merge_nms(xyxy, confidence - cut, class_id, self.merge_threshold, self.merge_metric, self.max_detections)
+        return RawDetections(xyxy[keep], confidence[keep], class_id[keep])
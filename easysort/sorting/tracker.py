@@ -0,0 +1,190 @@
+import time
+from typing import NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from easysort.common.config import RobotConfig
+from easysort.common.tracing import TRACER
+
+DEFAULT_MAX_DISTANCE_CM = 4.0
+DEFAULT_MAX_AGE_S = 0.5
+DEFAULT_MIN_HITS = 3
+DEFAULT_POSITION_GAIN = 0.5
+DEFAULT_VELOCITY_GAIN = 0.05
+
+
+def match_pairs(rows: np.ndarray, cols: np.ndarray, costs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Matches rows to columns given candidate (row, col, cost) pairs, greedily by lowest cost.
+    Works in rounds: every row and column picks its cheapest remaining partner and mutual picks are matched,
+    which always includes the cheapest remaining pair. Returns the matched (rows, cols).
+    """
+    order = np.argsort(costs, kind="stable")
+    rows, cols = rows[order], cols[order]
+    matched_rows, matched_cols = [], []
+    while len(rows):
+        _, row_first = np.unique(rows, return_index=True) # Cheapest pair of every row
+        _, col_first = np.unique(cols, return_index=True)
+        mutual = np.intersect1d(row_first, col_first, assume_unique=True)
+        matched_rows.append(rows[mutual]); matched_cols.append(cols[mutual])
+        keep = ~(np.isin(rows, rows[mutual]) | np.isin(cols, cols[mutual]))
+        rows, cols = rows[keep], cols[keep]
+    if not matched_rows: return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(matched_rows), np.concatenate(matched_cols)
+
+
+def associate(cost: np.ndarray, max_cost: float) -> Tuple[np.ndarray, np.ndarray]:
+    """match_pairs on a dense (rows, cols) cost matrix, ignoring pairs above max_cost."""
+    rows, cols = np.nonzero(cost <= max_cost)
+    return match_pairs(rows, cols, cost[rows, cols])
+
+
+def nearby_pairs(a: np.ndarray, b: np.ndarray, max_distance: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    All (i, j, distance) with |a[i] - b[j]| <= max_distance, for (N, 2) and (M, 2) points. Only pairs within
+    max_distance in x are compared, found by binary search in b sorted by x, so the cost grows with the
+    number of nearby pairs rather than N * M.
+    """
+    by_x = np.argsort(b[:, 0], kind="stable")
+    xs = b[by_x, 0]
+    lo, hi = np.searchsorted(xs, a[:, 0] - max_distance), np.searchsorted(xs, a[:, 0] + max_distance, side="right")
+    counts = hi - lo
+    i = np.repeat(np.arange(len(a)), counts)
+    j = by_x[np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(lo, counts)]
+    distances = np.sqrt(((a[i] - b[j]) ** 2).sum(axis=1))
+    close = distances <= max_distance
+    return i[close], j[close], distances[close]
+
+
+class Tracks(NamedTuple):
+    """State of all live tracks as parallel arrays, positions predicted to the last update."""
+    ids: np.ndarray          # (T,) int
+    positions: np.ndarray    # (T, 2)
+    velocities: np.ndarray   # (T, 2)
+    class_ids: np.ndarray    # (T,) int, class with the most confidence-weighted votes
+    class_scores: np.ndarray # (T,) average confidence of that class per detection
+    hits: np.ndarray         # (T,) int
+
+
+class Tracker():
+    """
+    Gives world view detections a persistent track id, so every item on the belt is reported once.
+
+    Tracks move with a constant velocity model, starting at the belt velocity and adapting to how the item
+    actually moves. Each frame the tracks are predicted to the frame time and matched to the nearest
+    detection within max_distance_cm (see match_pairs). Matched detections correct the prediction (an
+    alpha-beta filter with position_gain and velocity_gain) and add their confidence to the track's vote
+    for their class; unmatched detections start new tracks, and tracks not seen for max_age_s are dropped.
+    All of it is done on arrays over all tracks and detections.
+
+    A track is reported as a new item once it has been detected min_hits times, with the class that has
+    the most votes at that point.
+
+    args:
+        n_classes: Number of classes the classifier can output
+        belt_velocity: (vx, vy) in cm/s
+    """
+
+    def __init__(self, n_classes: int, belt_velocity: Sequence[float], max_distance_cm: float = DEFAULT_MAX_DISTANCE_CM,
+                 max_age_s: float = DEFAULT_MAX_AGE_S, min_hits: int = DEFAULT_MIN_HITS, position_gain: float = DEFAULT_POSITION_GAIN,
+                 velocity_gain: float = DEFAULT_VELOCITY_GAIN):
+        self.n_classes, self.belt_velocity = n_classes, np.asarray(belt_velocity, dtype=np.float64)
+        self.max_distance_cm, self.max_age_s, self.min_hits = max_distance_cm, max_age_s, min_hits
+        self.position_gain, self.velocity_gain = position_gain, velocity_gain
+        self.n_tracks_started = 0
+        self._ids = np.empty(0, dtype=np.int64)
+        self._positions = np.empty((0, 2))
+        self._velocities = np.empty((0, 2))
+        self._last_seen = np.empty(0)
+        self._hits = np.empty(0, dtype=np.int64)
+        self._votes = np.empty((0, n_classes))
+        self._time: Optional[float] = None
+
+    @classmethod
+    def from_config(cls, robot_config: RobotConfig, n_classes: int, **kwargs) -> "Tracker":
+        """Tracker for the belt of a robot config, items travel towards x = 0."""
+        return cls(n_classes, (-robot_config.conveyor_speed_cm_per_s, 0.0), **kwargs)
+
+    def __len__(self) -> int: return len(self._ids)
+
+    def update(self, positions: np.ndarray, class_ids: np.ndarray, confidences: Optional[np.ndarray] = None,
+               timestamp: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Adds the detections of one frame.
+
+        args:
+            positions: (N, 2) world positions in cm
+            class_ids: (N,) class of every detection
+            confidences: (N,) class confidence, weights the class votes (1 if None)
+            timestamp: Frame time in seconds, time.monotonic() if None
+        returns:
+            (track id of every detection, indices of the detections whose track became a new item in this frame)
+        """
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+        class_ids = np.asarray(class_ids, dtype=np.int64)
+        confidences = np.ones(len(positions)) if confidences is None else np.asarray(confidences, dtype=np.float64)
+
+        keep = timestamp - self._last_seen <= self.max_age_s
+        if not keep.all(): self._select(keep)
+        dt = timestamp - self._last_seen
+        predicted = self._positions + self._velocities * dt[:, None]
+        tracks, detections = match_pairs(*nearby_pairs(predicted, positions, self.max_distance_cm))
+
+        residuals = positions[detections] - predicted[tracks]
+        self._positions[tracks] = predicted[tracks] + self.position_gain * residuals
+        self._velocities[tracks] += self.velocity_gain * residuals / np.maximum(dt[tracks], 1e-3)[:, None]
+        self._last_seen[tracks] = timestamp
+        self._hits[tracks] += 1
+        self._votes[tracks, class_ids[detections]] += confidences[detections]
+
+        unmatched = np.ones(len(positions), dtype=bool); unmatched[detections] = False
+        new_detections = np.flatnonzero(unmatched)
+        n_new = len(new_detections)
+        new_ids = np.arange(self.n_tracks_started, self.n_tracks_started + n_new)
+        self.n_tracks_started += n_new
+        votes = np.zeros((n_new, self.n_classes)); votes[np.arange(n_new), class_ids[new_detections]] = confidences[new_detections]
+        self._ids = np.concatenate([self._ids, new_ids])
+        self._positions = np.concatenate([self._positions, positions[new_detections]])
+        self._velocities = np.concatenate([self._velocities, np.broadcast_to(self.belt_velocity, (n_new, 2))])
+        self._last_seen = np.concatenate([self._last_seen, np.full(n_new, timestamp)])
+        self._hits = np.concatenate([self._hits, np.ones(n_new, dtype=np.int64)])
+        self._votes = np.concatenate([self._votes, votes])
+        self._time = timestamp
+
+        track_ids = np.empty(len(positions), dtype=np.int64)
+        track_ids[detections] = self._ids[tracks]
+        track_ids[new_detections] = new_ids
+        hits = np.empty(len(positions), dtype=np.int64)
+        hits[detections] = self._hits[tracks]
+        hits[new_detections] = 1
+        reported = np.flatnonzero(hits == self.min_hits)
+        if TRACER.enabled: # Items link to the frame they were first seen in (their exposure) and the one they were reported in
+            for track_id in [*new_ids, *track_ids[reported]]: TRACER.link(("item", int(track_id)))
+        return track_ids, reported
+
+    def tracks(self) -> Tracks:
+        dt = 0.0 if self._time is None else self._time - self._last_seen
+        class_ids = self._votes.argmax(axis=1) if len(self._ids) else np.empty(0, dtype=np.int64)
+        scores = self._votes[np.arange(len(class_ids)), class_ids] / np.maximum(self._hits, 1)
+        return Tracks(self._ids.copy(), self._positions + self._velocities * np.reshape(dt, (-1, 1)),
+                      self._velocities.copy(), class_ids, scores, self._hits.copy())
+
+    def new_items(self, detections, timestamp: Optional[float] = None):
+        """
+        Tracks the world view detections of one frame (sv.Detections from Classifier.__call__) and returns only
+        the detections that became a new item, with their voted class_id and confidence, or None if there are none.
+        tracker_id is set on all detections.
+        """
+        track_ids, new = self.update(detections.data["world_xy"], detections.class_id, detections.confidence, timestamp)
+        detections.tracker_id = track_ids
+        if not len(new): return None
+        items = detections[new]
+        rows = np.searchsorted(self._ids, track_ids[new]) # Ids are increasing, new tracks are appended
+        items.class_id = self._votes[rows].argmax(axis=1)
+        items.confidence = self._votes[rows, items.class_id] / self._hits[rows]
+        return items
+
+    def _select(self, mask: np.ndarray) -> None:
+        self._ids, self._positions, self._velocities = self._ids[mask], self._positions[mask], self._velocities[mask]
+        self._last_seen, self._hits, self._votes = self._last_seen[mask], self._hits[mask], self._votes[mask]
@@ -0,0 +1,183 @@
+"""
+YOLOv8 detection model in tinygrad, for CPU inference without torch.
+
+The layer layout follows the ultralytics yolov8.yaml (the same state dict keys, model.<i>...), sizes are read
+from the weights so any scale (n, s, m, ...) loads. Weights come from export_safetensors in export.py: the
+ultralytics model with batch norms fused into the convolutions, as safetensors with the class names in its
+metadata. The output is the raw (batch, 4 + n_classes, n_anchors) YOLOv8 output, decoded by postprocess.py.
+
+tinygrad is imported from the vendored submodule at the repository root when it is checked out
+(git submodule update --init tinygrad), otherwise from the environment.
+"""
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+
+from easysort.sorting.export import DEFAULT_WEIGHTS_PATH as TRAINED_WEIGHTS_PATH
+from easysort.sorting.postprocess import DEFAULT_INPUT_SIZE
+
+VENDORED_TINYGRAD_PATH = Path(__file__).parents[2] / "tinygrad"
+DEFAULT_WEIGHTS_PATH = TRAINED_WEIGHTS_PATH.with_suffix(".safetensors")
+DEFAULT_DEVICE = "CPU"
+STRIDES = (8, 16, 32)
+_SAFETENSORS_DTYPES = {"F32": np.float32, "F16": np.float16, "F64": np.float64, "I64": np.int64}
+
+
+def import_tinygrad():
+    if (VENDORED_TINYGRAD_PATH / "tinygrad" / "__init__.py").exists() and str(VENDORED_TINYGRAD_PATH) not in sys.path:
+        sys.path.insert(0, str(VENDORED_TINYGRAD_PATH))
+    import tinygrad
+    return tinygrad
+
+
+def read_safetensors(path: Union[str, Path]) -> Tuple[Dict[str, np.ndarray], Dict[str, str]]:
+    """Tensors and metadata of a safetensors file, memory-mapped."""
+    data = np.memmap(path, dtype=np.uint8, mode="r")
+    header_size = int(data[:8].view(np.uint64)[0])
+    header = json.loads(bytes(data[8:8 + header_size]))
+    metadata = header.pop("__metadata__", {})
+    tensors = {}
+    for name, info in header.items():
+        start, end = info["data_offsets"]
+        tensors[name] = data[8 + header_size + start:8 + header_size + end].view(_SAFETENSORS_DTYPES[info["dtype"]]).reshape(info["shape"])
+    return tensors, metadata
+
+
+class Conv():
+    """Convolution (batch norm fused) and SiLU, or a plain convolution with bias for the head outputs."""
+
+    def __init__(self, weights: dict, prefix: str, stride: int = 1, activation: bool = True):
+        key = f"{prefix}.conv" if activation else prefix
+        self.weight, self.bias = weights[f"{key}.weight"], weights[f"{key}.bias"]
+        self.stride, self.padding, self.activation = stride, self.weight.shape[2] // 2, activation
+
+    def __call__(self, x):
+        x = x.conv2d(self.weight, self.bias, stride=self.stride, padding=self.padding)
+        return x.silu() if self.activation else x
+
+
+class Bottleneck():
+    def __init__(self, weights: dict, prefix: str, shortcut: bool):
+        self.cv1, self.cv2, self.shortcut = Conv(weights, f"{prefix}.cv1"), Conv(weights, f"{prefix}.cv2"), shortcut
+
+    def __call__(self, x): return x + self.cv2(self.cv1(x)) if self.shortcut else self.cv2(self.cv1(x))
+
+
+class C2f():
+    def __init__(self, weights: dict, prefix: str, shortcut: bool):
+        self.cv1, self.cv2 = Conv(weights, f"{prefix}.cv1"), Conv(weights, f"{prefix}.cv2")
+        n = len({key.split(".")[3] for key in weights if key.startswith(f"{prefix}.m.")})
+        self.m = [Bottleneck(weights, f"{prefix}.m.{i}", shortcut) for i in range(n)]
+
+    def __call__(self, x):
+        y = list(self.cv1(x).chunk(2, dim=1))
+        for block in self.m: y.append(block(y[-1]))
+        return self.cv2(y[0].cat(*y[1:], dim=1))
+
+
+class SPPF():
+    def __init__(self, weights: dict, prefix: str, kernel_size: int = 5):
+        self.cv1, self.cv2, self.kernel_size = Conv(weights, f"{prefix}.cv1"), Conv(weights, f"{prefix}.cv2"), kernel_size
+
+    def __call__(self, x):
+        y = [self.cv1(x)]
+        for _ in range(3): y.append(y[-1].max_pool2d(self.kernel_size, stride=1, padding=self.kernel_size // 2))
+        return self.cv2(y[0].cat(*y[1:], dim=1))
+
+
+def upsample(x):
+    """Nearest neighbour, 2x."""
+    b, c, h, w = x.shape
+    return x.reshape(b, c, h, 1, w, 1).expand(b, c, h, 2, w, 2).reshape(b, c, 2 * h, 2 * w)
+
+
+def make_anchors(input_size: int, strides: Tuple[int, ...] = STRIDES) -> Tuple[np.ndarray, np.ndarray]:
+    """Grid cell centres (2, n_anchors) in feature map units and the stride of every anchor (1, n_anchors)."""
+    centres, anchor_strides = [], []
+    for stride in strides:
+        n = input_size // stride
+        y, x = np.meshgrid(np.arange(n) + 0.5, np.arange(n) + 0.5, indexing="ij")
+        centres.append(np.stack([x.ravel(), y.ravel()]))
+        anchor_strides.append(np.full(n * n, stride))
+    return np.concatenate(centres, axis=1).astype(np.float32), np.concatenate(anchor_strides)[None].astype(np.float32)
+
+
+def concat_levels(outputs: list):
+    """(b, c, h, w) outputs of every level to one (b, c, n_anchors)."""
+    return outputs[0].flatten(2).cat(*[x.flatten(2) for x in outputs[1:]], dim=2)
+
+
+class Detect():
+    def __init__(self, weights: dict, prefix: str, input_size: int, tensor):
+        self.box = [[Conv(weights, f"{prefix}.cv2.{i}.0"), Conv(weights, f"{prefix}.cv2.{i}.1"),
+                     Conv(weights, f"{prefix}.cv2.{i}.2", activation=False)] for i in range(len(STRIDES))]
+        self.cls = [[Conv(weights, f"{prefix}.cv3.{i}.0"), Conv(weights, f"{prefix}.cv3.{i}.1"),
+                     Conv(weights, f"{prefix}.cv3.{i}.2", activation=False)] for i in range(len(STRIDES))]
+        self.reg_max = self.box[0][2].weight.shape[0] // 4
+        anchors, strides = make_anchors(input_size)
+        self.anchors, self.strides = tensor(anchors), tensor(strides)
+        self.bins = tensor(np.arange(self.reg_max, dtype=np.float32).reshape(1, 1, self.reg_max, 1))
+
+    def __call__(self, features: list):
+        b = features[0].shape[0]
+        box = concat_levels([x.sequential(layers) for x, layers in zip(features, self.box)])
+        cls = concat_levels([x.sequential(layers) for x, layers in zip(features, self.cls)])
+        # Distribution focal loss head: expected value of the distance bins, then distances to boxes
+        distance = (box.reshape(b, 4, self.reg_max, -1).softmax(axis=2) * self.bins).sum(axis=2)
+        top_left, bottom_right = self.anchors - distance[:, :2], self.anchors + distance[:, 2:]
+        xywh = ((top_left + bottom_right) / 2).cat(bottom_right - top_left, dim=1) * self.strides
+        return xywh.cat(cls.sigmoid(), dim=1)
+
+
+class YOLOv8():
+    """
+    args:
+        weights: State dict of a fused ultralytics YOLOv8 detection model, as NumPy arrays
+        input_size: Square input size the anchors are built for
+        device: tinygrad device, "CPU" compiles kernels for the host
+    """
+    BACKBONE_C2F, HEAD_C2F, DOWNSAMPLE = (2, 4, 6, 8), (12, 15, 18, 21), (0, 1, 3, 5, 7, 16, 19)
+
+    def __init__(self, weights: Dict[str, np.ndarray], classes: List[str], input_size: int = DEFAULT_INPUT_SIZE,
+                 device: str = DEFAULT_DEVICE):
+        import_tinygrad()
+        from tinygrad import Tensor
+        self.classes, self.input_size, self.device = classes, input_size, device
+        tensors = {key: Tensor(np.ascontiguousarray(value, dtype=np.float32), device=device).realize()
+                   for key, value in weights.items() if key.endswith((".weight", ".bias"))}
+        self.layers = {i: Conv(tensors, f"model.{i}", stride=2) for i in self.DOWNSAMPLE}
+        self.layers.update({i: C2f(tensors, f"model.{i}", shortcut=True) for i in self.BACKBONE_C2F})
+        self.layers.update({i: C2f(tensors, f"model.{i}", shortcut=False) for i in self.HEAD_C2F})
+        self.layers[9] = SPPF(tensors, "model.9")
+        self.detect = Detect(tensors, "model.22", input_size, lambda array: Tensor(array, device=device).realize())
+        self._jits = {}
+
+    @classmethod
+    def load(cls, path: Union[str, Path] = DEFAULT_WEIGHTS_PATH, input_size: int = DEFAULT_INPUT_SIZE,
+             device: str = DEFAULT_DEVICE) -> "YOLOv8":
+        weights, metadata = read_safetensors(path)
+        names = json.loads(metadata["names"])
+        return cls(weights, [names[str(i)] for i in range(len(names))], input_size, device)
+
+    def __call__(self, x):
+        layer = self.layers
+        x = layer[3](layer[2](layer[1](layer[0](x))))
+        p3 = layer[4](x)
+        p4 = layer[6](layer[5](p3))
+        p5 = layer[9](layer[8](layer[7](p4)))
+        h4 = layer[12](upsample(p5).cat(p4, dim=1))
+        h3 = layer[15](upsample(h4).cat(p3, dim=1))
+        h4 = layer[18](layer[16](h3).cat(h4, dim=1))
+        h5 = layer[21](layer[19](h4).cat(p5, dim=1))
+        return self.detect([h3, h4, h5])
+
+    def run(self, batch: np.ndarray) -> np.ndarray:
+        """Raw output of a (N, 3, S, S) float32 batch. Kernels are JIT compiled per batch size on the first calls."""
+        import_tinygrad()
+        from tinygrad import Tensor, TinyJit
+        jit = self._jits.get(len(batch))
+        if jit is None: jit = self._jits[len(batch)] = TinyJit(lambda x: self(x).realize())
+        return jit(Tensor(batch, device=self.device).realize()).numpy()
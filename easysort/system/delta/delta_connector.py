@@ -0,0 +1,346 @@
+import asyncio
+import os
+import termios
+import time
+import tty
+from dataclasses import dataclass
+from typing import Callable, Dict, Hashable, Optional, Tuple, Union
+
+from easysort.common.errors import RobotCommunicationError, RobotConnectionError
+from easysort.common.logger import EasySortLogger
+from easysort.common.tracing import TRACER
+from easysort.system.delta.framing import Frame, FrameDecoder, Opcode, encode_frame, status_message
+
+LOGGER = EasySortLogger()
+DEFAULT_BAUD_RATE = 9600
+BAUD_RATES = {rate: getattr(termios, f"B{rate}") for rate in [9600, 19200, 38400, 57600, 115200, 230400, 460800, 921600]
+              if hasattr(termios, f"B{rate}")}
+FRAMINGS = ["text", "binary"]
+DEFAULT_WINDOW_SIZE = 4
+SEQ_MODULO = 1 << 16
+_MAX_TIME_TO_WAIT_FOR_MOVEMENT_MESSAGE = 5 # seconds
+_MAX_TIME_TO_WAIT_FOR_ACK = 0.2 # seconds
+_MAX_RETRIES = 5
+_READ_SIZE = 4096
+
+
+def open_serial(port: str, baud_rate: int = DEFAULT_BAUD_RATE) -> int:
+    """Opens port as a raw, non-blocking serial fd at baud_rate."""
+    if baud_rate not in BAUD_RATES: raise ValueError(f"Unsupported baud rate: {baud_rate}. Must be one of {list(BAUD_RATES)}")
+    try: fd = os.open(port, os.O_RDWR | os.O_NOCTTY | os.O_NONBLOCK)
+    except OSError as err: raise RobotConnectionError(port, err)
+    try:
+        tty.setraw(fd)
+        attributes = termios.tcgetattr(fd)
+        attributes[2] |= termios.CLOCAL | termios.CREAD
+        attributes[4] = attributes[5] = BAUD_RATES[baud_rate] # ispeed, ospeed
+        termios.tcsetattr(fd, termios.TCSANOW, attributes)
+        termios.tcflush(fd, termios.TCIOFLUSH)
+    except termios.error as err: os.close(fd); raise RobotConnectionError(port, err)
+    return fd
+
+
+class SerialTransport(asyncio.Transport):
+    """
+    asyncio transport over a serial fd. The event loop watches the fd and calls the protocol as soon as
+    bytes arrive, so there is no polling interval and reads never block the loop. Writes go straight to
+    the fd and are only buffered (and flushed when writable) if the driver buffer is full.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, fd: int, protocol: asyncio.Protocol, port: str = ""):
+        super().__init__(extra={"port": port})
+        self._loop, self._fd, self._protocol, self._port = loop, fd, protocol, port
+        self._write_buffer = bytearray()
+        self._closing = False
+        self._loop.add_reader(self._fd, self._read_ready)
+        self._protocol.connection_made(self)
+
+    def _read_ready(self) -> None:
+        try: data = os.read(self._fd, _READ_SIZE)
+        except (BlockingIOError, InterruptedError): return
+        except OSError as err: self._fatal_error(err); return
+        if not data: self._fatal_error(None); return # The other end hung up
+        self._protocol.data_received(data)
+
+    def write(self, data: bytes) -> None:
+        if self._closing: raise RobotCommunicationError(self._port, "transport is closing")
+        if not data: return
+        if not self._write_buffer:
+            try: written = os.write(self._fd, data)
+            except (BlockingIOError, InterruptedError): written = 0
+            except OSError as err: self._fatal_error(err); return
+            data = data[written:]
+            if not data: return
+            self._loop.add_writer(self._fd, self._write_ready)
+        self._write_buffer.extend(data)
+
+    def _write_ready(self) -> None:
+        try: written = os.write(self._fd, self._write_buffer)
+        except (BlockingIOError, InterruptedError): return
+        except OSError as err: self._fatal_error(err); return
+        del self._write_buffer[:written]
+        if self._write_buffer: return
+        self._loop.remove_writer(self._fd)
+        if self._closing: self._close(None)
+
+    def get_write_buffer_size(self) -> int: return len(self._write_buffer)
+    def is_closing(self) -> bool: return self._closing
+
+    def close(self) -> None:
+        if self._closing: return
+        self._closing = True
+        self._loop.remove_reader(self._fd)
+        if not self._write_buffer: self._loop.call_soon(self._close, None)
+
+    def abort(self) -> None: self._close(None)
+
+    def _fatal_error(self, err: Optional[Exception]) -> None:
+        if err is not None: LOGGER.error(f"Serial error on {self._port}: {err}")
+        self._close(err)
+
+    def _close(self, err: Optional[Exception]) -> None:
+        if self._fd < 0: return
+        self._closing = True
+        self._loop.remove_reader(self._fd); self._loop.remove_writer(self._fd)
+        os.close(self._fd); self._fd = -1
+        self._write_buffer.clear()
+        self._protocol.connection_lost(err)
+
+
+class DeltaProtocol(asyncio.Protocol):
+    """
+    Splits the byte stream from the robot into stripped lines and passes them to on_line.
+    Lines on_line does not consume (returns False for) are queued for receive().
+    """
+
+    def __init__(self, on_line: Optional[Callable[[str], bool]] = None):
+        self.on_line = on_line
+        self.lines: asyncio.Queue = asyncio.Queue()
+        self.closed: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._buffer = b""
+
+    def data_received(self, data: bytes) -> None:
+        self._buffer += data
+        *lines, self._buffer = self._buffer.split(b"\n")
+        for line in lines:
+            line = line.decode(errors="replace").strip()
+            if self.on_line is None or not self.on_line(line): self.lines.put_nowait(line)
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        if not self.closed.done(): self.closed.set_result(exc)
+
+
+class BinaryDeltaProtocol(asyncio.Protocol):
+    """Decodes the byte stream from the robot into binary frames (see framing.py) and passes them to on_frame."""
+
+    def __init__(self, on_frame: Callable[[Frame], None]):
+        self.on_frame = on_frame
+        self.decoder = FrameDecoder()
+        self.lines: asyncio.Queue = asyncio.Queue() # Unused, binary robots do not send lines
+        self.closed: asyncio.Future = asyncio.get_running_loop().create_future()
+
+    def data_received(self, data: bytes) -> None:
+        for frame in self.decoder.feed(data): self.on_frame(frame)
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        if not self.closed.done(): self.closed.set_result(exc)
+
+
+@dataclass
+class Command:
+    """A command in flight. acked resolves when the robot confirms receipt, done with its status update."""
+    seq: int
+    data: bytes
+    acked: asyncio.Future
+    done: asyncio.Future
+    sent_at: float = 0.0
+    n_sent: int = 0
+    timer: Optional[asyncio.TimerHandle] = None
+    trace_id: Optional[Hashable] = None # Item the robot_ack and robot_move spans are traced under
+    first_sent_ns: int = 0
+    acked_ns: int = 0
+
+
+class DeltaConnector():
+    """
+    Connection to the delta robot over serial.
+
+    Messages are lines. Coordinates are sent as "x,y,z" and the robot answers with status updates
+    (see easysort/common/datasaver.py).
+
+    Two ways of talking to the robot:
+    - request()/navigate_to(): stop-and-wait, one line out, wait for the reply
+    - send_command()/pick(): pipelined. Commands are sent as "<seq>:<payload>", the robot acknowledges
+      each with "ack:<seq>" and reports "status:<seq>:<status>" when done. Up to window_size commands may
+      be unacknowledged at once, so the next pick can be sent while the current move is executing.
+      A command is only retransmitted if its ack does not arrive within ack_timeout_s.
+      With framing="binary" the same exchange uses the fixed-size CRC-checked frames of framing.py
+      instead of text lines. Only pipelined commands are available then.
+
+    args:
+        port: Serial port of the robot, e.g. /dev/ttyACM0
+        baud_rate: One of BAUD_RATES
+        window_size: Maximum number of unacknowledged commands
+        ack_timeout_s: Time to wait for an ack before retransmitting
+        max_retries: Retransmissions before a command fails with RobotCommunicationError
+        framing: "text" or "binary"
+    """
+
+    def __init__(self, port: str, baud_rate: int = DEFAULT_BAUD_RATE, window_size: int = DEFAULT_WINDOW_SIZE,
+                 ack_timeout_s: float = _MAX_TIME_TO_WAIT_FOR_ACK, max_retries: int = _MAX_RETRIES, framing: str = "text"):
+        if framing not in FRAMINGS: raise ValueError(f"Invalid framing: {framing}. Must be one of {FRAMINGS}")
+        self.port, self.baud_rate, self.framing = port, baud_rate, framing
+        self.window_size, self.ack_timeout_s, self.max_retries = window_size, ack_timeout_s, max_retries
+        self.transport: Optional[SerialTransport] = None
+        self.protocol: Optional[DeltaProtocol] = None
+        self.n_retransmissions = 0
+        self._next_seq = 0
+        self._unacked: Dict[int, Command] = {}
+        self._running: Dict[int, Command] = {} # Acknowledged, waiting for their status update
+        self._window: Optional[asyncio.Semaphore] = None
+
+    async def connect(self) -> "DeltaConnector":
+        loop = asyncio.get_running_loop()
+        self._window = asyncio.Semaphore(self.window_size)
+        self.protocol = DeltaProtocol(self._handle_line) if self.framing == "text" else BinaryDeltaProtocol(self._handle_frame)
+        self.transport = SerialTransport(loop, open_serial(self.port, self.baud_rate), self.protocol, self.port)
+        self.protocol.closed.add_done_callback(self._connection_lost)
+        LOGGER.info(f"Established connection to delta robot on {self.port} at {self.baud_rate} baud")
+        return self
+
+    @staticmethod
+    def encode(msg: Union[str, bytes, Tuple[float, ...]]) -> bytes:
+        if isinstance(msg, tuple): msg = ",".join(f"{value:g}" for value in msg)
+        if isinstance(msg, str): msg = msg.encode()
+        return msg if msg.endswith(b"\n") else msg + b"\n"
+
+    def send(self, msg: Union[str, bytes, Tuple[float, ...]]) -> None:
+        if self.transport is None or self.transport.is_closing(): raise RobotCommunicationError(self.port, "not connected")
+        self.transport.write(self.encode(msg))
+
+    async def receive(self, timeout_seconds: float = _MAX_TIME_TO_WAIT_FOR_MOVEMENT_MESSAGE) -> str:
+        """Waits for the next line from the robot. Returns '' on timeout."""
+        try: return await asyncio.wait_for(self.protocol.lines.get(), timeout_seconds)
+        except asyncio.TimeoutError:
+            LOGGER.warning(f"Timeout occurred while waiting for response from {self.port}")
+            return ''
+
+    async def request(self, msg: Union[str, bytes, Tuple[float, ...]], timeout_seconds: float = _MAX_TIME_TO_WAIT_FOR_MOVEMENT_MESSAGE) -> str:
+        """Sends msg and waits for the next line from the robot."""
+        self.send(msg)
+        return await self.receive(timeout_seconds)
+
+    async def navigate_to(self, x: float, y: float, z: float) -> str:
+        """Sends the 3D position, waits for the echo and then for the status update of the movement."""
+        echo = await self.request((x, y, z))
+        if echo != self.encode((x, y, z)).decode().strip(): LOGGER.warning(f"Unexpected echo from {self.port}: {echo!r}")
+        return await self.receive()
+
+    async def send_command(self, payload: Union[str, bytes, Tuple[float, ...]], opcode: Opcode = Opcode.PICK,
+                           trace_id: Optional[Hashable] = None) -> Command:
+        """
+        Sends a pipelined command as soon as the window has room, and returns without waiting for the ack.
+        Await command.acked / command.done to wait for the robot.
+        With binary framing payload must be an (x, y, z) tuple, sent with opcode.
+        With tracing enabled, records serial_send (waiting for the window and writing), robot_ack (first transmission
+        to ack) and robot_move (ack to status update) under trace_id, e.g. ("item", track_id).
+        """
+        start_ns = time.perf_counter_ns() if TRACER.enabled else 0
+        await self._window.acquire()
+        loop = asyncio.get_running_loop()
+        seq, self._next_seq = self._next_seq, (self._next_seq + 1) % SEQ_MODULO
+        data = f"{seq}:".encode() + self.encode(payload) if self.framing == "text" else encode_frame(seq, opcode, *payload)
+        command = Command(seq, data, loop.create_future(), loop.create_future(), trace_id=trace_id)
+        self._unacked[seq] = command
+        try: self._transmit(command)
+        except RobotCommunicationError: del self._unacked[seq]; self._window.release(); raise
+        if start_ns:
+            command.first_sent_ns = time.perf_counter_ns()
+            TRACER.record("serial_send", start_ns, command.first_sent_ns, trace_id)
+        return command
+
+    async def pick(self, x: float, y: float, z: float, trace_id: Optional[Hashable] = None) -> str:
+        """Sends the 3D position as a pipelined command and waits for its status update."""
+        command = await self.send_command((x, y, z), trace_id=trace_id)
+        return await command.done
+
+    @property
+    def n_in_flight(self) -> int: return len(self._unacked)
+
+    def _transmit(self, command: Command) -> None:
+        loop = asyncio.get_running_loop()
+        self.send(command.data)
+        command.n_sent += 1; command.sent_at = loop.time()
+        command.timer = loop.call_later(self.ack_timeout_s, self._ack_timeout, command.seq)
+
+    def _ack_timeout(self, seq: int) -> None:
+        command = self._unacked.get(seq)
+        if command is None: return
+        if command.n_sent > self.max_retries:
+            del self._unacked[seq]; self._window.release()
+            self._fail(command, RobotCommunicationError(self.port, f"no ack for command {seq} after {command.n_sent} attempts"))
+            return
+        self.n_retransmissions += 1
+        LOGGER.debug(f"Retransmitting command {seq} to {self.port}")
+        try: self._transmit(command)
+        except RobotCommunicationError as error: # Disconnected, there is no caller to raise to in a timer callback
+            del self._unacked[seq]; self._window.release()
+            self._fail(command, error)
+
+    @staticmethod
+    def _fail(command: Command, error: Exception) -> None:
+        if command.timer is not None: command.timer.cancel()
+        for future in (command.acked, command.done):
+            if not future.done(): future.set_exception(error)
+            if not future.cancelled(): future.exception() # Either may go unawaited, do not warn about it
+
+    def _connection_lost(self, closed: asyncio.Future) -> None:
+        """Fails every command in flight with RobotConnectionError and frees their window slots."""
+        if not self._unacked and not self._running: return
+        error = RobotConnectionError(self.port, closed.result() or "connection lost")
+        LOGGER.error(f"Lost connection to {self.port} with {len(self._unacked) + len(self._running)} commands in flight")
+        for command in self._unacked.values(): self._window.release(); self._fail(command, error)
+        for command in self._running.values(): self._fail(command, error)
+        self._unacked.clear(); self._running.clear()
+
+    def _handle_ack(self, seq: int) -> None:
+        command = self._unacked.pop(seq, None)
+        if command is None: return # Duplicate ack of a retransmitted command
+        command.timer.cancel(); self._window.release()
+        if command.first_sent_ns:
+            command.acked_ns = time.perf_counter_ns()
+            TRACER.record("robot_ack", command.first_sent_ns, command.acked_ns, command.trace_id)
+        command.acked.set_result(None)
+        self._running[seq] = command
+
+    def _handle_status(self, seq: int, status: str) -> None:
+        if seq in self._unacked: self._handle_ack(seq) # The ack was lost
+        command = self._running.pop(seq, None)
+        if command is None: LOGGER.warning(f"Status {status!r} for unknown command {seq} from {self.port}"); return
+        if command.acked_ns: TRACER.record("robot_move", command.acked_ns, time.perf_counter_ns(), command.trace_id)
+        command.done.set_result(status)
+
+    def _handle_line(self, line: str) -> bool:
+        kind, _, rest = line.partition(":")
+        if kind == "ack" and rest.isdigit(): self._handle_ack(int(rest)); return True
+        seq, _, status = rest.partition(":")
+        if kind == "status" and seq.isdigit(): self._handle_status(int(seq), status); return True
+        return False
+
+    def _handle_frame(self, frame: Frame) -> None:
+        if frame.opcode == Opcode.ACK: self._handle_ack(frame.seq)
+        elif frame.opcode == Opcode.STATUS: self._handle_status(frame.seq, status_message(frame))
+        else: LOGGER.warning(f"Unexpected frame from {self.port}: {frame}")
+
+    def quit(self) -> None:
+        for command in list(self._unacked.values()) + list(self._running.values()):
+            if command.timer is not None: command.timer.cancel()
+            for future in (command.acked, command.done):
+                if not future.done(): future.cancel()
+        self._unacked.clear(); self._running.clear()
+        if self.transport is not None: self.transport.close()
+
+    async def __aenter__(self) -> "DeltaConnector": return await self.connect()
+    async def __aexit__(self, *exc) -> None:
+        self.quit()
+        if self.protocol is not None: await self.protocol.closed
@@ -0,0 +1,112 @@
+"""
+Fixed-size binary frames for the delta robot link. Used by both ends: DeltaConnector(framing="binary")
+and the Python reference robot in easysort/system/delta/simulator.py.
+
+Every frame is FRAME_SIZE (20) bytes, little-endian:
+
+    offset  size  field
+    0       2     magic 0x5AA5 (bytes A5 5A)
+    2       2     sequence number, uint16
+    4       1     opcode, see Opcode
+    5       1     arg, opcode specific (status frames: see encode_status)
+    6       12    x, y, z, float32 (cm)
+    18      2     CRC-16/CCITT-FALSE of bytes 0-17
+
+Commands are PICK / DROP / MOVE with a 3D position. The robot answers every command with an ACK frame
+carrying the same sequence number, and a STATUS frame when the command has been carried out.
+"""
+from binascii import crc_hqx
+from enum import IntEnum
+import struct
+from typing import List, NamedTuple
+
+from easysort.common.datasaver import APPROVED_FAILS_REASONS, APPROVED_MATERIALS, APPROVED_STATUSES
+
+MAGIC = 0x5AA5
+MAGIC_BYTES = struct.pack("<H", MAGIC)
+HEADER = struct.Struct("<HHBBfff")
+FRAME = struct.Struct("<HHBBfffH")
+FRAME_SIZE = FRAME.size
+_CRC_INIT = 0xFFFF
+_STATUS_REASONS = ["none"] + APPROVED_FAILS_REASONS
+
+assert len(APPROVED_MATERIALS) <= 8 and len(_STATUS_REASONS) <= 16, "Status does not fit in the arg byte anymore"
+
+
+class Opcode(IntEnum):
+    PICK = 1
+    DROP = 2
+    MOVE = 3
+    ACK = 0x80
+    STATUS = 0x81
+
+
+class Frame(NamedTuple):
+    seq: int
+    opcode: int
+    arg: int
+    x: float
+    y: float
+    z: float
+
+
+def crc16(data: bytes) -> int:
+    """CRC-16/CCITT-FALSE (poly 0x1021, init 0xFFFF), computed in C by binascii."""
+    return crc_hqx(data, _CRC_INIT)
+
+
+def encode_frame(seq: int, opcode: int, x: float = 0.0, y: float = 0.0, z: float = 0.0, arg: int = 0) -> bytes:
+    header = HEADER.pack(MAGIC, seq & 0xFFFF, opcode, arg, x, y, z)
+    return header + struct.pack("<H", crc_hqx(header, _CRC_INIT))
+
+
+def encode_status(seq: int, status: str, material: str, reason: str) -> bytes:
+    """
+    STATUS frame. The arg byte packs the status message: bit 7 success, bits 4-6 material index,
+    bits 0-3 reason index (0 is "none").
+    """
+    if status not in APPROVED_STATUSES: raise ValueError(f"Invalid status: {status}. Must be one of {APPROVED_STATUSES}")
+    arg = (status == "success") << 7
+    arg |= APPROVED_MATERIALS.index(material) << 4
+    arg |= _STATUS_REASONS.index(reason) if reason in _STATUS_REASONS else _STATUS_REASONS.index("other")
+    return encode_frame(seq, Opcode.STATUS, arg=arg)
+
+
+def status_message(frame: Frame) -> str:
+    """The "{status}__{material}__{reason}" message of a STATUS frame, as DataSaver.decode expects."""
+    status = "success" if frame.arg & 0x80 else "fail"
+    material = APPROVED_MATERIALS[(frame.arg >> 4) & 0x07]
+    reason = _STATUS_REASONS[frame.arg & 0x0F] if frame.arg & 0x0F < len(_STATUS_REASONS) else "other"
+    return f"{status}__{material}__{reason}"
+
+
+class FrameDecoder():
+    """
+    Extracts frames from a byte stream. Bytes before a magic marker, and frames whose CRC does not match,
+    are skipped (counted in n_discarded_bytes / n_crc_errors) so the decoder resynchronises after noise.
+    """
+
+    def __init__(self):
+        self.n_crc_errors = 0
+        self.n_discarded_bytes = 0
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes) -> List[Frame]:
+        buffer = self._buffer
+        buffer += data
+        frames, start, end = [], 0, len(buffer)
+        unpack_from = FRAME.unpack_from
+        while end - start >= FRAME_SIZE:
+            if buffer[start] != 0xA5 or buffer[start + 1] != 0x5A:
+                magic_at = buffer.find(MAGIC_BYTES, start + 1)
+                skip_to = magic_at if magic_at >= 0 else end - 1
+                self.n_discarded_bytes += skip_to - start; start = skip_to
+                continue
+            _, seq, opcode, arg, x, y, z, crc = unpack_from(buffer, start)
+            if crc_hqx(buffer[start:start + FRAME_SIZE - 2], _CRC_INIT) != crc:
+                self.n_crc_errors += 1; self.n_discarded_bytes += 1; start += 1
+                continue
+            frames.append(Frame(seq, opcode, arg, x, y, z))
+            start += FRAME_SIZE
+        del buffer[:start]
+        return frames
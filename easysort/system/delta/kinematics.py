@@ -0,0 +1,171 @@
+"""
+Inverse and forward kinematics of the delta robot, for many points at once.
+
+Robot frame: origin in the centre of the base triangle, z pointing up (reachable points have z < 0), the
+first arm in the -y direction and the others at +-120 degrees. Joint angles are in radians, 0 with the upper
+arm horizontal and positive when it points down. World coordinates are the belt coordinates of config.yaml
+(cm, z = height above the belt); DeltaKinematics.to_robot / to_world convert using base_position.
+
+The formulas are the usual closed-form solutions for a delta robot with base triangle side base_side,
+effector triangle side effector_side, upper arm length upper_arm and forearm (parallelogram) length forearm.
+"""
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from easysort.common.config import RobotConfig
+from easysort.common.motion import travel_time
+
+_SQRT3 = np.sqrt(3.0)
+_TAN30 = 1 / _SQRT3
+_COS120, _SIN120 = -0.5, _SQRT3 / 2
+DEFAULT_LUT_RESOLUTION = 1.0
+
+
+class DeltaKinematics():
+    """
+    args:
+        base_side, effector_side, upper_arm, forearm: Geometry in cm
+        base_position: World position (x, y, height above the belt) of the base centre
+        joint_limits_deg: (min, max) angle of every joint
+        joint_max_speed_deg_s, joint_acceleration_deg_s2: Motor limits, for move_time
+    """
+
+    def __init__(self, base_side: float, effector_side: float, upper_arm: float, forearm: float,
+                 base_position: Sequence[float] = (0.0, 0.0, 0.0), joint_limits_deg: Sequence[float] = (-90.0, 90.0),
+                 joint_max_speed_deg_s: float = 360.0, joint_acceleration_deg_s2: float = 1440.0):
+        self.base_side, self.effector_side, self.upper_arm, self.forearm = base_side, effector_side, upper_arm, forearm
+        self.base_position = np.asarray(base_position, dtype=np.float64)
+        self.joint_limits = np.radians(np.asarray(joint_limits_deg, dtype=np.float64))
+        self.joint_max_speed, self.joint_acceleration = np.radians(joint_max_speed_deg_s), np.radians(joint_acceleration_deg_s2)
+        self._base_y = -0.5 * _TAN30 * base_side       # Upper arm joint, in the plane of the first arm
+        self._effector_y = 0.5 * _TAN30 * effector_side # Forearm joint on the effector, from its centre
+        self._offset = (base_side - effector_side) * _TAN30 / 2
+
+    @classmethod
+    def from_config(cls, robot_config: RobotConfig) -> "DeltaKinematics": return cls(**robot_config.kinematics)
+
+    def to_robot(self, points: np.ndarray) -> np.ndarray: return np.asarray(points, dtype=np.float64) - self.base_position
+    def to_world(self, points: np.ndarray) -> np.ndarray: return np.asarray(points, dtype=np.float64) + self.base_position
+
+    def _arm_angle(self, x: np.ndarray, y: np.ndarray, z: np.ndarray) -> np.ndarray:
+        """Angle of the arm in the yz plane, NaN where the point cannot be reached."""
+        rf, y1 = self.upper_arm, self._base_y
+        y = y - self._effector_y
+        with np.errstate(divide="ignore", invalid="ignore"):
+            a = (x * x + y * y + z * z + rf * rf - self.forearm * self.forearm - y1 * y1) / (2 * z)
+            b = (y1 - y) / z
+            d = -(a + b * y1) ** 2 + rf * rf * (b * b + 1)
+            yj = (y1 - a * b - np.sqrt(d)) / (b * b + 1) # NaN where d < 0
+            zj = a + b * yj
+            return np.arctan2(-zj, y1 - yj)
+
+    def inverse(self, points: np.ndarray) -> np.ndarray:
+        """(N, 3) robot frame points to (N, 3) joint angles, NaN rows for unreachable points."""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        x, y, z = points[:, 0], points[:, 1], points[:, 2]
+        angles = np.stack([self._arm_angle(x, y, z),
+                           self._arm_angle(x * _COS120 + y * _SIN120, y * _COS120 - x * _SIN120, z),
+                           self._arm_angle(x * _COS120 - y * _SIN120, y * _COS120 + x * _SIN120, z)], axis=1)
+        angles[np.isnan(angles).any(axis=1)] = np.nan
+        return angles
+
+    def forward(self, angles: np.ndarray) -> np.ndarray:
+        """(N, 3) joint angles to (N, 3) robot frame points, NaN rows where the arms cannot meet."""
+        angles = np.asarray(angles, dtype=np.float64).reshape(-1, 3)
+        rf, t = self.upper_arm, self._offset
+        cos, sin = np.cos(angles), np.sin(angles)
+        y1, z1 = -(t + rf * cos[:, 0]), -rf * sin[:, 0]
+        y2 = (t + rf * cos[:, 1]) * 0.5; x2 = y2 * _SQRT3; z2 = -rf * sin[:, 1]
+        y3 = (t + rf * cos[:, 2]) * 0.5; x3 = -y3 * _SQRT3; z3 = -rf * sin[:, 2]
+        dnm = (y2 - y1) * x3 - (y3 - y1) * x2
+        w1, w2, w3 = y1 * y1 + z1 * z1, x2 * x2 + y2 * y2 + z2 * z2, x3 * x3 + y3 * y3 + z3 * z3
+        a1 = (z2 - z1) * (y3 - y1) - (z3 - z1) * (y2 - y1)
+        b1 = -((w2 - w1) * (y3 - y1) - (w3 - w1) * (y2 - y1)) / 2
+        a2 = -(z2 - z1) * x3 + (z3 - z1) * x2
+        b2 = ((w2 - w1) * x3 - (w3 - w1) * x2) / 2
+        a = a1 * a1 + a2 * a2 + dnm * dnm
+        b = 2 * (a1 * b1 + a2 * (b2 - y1 * dnm) - z1 * dnm * dnm)
+        c = (b2 - y1 * dnm) ** 2 + b1 * b1 + dnm * dnm * (z1 * z1 - self.forearm * self.forearm)
+        with np.errstate(invalid="ignore"):
+            z = -0.5 * (b + np.sqrt(b * b - 4 * a * c)) / a
+        return np.stack([(a1 * z + b1) / dnm, (a2 * z + b2) / dnm, z], axis=1)
+
+    def within_limits(self, angles: np.ndarray) -> np.ndarray:
+        """Rows of angles that are solutions (not NaN) within joint_limits."""
+        with np.errstate(invalid="ignore"):
+            return ((angles >= self.joint_limits[0]) & (angles <= self.joint_limits[1])).all(axis=1)
+
+    def reachable(self, points: np.ndarray) -> np.ndarray:
+        """Robot frame points the effector can reach within the joint limits."""
+        return self.within_limits(self.inverse(points))
+
+    def move_time(self, from_angles: np.ndarray, to_angles: np.ndarray) -> np.ndarray:
+        """Time of joint-space moves: every motor with a trapezoidal profile, the slowest one decides."""
+        delta = np.abs(np.asarray(to_angles, dtype=np.float64) - np.asarray(from_angles, dtype=np.float64))
+        return travel_time(delta, self.joint_max_speed, self.joint_acceleration).max(axis=-1)
+
+
+class KinematicsLUT():
+    """
+    Joint angles precomputed on a regular grid over a box of the robot frame, trilinearly interpolated.
+    Points are reachable if all eight corners of their grid cell are, which is conservative by up to one cell.
+
+    Interpolation takes fewer NumPy calls than the closed form, so it is faster for the few to ~100 points of
+    one planning step; for large batches the closed form is faster (see benchmarks/bench_kinematics.py).
+    At 1 cm the table takes ~10 MB and is within 0.02 degrees of the closed form.
+
+    args:
+        bounds: ((x_min, x_max), (y_min, y_max), (z_min, z_max)) of the grid, the whole workspace if None
+        resolution: Grid spacing in cm
+    """
+
+    def __init__(self, kinematics: DeltaKinematics, bounds: Optional[Sequence[Sequence[float]]] = None,
+                 resolution: float = DEFAULT_LUT_RESOLUTION):
+        self.kinematics, self.resolution = kinematics, resolution
+        self.bounds = np.asarray(workspace_bounds(kinematics) if bounds is None else bounds, dtype=np.float64)
+        self.origin = self.bounds[:, 0]
+        self.shape = tuple(int(n) for n in np.floor((self.bounds[:, 1] - self.bounds[:, 0]) / resolution) + 1)
+        axes = [self.origin[i] + resolution * np.arange(self.shape[i]) for i in range(3)]
+        grid = np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1).reshape(-1, 3)
+        angles = kinematics.inverse(grid)
+        valid = kinematics.within_limits(angles)
+        self.table = np.where(valid[:, None], angles, 0.0).astype(np.float32) # Flat (n_cells, 3), the eight corners are one gather
+        self.valid = valid
+        self._strides = np.array([self.shape[1] * self.shape[2], self.shape[2], 1])
+        self._corners = np.array([[i, j, k] for i in (0, 1) for j in (0, 1) for k in (0, 1)]) # (8, 3)
+        self._corner_offsets = self._corners @ self._strides
+
+    @property
+    def nbytes(self) -> int: return self.table.nbytes + self.valid.nbytes
+
+    def _cells(self, points: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        position = (np.asarray(points, dtype=np.float64).reshape(-1, 3) - self.origin) / self.resolution
+        cell = np.floor(position)
+        inside = ((cell >= 0) & (cell < np.array(self.shape) - 1)).all(axis=1)
+        cell = np.clip(cell, 0, np.array(self.shape) - 2).astype(np.int64)
+        return cell @ self._strides, position - cell, inside
+
+    def reachable(self, points: np.ndarray) -> np.ndarray:
+        index, _, inside = self._cells(points)
+        return inside & self.valid[index[:, None] + self._corner_offsets].all(axis=1)
+
+    def inverse(self, points: np.ndarray) -> np.ndarray:
+        """Interpolated joint angles, NaN rows for points that are not reachable according to the table."""
+        index, fraction, inside = self._cells(points)
+        corners = index[:, None] + self._corner_offsets # (N, 8)
+        # Trilinear weights, in the same (i, j, k) order as _corners
+        lo_hi = np.stack([1 - fraction, fraction], axis=2) # (N, 3, 2)
+        weights = (lo_hi[:, 0, :, None, None] * lo_hi[:, 1, None, :, None] * lo_hi[:, 2, None, None, :]).reshape(-1, 8)
+        angles = np.matmul(weights[:, None, :], self.table[corners])[:, 0]
+        angles[~(inside & self.valid[corners].all(axis=1))] = np.nan
+        return angles
+
+
+def workspace_bounds(kinematics: DeltaKinematics) -> np.ndarray:
+    """Box around the reachable workspace of the robot frame, from forward kinematics of joint angle samples."""
+    samples = np.linspace(kinematics.joint_limits[0], kinematics.joint_limits[1], 25)
+    points = kinematics.forward(np.stack(np.meshgrid(samples, samples, samples, indexing="ij"), axis=-1).reshape(-1, 3))
+    points = points[~np.isnan(points).any(axis=1)]
+    return np.stack([np.floor(points.min(axis=0)), np.ceil(points.max(axis=0))], axis=1)
+
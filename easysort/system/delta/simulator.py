@@ -0,0 +1,123 @@
+"""
+Fake delta robot on a pseudo terminal, for tests and benchmarks without hardware.
+
+    python -m easysort.system.delta.simulator --move-time 0.5
+
+prints the serial port to connect to on its first line of output, then serves until killed.
+The robot echoes every line it receives. Lines with coordinates ("x,y,z") are treated as moves:
+move_time seconds later the robot reports a status update, like "success__unknown__none".
+
+Pipelined commands ("<seq>:<payload>") are acknowledged with "ack:<seq>" right away and queued; moves run
+one after another and each reports "status:<seq>:<status>" when finished. Retransmitted commands are
+acknowledged again but executed once. With --loss, incoming commands and outgoing acks are dropped with
+that probability, to exercise retransmission.
+
+With --framing binary the robot speaks the binary frames of easysort/system/delta/framing.py instead,
+with the same ack/status behaviour. This is the reference implementation of the robot side.
+"""
+import argparse
+import heapq
+import os
+import pty
+import random
+import select
+import subprocess
+import sys
+import time
+import tty
+from collections import deque
+from typing import List, Tuple
+
+from easysort.system.delta.framing import Frame, FrameDecoder, Opcode, encode_frame, encode_status
+
+_READ_SIZE = 4096
+_DEDUPLICATION_WINDOW = 1024
+
+
+def is_coordinates(line: bytes) -> bool:
+    try: return len([float(value) for value in line.split(b",")]) in (2, 3)
+    except ValueError: return False
+
+
+class FakeDeltaRobot():
+    def __init__(self, move_time_s: float = 0.0, material: str = "unknown", loss: float = 0.0, seed: int = 0, framing: str = "text"):
+        self.move_time_s, self.material, self.loss, self.framing = move_time_s, material, loss, framing
+        self.decoder = FrameDecoder()
+        self.master, self._slave = pty.openpty() # Keep the slave open, so reads do not fail before a client connects
+        tty.setraw(self.master); tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+        self._random = random.Random(seed)
+        self._buffer = b""
+        self._scheduled: List[Tuple[float, bytes]] = []
+        self._executed = set()
+        self._executed_order = deque() # Forget old sequence numbers, they are reused after wrapping around
+        self._busy_until = 0.0
+
+    def _lost(self) -> bool: return self.loss > 0 and self._random.random() < self.loss
+
+    def _schedule_move(self, status: bytes) -> None:
+        self._busy_until = max(self._busy_until, time.monotonic()) + self.move_time_s
+        heapq.heappush(self._scheduled, (self._busy_until, status))
+
+    def _first_time(self, seq) -> bool:
+        if seq in self._executed: return False
+        self._executed.add(seq); self._executed_order.append(seq)
+        if len(self._executed_order) > _DEDUPLICATION_WINDOW: self._executed.discard(self._executed_order.popleft())
+        return True
+
+    def handle_line(self, line: bytes) -> None:
+        seq, sep, _ = line.partition(b":")
+        if sep and seq.isdigit():
+            if self._lost(): return
+            if self._first_time(seq): self._schedule_move(b"status:" + seq + f":success__{self.material}__none\n".encode())
+            if not self._lost(): self.write(b"ack:" + seq + b"\n")
+            return
+        self.write(line + b"\n")
+        if is_coordinates(line): self._schedule_move(f"success__{self.material}__none\n".encode())
+
+    def handle_frame(self, frame: Frame) -> None:
+        if frame.opcode not in (Opcode.PICK, Opcode.DROP, Opcode.MOVE) or self._lost(): return
+        if self._first_time(frame.seq): self._schedule_move(encode_status(frame.seq, "success", self.material, "none"))
+        if not self._lost(): self.write(encode_frame(frame.seq, Opcode.ACK))
+
+    def write(self, data: bytes) -> None: os.write(self.master, data)
+
+    def serve_forever(self) -> None:
+        while True:
+            timeout = max(0.0, self._scheduled[0][0] - time.monotonic()) if self._scheduled else None
+            readable, _, _ = select.select([self.master], [], [], timeout)
+            while self._scheduled and self._scheduled[0][0] <= time.monotonic(): self.write(heapq.heappop(self._scheduled)[1])
+            if not readable: continue
+            data = os.read(self.master, _READ_SIZE)
+            if self.framing == "binary":
+                for frame in self.decoder.feed(data): self.handle_frame(frame)
+                continue
+            self._buffer += data
+            *lines, self._buffer = self._buffer.split(b"\n")
+            for line in lines: self.handle_line(line.strip())
+
+
+def spawn_simulator(*args: str) -> Tuple[subprocess.Popen, str]:
+    """Starts a fake robot process with the given command line arguments. Returns the process and its port."""
+    process = subprocess.Popen([sys.executable, "-m", "easysort.system.delta.simulator", *args], stdout=subprocess.PIPE, text=True)
+    port = process.stdout.readline().strip()
+    if not port: process.kill(); raise RuntimeError(f"Simulator failed to start: {process.wait()}")
+    return process, port
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--move-time", type=float, default=0.0, help="Seconds from a move command to its status update")
+    parser.add_argument("--material", default="unknown", help="Material reported in status updates")
+    parser.add_argument("--loss", type=float, default=0.0, help="Probability of dropping a pipelined command or ack")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--framing", choices=["text", "binary"], default="text")
+    args = parser.parse_args()
+    robot = FakeDeltaRobot(args.move_time, args.material, args.loss, args.seed, args.framing)
+    print(robot.port, flush=True)
+    try: robot.serve_forever()
+    except KeyboardInterrupt: pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from easysort.sorting.backends import OnnxBackend, TinygradBackend, UltralyticsBackend, YOLOWorldBackend
+from easysort.sorting.export import DEFAULT_WEIGHTS_PATH, export_onnx, require_model_file
+
+
+class SingleImageModel():
+    """Like inference's YOLOWorld: infer takes one image and returns one response."""
+
+    def __init__(self): self.calls = []
+
+    def infer(self, image):
+        assert isinstance(image, np.ndarray), "infer takes a single image"
+        self.calls.append(image.shape)
+        return {"image": image.shape}
+
+
+class TestYOLOWorldBackend:
+    def test_calls_the_model_once_per_frame(self):
+        backend = YOLOWorldBackend.__new__(YOLOWorldBackend) # Without loading the model
+        backend.model = SingleImageModel()
+        frames = [np.zeros((10 + i, 20, 3), dtype=np.uint8) for i in range(3)]
+        assert backend.infer_responses(frames) == [{"image": frame.shape} for frame in frames]
+        assert backend.model.calls == [frame.shape for frame in frames]
+
+
+class TestModelFiles:
+    def test_default_weights_are_the_training_output(self):
+        assert DEFAULT_WEIGHTS_PATH.parts[-3:] == ("train", "weights", "best.pt")
+
+    @pytest.mark.parametrize("make", [lambda path: OnnxBackend(model_path=path), lambda path: TinygradBackend(weights_path=path),
+                                      lambda path: UltralyticsBackend(weights_path=path), lambda path: export_onnx(path)])
+    def test_missing_model_fails_with_how_to_make_it(self, tmp_path, make):
+        with pytest.raises(FileNotFoundError, match="train_yolov8_ultralytics.py"): make(tmp_path / "missing.pt")
+
+    def test_existing_model_passes(self, tmp_path):
+        (tmp_path / "model.onnx").write_bytes(b"")
+        assert require_model_file(str(tmp_path / "model.onnx")) == tmp_path / "model.onnx"
@@ -0,0 +1,87 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from easysort.sorting.backends import DetectorBackend, YOLOWorldBackend
+from easysort.sorting.batching import FrameBatcher, chunked
+from easysort.sorting.classifier import Classifier
+
+
+class TestFrameBatcher:
+    def test_chunked(self):
+        assert chunked([1, 2, 3, 4, 5], 2) == [[1, 2], [3, 4], [5]]
+        assert chunked([], 3) == []
+        with pytest.raises(ValueError): chunked([1], 0)
+
+    def test_full_batch_is_dispatched_together(self):
+        batches = []
+        def infer_batch(frames): batches.append(list(frames)); return [f * 10 for f in frames]
+        with FrameBatcher(infer_batch, max_batch_size=4, max_wait_s=1.0) as batcher:
+            futures = [batcher.submit(i) for i in range(4)]
+            assert [f.result(timeout=1) for f in futures] == [0, 10, 20, 30]
+        assert batches == [[0, 1, 2, 3]]
+
+    def test_partial_batch_is_dispatched_after_max_wait(self):
+        with FrameBatcher(lambda frames: frames, max_batch_size=64, max_wait_s=0.01) as batcher:
+            start = time.perf_counter()
+            assert batcher(7, timeout=1) == 7
+            assert time.perf_counter() - start < 0.5
+            assert batcher.n_batches == 1
+
+    def test_concurrent_producers_share_batches(self):
+        def infer_batch(frames): time.sleep(0.005); return frames
+        results = {}
+        with FrameBatcher(infer_batch, max_batch_size=8, max_wait_s=0.02) as batcher:
+            def camera(cam_id):
+                results[cam_id] = [batcher((cam_id, i)) for i in range(10)]
+            threads = [threading.Thread(target=camera, args=(i,)) for i in range(4)]
+            for t in threads: t.start()
+            for t in threads: t.join()
+            assert batcher.n_frames == 40 and batcher.mean_batch_size > 1
+        assert results == {c: [(c, i) for i in range(10)] for c in range(4)}
+
+    def test_errors_propagate_to_every_frame(self):
+        def infer_batch(frames): raise ValueError("model crashed")
+        with FrameBatcher(infer_batch, max_batch_size=2, max_wait_s=0.001) as batcher:
+            futures = [batcher.submit(i) for i in range(2)]
+            for future in futures:
+                with pytest.raises(ValueError): future.result(timeout=1)
+
+    def test_failed_batch_is_retried_frame_by_frame(self):
+        batches = []
+        def infer_batch(frames):
+            batches.append(list(frames))
+            if -1 in frames: raise ValueError("bad frame")
+            return [f * 10 for f in frames]
+        with FrameBatcher(infer_batch, max_batch_size=4, max_wait_s=1.0) as batcher:
+            futures = [batcher.submit(i) for i in [1, -1, 2, 3]]
+            assert [futures[i].result(timeout=1) for i in (0, 2, 3)] == [10, 20, 30]
+            with pytest.raises(ValueError, match="bad frame"): futures[1].result(timeout=1)
+        assert batches == [[1, -1, 2, 3], [1], [-1], [2], [3]]
+
+
+class FakeBackend(DetectorBackend):
+    classes = ["a"]
+
+    def __init__(self, batched: bool): self.batched, self.calls = batched, []
+
+    def infer(self, frames):
+        self.calls.append(len(frames))
+        return [SimpleNamespace(xyxy=np.array([[0.0, 0.0, 2.0, 2.0]]) + frame, data={}) for frame in frames]
+
+
+class TestClassifierInferBatch:
+    def test_one_backend_call_per_chunk_in_order(self):
+        backend = FakeBackend(batched=True)
+        classifier = Classifier(max_batch_size=4, backend=backend)
+        detections = classifier.infer_batch(list(range(10)))
+        assert backend.calls == [4, 4, 2]
+        assert [d.xyxy[0, 0] for d in detections] == list(range(10)) and all("world_xy" in d.data for d in detections)
+
+    def test_yolo_world_is_not_batched(self):
+        assert not YOLOWorldBackend.batched and DetectorBackend.batched
+        classifier = Classifier(backend=FakeBackend(batched=False))
+        with classifier.batcher() as batcher: assert len(batcher(np.zeros(1), timeout=1).xyxy) == 1
@@ -0,0 +1,77 @@
+import json
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from easysort.sorting.benchmark import REPO_ROOT, compare, format_comparison, format_results, run_suite, summarize, time_batches
+
+
+def report(*rows):
+    """A result file with (backend, input_size, batch_size, p50_ms, throughput_fps) rows."""
+    return {"results": [{"backend": b, "input_size": s, "batch_size": n, "p50_ms": p50, "p90_ms": p50, "p99_ms": p50,
+                         "throughput_fps": fps, "peak_rss_mb": 100.0} for b, s, n, p50, fps in rows], "errors": {}}
+
+
+class TestMeasurement:
+    def test_summarize(self):
+        stats = summarize([1_000_000] * 98 + [5_000_000, 9_000_000], batch_size=4)
+        assert stats["p50_ms"] == pytest.approx(1.0) and stats["p90_ms"] == pytest.approx(1.0)
+        assert 4.9 < stats["p99_ms"] < 9.0
+        assert stats["throughput_fps"] == pytest.approx(4 * 100 / 0.112)
+
+    def test_time_batches_warms_up_then_cycles_through_the_images(self):
+        frames = [np.full((2, 2, 3), i, dtype=np.uint8) for i in range(5)]
+        calls = []
+        latencies = time_batches(lambda batch: calls.append([int(frame[0, 0, 0]) for frame in batch]), frames, 2, warmup=3, iterations=4)
+        assert len(calls) == 7 and len(latencies) == 4 and all(isinstance(t, int) and t >= 0 for t in latencies)
+        assert calls[3:] == [[0, 1], [2, 3], [0, 1], [2, 3]]
+
+    def test_unavailable_backends_are_reported_not_raised(self):
+        result = run_suite(["no_such_backend"], iterations=1, warmup=0)
+        assert result["results"] == [] and "no_such_backend" in result["errors"]
+        assert result["environment"]["python"] and "cpu_count" in result["environment"]
+
+
+class TestCompare:
+    def test_flags_slower_configurations(self):
+        baseline = report(("onnx", 640, 1, 10.0, 100.0), ("onnx", 640, 4, 30.0, 133.0), ("tinygrad", 320, 1, 8.0, 125.0))
+        current = report(("onnx", 640, 1, 10.5, 95.0), ("onnx", 640, 4, 36.0, 111.0), ("ultralytics", 640, 1, 20.0, 50.0))
+        rows = compare(baseline, current, threshold=0.1)
+        assert [(row["key"], row["regressed"]) for row in rows] == [("onnx/640/b1", False), ("onnx/640/b4", True), ("tinygrad/320/b1", True)]
+        assert rows[1]["p50_change"] == pytest.approx(0.2)
+        assert "2 of 3 configurations regressed" in format_comparison(rows, 0.1)
+
+    def test_lower_throughput_alone_is_a_regression(self):
+        rows = compare(report(("onnx", 640, 8, 50.0, 160.0)), report(("onnx", 640, 8, 50.0, 120.0)), threshold=0.1)
+        assert rows[0]["regressed"]
+
+    def test_missing_configurations_and_new_errors_are_regressions(self):
+        baseline = report(("onnx", None, 1, 10.0, 100.0), ("tinygrad", 320, 1, 8.0, 125.0), ("tinygrad", 320, 4, 20.0, 200.0))
+        current = report(("tinygrad", 320, 1, 8.0, 125.0))
+        current["errors"] = {"onnx": "ModuleNotFoundError: onnxruntime", "ultralytics@640": "FileNotFoundError: best.pt"}
+        rows = compare(baseline, current, threshold=0.1)
+        assert [(row["key"], row["regressed"], row.get("error")) for row in rows] == [
+            ("onnx/None/b1", True, "ModuleNotFoundError: onnxruntime"), ("tinygrad/320/b1", False, None),
+            ("tinygrad/320/b4", True, "missing from the current results"), ("ultralytics@640", True, "FileNotFoundError: best.pt")]
+        assert "3 of 4 configurations regressed" in format_comparison(rows, 0.1)
+
+    def test_errors_already_in_the_baseline_are_not_regressions(self):
+        baseline, current = report(("onnx", None, 1, 10.0, 100.0)), report(("onnx", None, 1, 10.0, 100.0))
+        baseline["errors"] = current["errors"] = {"ultralytics@640": "ModuleNotFoundError: ultralytics"}
+        assert not any(row["regressed"] for row in compare(baseline, current))
+
+    def test_cli_compare_exit_code(self, tmp_path):
+        baseline, current = tmp_path / "baseline.json", tmp_path / "current.json"
+        baseline.write_text(json.dumps(report(("onnx", 640, 1, 10.0, 100.0))))
+        for p50, expected in [(10.2, 0), (15.0, 1)]:
+            current.write_text(json.dumps(report(("onnx", 640, 1, p50, 1000 / p50))))
+            result = subprocess.run([sys.executable, "-m", "easysort.sorting.benchmark", "compare", str(baseline), str(current)],
+                                    cwd=REPO_ROOT, capture_output=True, text=True)
+            assert result.returncode == expected, result.stderr
+        assert "REGRESSION" in result.stdout
+
+    def test_format_results(self):
+        text = format_results(dict(report(("tinygrad", 320, 4, 12.5, 320.0)), errors={"onnx": "ModuleNotFoundError: onnxruntime"}))
+        assert "tinygrad" in text and "12.50" in text and "onnx" in text and "skipped" in text
@@ -0,0 +1,27 @@
+import numpy as np
+
+from easysort.common.config import load_robot_config
+from easysort.sorting.calibration import CameraCalibration, homography_from_points, load_calibration
+
+
+class TestCameraCalibration:
+    def test_recovers_known_homography(self):
+        H = np.array([[0.05, 0.002, 1.0], [-0.001, 0.048, 2.0], [1e-5, 2e-5, 1.0]])
+        pixels = np.array([[0, 0], [1280, 0], [1280, 980], [0, 980], [640, 490], [100, 800]], dtype=float)
+        homogeneous = np.c_[pixels, np.ones(len(pixels))] @ H.T
+        world = homogeneous[:, :2] / homogeneous[:, 2:]
+        calibration = CameraCalibration(homography_from_points(pixels, world))
+        np.testing.assert_allclose(calibration.homography, H, rtol=1e-6, atol=1e-9)
+        np.testing.assert_allclose(calibration.project(pixels), world, atol=1e-6)
+
+    def test_boxes_map_their_centres(self):
+        config = load_robot_config()
+        calibration = CameraCalibration.from_config(config)
+        np.testing.assert_allclose(calibration.project(config.camera_points), config.world_points, atol=1e-6)
+        xyxy = np.array([[0, 0, 1280, 980], [100, 200, 300, 400]], dtype=np.float32)
+        centres = np.array([[640, 490], [200, 300]])
+        np.testing.assert_allclose(calibration.boxes_to_world(xyxy), calibration.project(centres), atol=1e-6)
+        assert calibration.boxes_to_world(np.empty((0, 4))).shape == (0, 2)
+
+    def test_load_calibration_is_cached(self):
+        assert load_calibration() is load_calibration()
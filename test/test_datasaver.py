@@ -0,0 +1,159 @@
+import json
+import time
+import os
+
+from easysort.common.datasaver import Database, DataSaver, SortEvent, StatusDecoder
+
+
+class TestDataSaver:
+    def test_decode_and_save_json(self, tmp_path):
+        database_path = tmp_path / "database.json"
+        datasaver = DataSaver(database_path)
+        assert datasaver.decode("success__paper__none", save=True) == ("success", "paper", "none")
+        assert datasaver.decode("fail__plastic__pickup_failure", save=True) == ("fail", "plastic", "pickup_failure")
+        assert datasaver.decode("fail__wood__other", save=True) == ("", "", "")
+        assert not datasaver.decode("unknown__fail")
+        datasaver.quit()
+        reloaded = DataSaver(database_path).database
+        assert reloaded.paper.n_success == 1 and reloaded.plastic.n_fail == 1 and reloaded.fails.pickup_failure == 1
+        assert not os.path.exists(f"{database_path}.tmp")
+
+
+class TestEventLogBackend:
+    def test_events_survive_a_crash_without_quit(self, tmp_path):
+        database_path = tmp_path / "database.json"
+        datasaver = DataSaver(database_path, backend="eventlog", fsync_every=1)
+        for _ in range(3): datasaver.decode("success__metal__none", save=True)
+        datasaver.decode("fail__glass__lost_while_moving", save=True)
+        reloaded = DataSaver(database_path, backend="eventlog").database # No quit(): only the log exists
+        assert reloaded.metal.n_success == 3 and reloaded.glass.n_fail == 1 and reloaded.fails.lost_while_moving == 1
+
+    def test_compaction_writes_snapshots_and_rotates_the_log(self, tmp_path):
+        database_path = tmp_path / "database.json"
+        datasaver = DataSaver(database_path, backend="eventlog", compact_every=10)
+        for _ in range(25): datasaver.decode("success__paper__none", save=True)
+        datasaver.backend.sync()
+        assert json.load(open(database_path))["paper"]["n_success"] == 20
+        assert sorted(os.listdir(tmp_path)) == ["database.json", "database.json.log.2"]
+        assert DataSaver(database_path, backend="eventlog").database.paper.n_success == 25
+
+    def test_crash_during_compaction_does_not_double_count(self, tmp_path):
+        database_path = tmp_path / "database.json"
+        datasaver = DataSaver(database_path, backend="eventlog", fsync_every=1)
+        for _ in range(4): datasaver.decode("success__paper__none", save=True)
+        datasaver.save()
+        with open(f"{database_path}.log.0", "w") as file: file.write("1.0 success__paper__none\n" * 4) # Old log not yet deleted
+        datasaver.decode("fail__paper__other", save=True)
+        with open(f"{database_path}.log.1", "a") as file: file.write("2.0 success__pap") # Torn last write
+        database = DataSaver(database_path, backend="eventlog").database
+        assert (database.paper.n_success, database.paper.n_fail, database.fails.other) == (4, 1, 1)
+        assert not os.path.exists(f"{database_path}.log.0")
+
+    def test_records_after_a_torn_tail_are_kept(self, tmp_path):
+        database_path = tmp_path / "database.json"
+        datasaver = DataSaver(database_path, backend="eventlog", fsync_every=1)
+        datasaver.decode("success__paper__none", save=True)
+        with open(f"{database_path}.log.0", "a") as file: file.write("2.0 success__pap") # Torn last write
+        recovered = DataSaver(database_path, backend="eventlog", fsync_every=1)
+        recovered.decode("fail__paper__other", save=True)
+        with open(f"{database_path}.log.0") as file: assert all(line.count("__") == 2 for line in file)
+        database = DataSaver(database_path, backend="eventlog").database
+        assert (database.paper.n_success, database.paper.n_fail, database.fails.other) == (1, 1, 1)
+
+    def test_reads_legacy_json_database(self, tmp_path):
+        database_path = tmp_path / "database.json"
+        legacy = DataSaver(database_path)
+        legacy.decode("success__cardboard__none", save=True); legacy.quit()
+        datasaver = DataSaver(database_path, backend="eventlog")
+        datasaver.decode("success__cardboard__none", save=True); datasaver.quit()
+        assert DataSaver(database_path, backend="eventlog").database.cardboard.n_success == 2
+
+
+class TestSQLiteBackend:
+    def test_counters_are_derived_from_rows(self, tmp_path):
+        database_path = tmp_path / "database.sqlite"
+        datasaver = DataSaver(database_path, backend="sqlite", batch_size=4)
+        for _ in range(5): datasaver.decode("success__plastic__none", save=True, confidence=0.9, latency_s=0.2)
+        datasaver.decode("fail__plastic__pickup_failure", save=True)
+        assert datasaver.backend.connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert datasaver.backend.connection.execute("SELECT COUNT(*) FROM sort_events").fetchone()[0] == 4 # One batch committed
+        datasaver.quit()
+        database = DataSaver(database_path, backend="sqlite").database
+        assert (database.plastic.n_success, database.plastic.n_fail, database.fails.pickup_failure) == (5, 1, 1)
+
+    def test_picks_per_minute(self, tmp_path):
+        datasaver = DataSaver(tmp_path / "database.sqlite", backend="sqlite")
+        now = 1_000_020.0
+        events = [(now - 7200, "paper"), (now - 130, "paper"), (now - 125, "metal"), (now - 10, "paper"), (now - 5, "paper")]
+        for timestamp, material in events:
+            datasaver.backend.record(SortEvent(timestamp, "success", material, "none", 0.8, 0.1), datasaver.database)
+        assert datasaver.backend.picks_per_minute(now=now) == [(999_840.0, 2), (999_960.0, 2)]
+        assert datasaver.backend.picks_per_minute(material="paper", now=now) == [(999_840.0, 1), (999_960.0, 2)]
+        assert [e.confidence for e in datasaver.backend.events(since=now - 60)] == [0.8, 0.8]
+        datasaver.quit()
+
+
+class TestBackgroundFlush:
+    MESSAGES = ["success__paper__none", "fail__glass__pickup_failure", "success__plastic__none", "fail__metal__other"]
+
+    def test_flushes_every_n_events(self, tmp_path):
+        database_path = tmp_path / "database.json"
+        datasaver = DataSaver(database_path, flush_every=10, flush_interval_s=5)
+        for _ in range(10): datasaver.decode("success__paper__none", save=True)
+        deadline = time.perf_counter() + 2
+        while datasaver.flusher.n_flushes == 0 and time.perf_counter() < deadline: time.sleep(0.01)
+        assert json.load(open(database_path))["paper"]["n_success"] == 10
+        datasaver.quit()
+
+    def test_stress_100k_decodes_are_batched_into_few_flushes(self, tmp_path):
+        # The throughput against synchronous saves is in benchmarks/bench_datasaver_flush.py
+        n_events = 100_000
+        background = DataSaver(tmp_path / "background.json", flush_interval_s=0.05, flush_every=5_000)
+        for i in range(n_events): background.decode(self.MESSAGES[i % 4], save=True)
+        background.quit()
+
+        assert 0 < background.flusher.n_flushes < n_events / 1_000
+        database = DataSaver(tmp_path / "background.json").database
+        assert database.paper.n_success == database.glass.n_fail == database.plastic.n_success == database.metal.n_fail == 25_000
+        assert database.fails.pickup_failure == database.fails.other == 25_000
+
+    def test_sqlite_keeps_every_event(self, tmp_path):
+        datasaver = DataSaver(tmp_path / "database.sqlite", backend="sqlite", flush_interval_s=0.01)
+        for i in range(1_000): datasaver.decode(self.MESSAGES[i % 4], save=True)
+        datasaver.quit()
+        reloaded = DataSaver(tmp_path / "database.sqlite", backend="sqlite")
+        assert reloaded.database.paper.n_success == 250 and len(reloaded.backend.events()) == 1_000
+        reloaded.quit()
+
+
+class TestStatusDecoder:
+    def test_bulk_buffer_with_partial_lines(self):
+        decoder = StatusDecoder()
+        messages = []
+        assert decoder.feed(b"success__paper__none\r\nfail__glass__pickup_failure\nsucc", messages) == 2
+        assert decoder.feed(b"ess__paper__none\ngarbage\nfail__wood__other\nfail__metal__new_reason\n", messages) == 2
+        assert messages == [("success", "paper", "none"), ("fail", "glass", "pickup_failure"),
+                            ("success", "paper", "none"), ("fail", "metal", "new_reason")]
+        assert decoder.n_invalid == 2
+        database = Database()
+        decoder.apply_to(database)
+        assert (database.paper.n_success, database.glass.n_fail, database.metal.n_fail, database.fails.pickup_failure) == (2, 1, 1, 1)
+        assert sum(decoder.status_counts) == 0
+
+    def test_decode_buffer_matches_decode(self, tmp_path):
+        lines = ["success__paper__none", "fail__glass__pickup_failure", "fail__plastic__other", "success__metal__none"] * 50
+        one_by_one = DataSaver(tmp_path / "a.json")
+        for line in lines: one_by_one.decode(line, save=True)
+        bulk = DataSaver(tmp_path / "b.json", backend="eventlog")
+        buffer = "\n".join(lines).encode() + b"\n"
+        for i in range(0, len(buffer), 97): bulk.decode_buffer(buffer[i:i + 97])
+        assert bulk.database == one_by_one.database
+        bulk.quit()
+        assert DataSaver(tmp_path / "b.json", backend="eventlog").database == one_by_one.database
+
+    def test_is_valid_movement_message(self, tmp_path):
+        datasaver = DataSaver(tmp_path / "database.json")
+        assert datasaver.is_valid_movement_message("success__paper__none")
+        assert datasaver.is_valid_movement_message(b"fail__glass__pickup_failure")
+        assert not datasaver.is_valid_movement_message("paper__success__none")
+        assert not datasaver.is_valid_movement_message("success__paper")
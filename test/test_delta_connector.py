@@ -0,0 +1,145 @@
+import asyncio
+import time
+
+import pytest
+
+from easysort.common.errors import RobotCommunicationError, RobotConnectionError
+from easysort.system.delta.delta_connector import DeltaConnector
+from easysort.system.delta.simulator import spawn_simulator
+
+
+@pytest.fixture
+def robot():
+    process, port = spawn_simulator("--move-time", "0.05", "--material", "paper")
+    yield port
+    process.kill(); process.wait()
+
+
+class TestDeltaConnector:
+    def test_echo_round_trip(self, robot):
+        async def run():
+            async with DeltaConnector(robot) as connector:
+                assert await connector.request("hello") == "hello"
+                assert await connector.request(b"ping\n") == "ping"
+        asyncio.run(run())
+
+    def test_navigate_to_waits_for_status_without_blocking_the_loop(self, robot):
+        async def run():
+            ticks = 0
+            async def ticker():
+                nonlocal ticks
+                while True: ticks += 1; await asyncio.sleep(0.005)
+            async with DeltaConnector(robot, baud_rate=115200) as connector:
+                task = asyncio.create_task(ticker())
+                assert await connector.navigate_to(12.5, 3, 0) == "success__paper__none"
+                task.cancel()
+            assert ticks >= 5 # The loop kept running while the robot was moving
+        asyncio.run(run())
+
+    def test_receive_times_out(self, robot):
+        async def run():
+            async with DeltaConnector(robot) as connector:
+                start = time.perf_counter()
+                assert await connector.receive(timeout_seconds=0.05) == ''
+                assert time.perf_counter() - start < 0.5
+        asyncio.run(run())
+
+    def test_invalid_port(self):
+        with pytest.raises(RobotConnectionError): asyncio.run(DeltaConnector("/dev/does-not-exist").connect())
+
+
+@pytest.fixture
+def lossy_robot():
+    process, port = spawn_simulator("--move-time", "0.002", "--loss", "0.2", "--seed", "1")
+    yield port
+    process.kill(); process.wait()
+
+
+class TestPipelinedCommands:
+    def test_window_of_commands_with_packet_loss(self, lossy_robot):
+        async def run():
+            async with DeltaConnector(lossy_robot, window_size=8, ack_timeout_s=0.02, max_retries=50) as connector:
+                commands, max_in_flight = [], 0
+                for i in range(60):
+                    commands.append(await connector.send_command((i, 1.0, 0.0)))
+                    max_in_flight = max(max_in_flight, connector.n_in_flight)
+                statuses = await asyncio.wait_for(asyncio.gather(*(command.done for command in commands)), 10)
+                assert statuses == ["success__unknown__none"] * 60
+                assert 1 < max_in_flight <= 8
+                assert connector.n_retransmissions > 0
+                assert [command.seq for command in commands] == list(range(60))
+        asyncio.run(run())
+
+    def test_next_pick_is_sent_while_the_current_move_executes(self):
+        process, port = spawn_simulator("--move-time", "0.1")
+        async def run():
+            async with DeltaConnector(port) as connector:
+                first = await connector.send_command((1.0, 2.0, 0.0))
+                await first.acked
+                second = await connector.send_command((3.0, 4.0, 0.0))
+                await second.acked
+                assert not first.done.done() # Both commands reached the robot before the first move finished
+                assert await second.done == "success__unknown__none" and first.done.done()
+        try: asyncio.run(run())
+        finally: process.kill(); process.wait()
+
+    def test_command_fails_after_max_retries(self):
+        process, port = spawn_simulator("--loss", "1.0")
+        async def run():
+            async with DeltaConnector(port, ack_timeout_s=0.01, max_retries=2) as connector:
+                command = await connector.send_command("1,2,3")
+                with pytest.raises(RobotCommunicationError): await command.acked
+                assert command.n_sent == 3 and connector.n_in_flight == 0
+        try: asyncio.run(run())
+        finally: process.kill(); process.wait()
+
+    def test_binary_framing_with_packet_loss(self):
+        process, port = spawn_simulator("--framing", "binary", "--material", "glass", "--loss", "0.2", "--seed", "2")
+        async def run():
+            async with DeltaConnector(port, window_size=8, ack_timeout_s=0.02, max_retries=50, framing="binary") as connector:
+                commands = [await connector.send_command((i, 1.0, 0.0)) for i in range(40)]
+                statuses = await asyncio.wait_for(asyncio.gather(*(command.done for command in commands)), 10)
+                assert statuses == ["success__glass__none"] * 40
+                assert connector.n_retransmissions > 0
+        try: asyncio.run(run())
+        finally: process.kill(); process.wait()
+
+    @staticmethod
+    async def assert_window_is_free(connector: DeltaConnector) -> None:
+        """Disconnected, every send fails at once. A leaked window slot would block it instead."""
+        for _ in range(connector.window_size + 1):
+            with pytest.raises(RobotCommunicationError): await asyncio.wait_for(connector.send_command((1.0, 2.0, 0.0)), 1)
+
+    @pytest.mark.parametrize("loss, acked", [("1.0", False), ("0.0", True)])
+    def test_commands_in_flight_fail_when_the_robot_disconnects(self, loss, acked):
+        process, port = spawn_simulator("--move-time", "5", "--loss", loss)
+        async def run():
+            async with DeltaConnector(port, window_size=2, ack_timeout_s=0.01, max_retries=1000) as connector:
+                commands = [await connector.send_command((1.0, 2.0, 0.0)) for _ in range(connector.window_size)]
+                if acked: await asyncio.gather(*(command.acked for command in commands))
+                else: await asyncio.sleep(0.05) # Retransmitting
+                process.kill(); process.wait()
+                for command in commands: # A retransmission may see the closed transport before connection_lost
+                    with pytest.raises(RobotConnectionError if acked else (RobotConnectionError, RobotCommunicationError)):
+                        await asyncio.wait_for(command.done, 2)
+                assert connector.n_in_flight == 0
+                await self.assert_window_is_free(connector)
+        try: asyncio.run(run())
+        finally: process.kill(); process.wait()
+
+    def test_retransmission_after_the_transport_closed_fails_the_command(self):
+        process, port = spawn_simulator("--loss", "1.0")
+        async def run():
+            async with DeltaConnector(port, window_size=8, ack_timeout_s=0.001, max_retries=100_000) as connector:
+                commands = [await connector.send_command((float(i), 2.0, 0.0)) for i in range(connector.window_size)]
+                await asyncio.sleep(0.02) # Retransmitting every millisecond
+                # Close the simulator side of the PTY while the loop is busy. The ack timers are then overdue in the
+                # loop iteration that sees the hang-up, and run after the transport closed but before connection_lost
+                # reaches the connector
+                process.kill(); process.wait(); time.sleep(0.01)
+                for command in commands:
+                    with pytest.raises(RobotCommunicationError): await asyncio.wait_for(command.acked, 1)
+                assert connector.n_in_flight == 0
+                await self.assert_window_is_free(connector)
+        try: asyncio.run(run())
+        finally: process.kill(); process.wait()
@@ -0,0 +1,44 @@
+import numpy as np
+
+from easysort.sorting.embedding_cache import TextEmbeddingCache, cache_key
+
+CLASSES = ["plastic-bottle", "cardboard-box", "plastic-packaging", "other"]
+
+
+class Encoder:
+    def __init__(self): self.calls = 0
+    def __call__(self, classes):
+        self.calls += 1
+        return np.random.default_rng(len(classes)).normal(size=(1, len(classes), 512))
+
+
+class TestTextEmbeddingCache:
+    def test_restart_loads_from_disk_without_encoding(self, tmp_path):
+        encode = Encoder()
+        first = TextEmbeddingCache(tmp_path).get_or_compute("yolo_world/l", CLASSES, lambda: encode(CLASSES))
+        restarted = TextEmbeddingCache(tmp_path)
+        again = restarted.get_or_compute("yolo_world/l", CLASSES, lambda: encode(CLASSES))
+        assert encode.calls == 1 and restarted.n_disk_hits == 1
+        assert isinstance(again, np.memmap) and again.dtype == np.float32
+        np.testing.assert_array_equal(again, first)
+
+    def test_key_depends_on_model_and_class_order(self, tmp_path):
+        keys = {cache_key("yolo_world/l", CLASSES), cache_key("yolo_world/s", CLASSES), cache_key("yolo_world/l", CLASSES[::-1])}
+        assert len(keys) == 3 and all("/" not in key for key in keys)
+
+    def test_memory_lru_evicts_least_recently_used(self, tmp_path):
+        cache, encode = TextEmbeddingCache(tmp_path, memory_size=2), Encoder()
+        sets = [CLASSES[:2], CLASSES[:3], CLASSES]
+        for classes in sets: cache.get_or_compute("m", classes, lambda: encode(classes))
+        cache.get("m", sets[1])
+        assert cache.n_memory_hits == 1
+        for path in tmp_path.iterdir(): path.unlink()
+        assert cache.get("m", sets[2]) is not None and cache.get("m", sets[1]) is not None
+        assert cache.get("m", sets[0]) is None # Evicted from memory, gone from disk
+
+    def test_corrupt_file_is_recomputed(self, tmp_path):
+        cache, encode = TextEmbeddingCache(tmp_path), Encoder()
+        cache.path("m", CLASSES).parent.mkdir(parents=True, exist_ok=True)
+        cache.path("m", CLASSES).write_bytes(b"not a npy file")
+        assert cache.get_or_compute("m", CLASSES, lambda: encode(CLASSES)).shape == (1, 4, 512)
+        assert encode.calls == 1 and TextEmbeddingCache(tmp_path).get("m", CLASSES) is not None
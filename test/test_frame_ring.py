@@ -0,0 +1,62 @@
+import multiprocessing as mp
+
+import numpy as np
+import pytest
+
+from easysort.common.frame_ring import FrameReader, FrameRing
+
+
+def frame(value: int, shape=(4, 6, 3)) -> np.ndarray: return np.full(shape, value % 256, dtype=np.uint8)
+
+
+def produce(name: str, n: int):
+    ring = FrameRing.attach(name)
+    # The producer normally creates the ring, here the test owns it so a crashed child cannot leak it
+    for i in range(1, n + 1): ring.write(frame(i), timestamp=float(i))
+    ring.close()
+
+
+class TestFrameRing:
+    def test_write_and_read_in_order(self):
+        with FrameRing.create(n_slots=4, frame_shape=(4, 6, 3)) as ring:
+            reader = FrameReader(ring)
+            assert reader.next(timeout=0.01) is None and ring.latest() is None
+            for i in range(1, 4): ring.write(frame(i), timestamp=float(i))
+            views = [reader.next(timeout=0.1) for _ in range(3)]
+            assert [v.seq for v in views] == [1, 2, 3] and [v.timestamp for v in views] == [1.0, 2.0, 3.0]
+            assert all((v.frame == v.seq).all() for v in views) and reader.n_missed == 0
+            with pytest.raises(ValueError): views[0].frame[0, 0, 0] = 1
+
+    def test_in_place_acquire_and_attach_by_name(self):
+        with FrameRing.create(n_slots=3, frame_shape=(2, 2), dtype=np.float32) as ring:
+            ring.acquire()[:] = 7.5
+            assert ring.publish() == 1
+            other = FrameRing.attach(ring.name)
+            assert other.frame_shape == (2, 2) and other.dtype == np.float32 and other.n_slots == 3
+            latest = other.latest()
+            assert latest.seq == 1 and (latest.frame == 7.5).all()
+            other.close()
+
+    def test_overruns_are_detected(self):
+        with FrameRing.create(n_slots=4, frame_shape=(4, 6, 3)) as ring:
+            reader = FrameReader(ring)
+            ring.write(frame(1))
+            held = reader.next(timeout=0.1)
+            for i in range(2, 11): ring.write(frame(i))
+            assert not reader.still_valid(held) and reader.n_torn == 1
+            view = reader.next(timeout=0.1)
+            assert view.seq == 8 and reader.n_missed == 6 and (view.frame == 8).all() # Slot 7 may be the one being overwritten
+            assert FrameReader(ring, latest_only=True).next(timeout=0.1) is None
+            latest = FrameReader(ring, latest_only=True)
+            ring.write(frame(11)); ring.write(frame(12))
+            assert latest.next(timeout=0.1).seq == 12 and latest.n_missed == 1
+
+    def test_frames_cross_processes(self):
+        with FrameRing.create(n_slots=64, frame_shape=(4, 6, 3)) as ring:
+            reader = FrameReader(ring)
+            process = mp.get_context("spawn").Process(target=produce, args=(ring.name, 50))
+            process.start()
+            views = [reader.next(timeout=10) for _ in range(50)]
+            process.join(10)
+            assert process.exitcode == 0
+            assert [v.seq for v in views] == list(range(1, 51)) and all((v.frame == v.seq).all() for v in views)
@@ -0,0 +1,37 @@
+import struct
+
+import pytest
+
+from easysort.system.delta.framing import (FRAME_SIZE, Frame, FrameDecoder, Opcode, crc16, encode_frame, encode_status,
+                                           status_message)
+
+
+class TestFraming:
+    def test_crc_matches_ccitt_false_check_value(self):
+        assert crc16(b"123456789") == 0x29B1
+
+    def test_round_trip_split_across_reads(self):
+        frames = [encode_frame(i, Opcode.PICK, i * 1.5, 2.25, -3.0) for i in range(10)]
+        stream = b"".join(frames)
+        assert len(frames[0]) == FRAME_SIZE
+        decoder, decoded = FrameDecoder(), []
+        for i in range(0, len(stream), 7): decoded += decoder.feed(stream[i:i + 7])
+        assert decoded == [Frame(i, Opcode.PICK, 0, i * 1.5, 2.25, -3.0) for i in range(10)]
+
+    def test_resynchronises_after_noise_and_corruption(self):
+        corrupted = bytearray(encode_frame(2, Opcode.MOVE, 1.0, 1.0, 1.0)); corrupted[10] ^= 0xFF
+        decoder = FrameDecoder()
+        frames = decoder.feed(b"\x00garbage\xa5" + encode_frame(1, Opcode.DROP) + bytes(corrupted) + encode_frame(3, Opcode.ACK))
+        assert [frame.seq for frame in frames] == [1, 3]
+        assert decoder.n_crc_errors == 1 and decoder.n_discarded_bytes >= 9 + 1
+
+    @pytest.mark.parametrize("status,material,reason", [("success", "paper", "none"), ("fail", "plastic", "pickup_failure"),
+                                                        ("fail", "metal", "other")])
+    def test_status_round_trip(self, status, material, reason):
+        frame, = FrameDecoder().feed(encode_status(7, status, material, reason))
+        assert frame.seq == 7 and frame.opcode == Opcode.STATUS
+        assert status_message(frame) == f"{status}__{material}__{reason}"
+
+    def test_sequence_numbers_wrap(self):
+        frame, = FrameDecoder().feed(encode_frame(65536 + 5, Opcode.PICK))
+        assert frame.seq == 5 and struct.unpack_from("<H", encode_frame(0, Opcode.PICK))[0] == 0x5AA5
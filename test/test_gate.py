@@ -0,0 +1,119 @@
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from easysort.common.pipeline import sorting_pipeline
+from easysort.sorting.backends import DetectorBackend
+from easysort.sorting.classifier import Classifier
+from easysort.sorting.dataset import RECORDING_FPS, recording_frame_paths, recordings, replay_recording
+from easysort.sorting.gate import MotionGate
+
+SHAPE = (980, 1280, 3)
+
+
+def replay(n_frames: int, items: list = (), seed: int = 0, flicker: int = 8):
+    """
+    A recording like the data engine's, at RECORDING_FPS: an empty belt with sensor noise and lighting flicker,
+    plus items given as (first frame, y, size) moving 40 px per frame towards x = 0. Yields (timestamp, frame).
+    """
+    rng = np.random.default_rng(seed)
+    belt = np.linspace(40, 90, SHAPE[1], dtype=np.float32)[None, :, None].repeat(SHAPE[0], 0).repeat(3, 2)
+    for i in range(n_frames):
+        frame = belt + rng.normal(0, 3, SHAPE).astype(np.float32) + rng.integers(-flicker, flicker + 1)
+        for first, y, size in items:
+            x = SHAPE[1] - 40 * (i - first)
+            if i >= first and x + size > 0: frame[y:y + size, max(0, x):x + size] = 200
+        yield i / RECORDING_FPS, np.clip(frame, 0, 255).astype(np.uint8)
+
+
+def visible(i: int, items: list) -> bool:
+    return any(i >= first and SHAPE[1] - 40 * (i - first) + size > 0 and SHAPE[1] - 40 * (i - first) < SHAPE[1] for first, _, size in items)
+
+
+class FakeBackend(DetectorBackend):
+    classes = ["bottle"]
+
+    def __init__(self): self.n_frames = 0
+    def infer(self, frames):
+        self.n_frames += len(frames)
+        return [SimpleNamespace(xyxy=np.empty((0, 4)), data={}) for _ in frames]
+
+
+class TestMotionGate:
+    def test_empty_belt_is_skipped_except_for_refreshes(self):
+        gate = MotionGate(refresh_interval_s=1.0)
+        forwarded = [i for i, (t, frame) in enumerate(replay(50)) if gate(frame, t)]
+        assert forwarded == [0, 10, 20, 30, 40]
+        assert gate.n_forced == 4 and gate.skip_ratio == pytest.approx(0.9)
+
+    def test_without_refresh_only_the_first_frame_is_forwarded(self):
+        gate = MotionGate(refresh_interval_s=None)
+        assert [i for i, (t, frame) in enumerate(replay(30)) if gate(frame, t)] == [0]
+
+    def test_items_are_forwarded_while_they_move_through(self):
+        items = [(5, 300, 120), (20, 600, 60)]
+        gate = MotionGate(refresh_interval_s=None)
+        forwarded = {i for i, (t, frame) in enumerate(replay(70, items)) if gate(frame, t)}
+        with_items = {i for i in range(70) if visible(i, items)}
+        assert with_items - forwarded == set() # Every frame an item is in (or leaving) reaches the detector
+        assert forwarded - with_items <= {0} | {i + 1 for i in with_items} # Plus the frame after an item left
+        assert gate.n_skipped >= 70 - len(with_items) - 3
+
+    def test_global_brightness_change_is_not_motion(self):
+        gate = MotionGate(refresh_interval_s=None)
+        frame = next(replay(1))[1]
+        assert gate(frame, 0.0)
+        assert not gate(np.clip(frame.astype(np.int16) + 30, 0, 255).astype(np.uint8), 0.1)
+
+    def test_reset_forwards_the_next_frame(self):
+        gate = MotionGate(refresh_interval_s=None)
+        frames = [frame for _, frame in replay(3)]
+        assert gate(frames[0], 0.0) and not gate(frames[1], 0.1)
+        gate.reset()
+        assert gate(frames[2], 0.2) and gate.n_frames == 3 and gate.n_skipped == 1
+
+
+class TestGatedInference:
+    def test_classifier_skips_unchanged_frames(self):
+        backend = FakeBackend()
+        classifier = Classifier(backend=backend, gate=MotionGate(refresh_interval_s=None))
+        results = [classifier(frame) for _, frame in replay(20, [(10, 400, 100)])]
+        assert all(result is None for result in results[1:11]) and all(result is not None for result in results[11:])
+        assert backend.n_frames == 10
+
+    def test_pipeline_gate_stage(self):
+        frames = [frame for _, frame in replay(20)]
+        source = iter(frames)
+        def capture():
+            time.sleep(0.002)
+            return next(source)
+        backend, dispatched = FakeBackend(), []
+        classifier = Classifier(backend=backend)
+        with sorting_pipeline(capture, classifier, dispatched.append, queue_size=64, gate=MotionGate(refresh_interval_s=None)) as pipeline:
+            deadline = time.perf_counter() + 2
+            while pipeline.stages[0].is_alive and time.perf_counter() < deadline: time.sleep(0.01)
+            time.sleep(0.05)
+        assert [stage.name for stage in pipeline.stages] == ["capture", "gate", "inference", "world_transform", "dispatch"]
+        assert pipeline.stages[1].stats.skipped == 19 and backend.n_frames == len(dispatched) == 1
+
+
+class TestRecordings:
+    def test_recording_layout(self, tmp_path):
+        for name in ["belt_b", "belt_a"]: (tmp_path / "verified" / name).mkdir(parents=True)
+        for i in [10, 2, 1]: (tmp_path / "verified" / "belt_a" / f"frame_{i:04d}.jpg").touch()
+        assert [path.name for path in recordings("verified", tmp_path)] == ["belt_a", "belt_b"]
+        assert recordings("new", tmp_path) == []
+        assert [path.name for path in recording_frame_paths(tmp_path / "verified" / "belt_a")] == ["frame_0001.jpg", "frame_0002.jpg", "frame_0010.jpg"]
+        with pytest.raises(ValueError): recordings("unknown", tmp_path)
+
+    @pytest.mark.parametrize("state", ["verified", "labelled"])
+    def test_replayed_data_engine_recordings(self, state):
+        folders = recordings(state)
+        if not folders: pytest.skip(f"No {state} data engine recordings in data/")
+        pytest.importorskip("cv2")
+        for folder in folders:
+            gate = MotionGate()
+            for i, frame in enumerate(replay_recording(folder)): gate(frame, i / RECORDING_FPS)
+            assert gate.n_forwarded >= 1 and gate.n_frames == len(recording_frame_paths(folder))
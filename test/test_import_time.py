@@ -0,0 +1,35 @@
+import subprocess
+import sys
+from pathlib import Path
+
+# Heavy packages that must only be imported when a model is built or a frame is read, never by importing
+# easysort.sorting (tooling, tests and the data engine import it without running models)
+HEAVY_MODULES = {"cv2", "supervision", "inference", "torch", "torchvision", "ultralytics", "onnxruntime", "tinygrad", "clip"}
+MODULES = ["easysort.sorting." + name for name in ["backends", "batching", "benchmark", "calibration", "classifier", "dataset", "embedding_cache",
+                                                   "export", "gate", "infer_yoloWorld", "intercept", "metrics", "postprocess", "quantize",
+                                                   "scheduler", "tiling", "tracker", "yolov8_tinygrad"]]
+IMPORT_BUDGET_S = 0.5 # All of MODULES, ~0.06 s on a laptop with numpy and yaml most of it
+REPO_ROOT = Path(__file__).parents[1]
+
+
+def import_times(modules: list) -> list:
+    """(name, depth, cumulative seconds) of every module imported, from python -X importtime."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import " + ", ".join(modules)], cwd=REPO_ROOT,
+                            capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr[-2000:]
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line: continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times.append((name.strip(), (len(name) - len(name.lstrip()) - 1) // 2, int(cumulative) / 1e6))
+    return times
+
+
+class TestImportTime:
+    def test_no_heavy_modules_at_import(self):
+        leaked = sorted({name.split(".")[0] for name, _, _ in import_times(MODULES)} & HEAVY_MODULES)
+        assert not leaked, f"Importing easysort.sorting pulled in {leaked}, import them where they are used"
+
+    def test_import_budget(self):
+        total = sum(seconds for _, depth, seconds in import_times(MODULES) if depth == 0) # Nested imports are in their parent
+        assert total <= IMPORT_BUDGET_S, f"Importing easysort.sorting took {total:.2f} s, the budget is {IMPORT_BUDGET_S} s"
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from easysort.common.config import load_robot_config
+from easysort.common.motion import travel_time
+from easysort.sorting.intercept import InterceptSolver
+
+STEP_S = 1e-4
+
+
+def brute_force(solver: InterceptSolver, position, timestamp: float, robot_xy, t_free: float) -> float:
+    """Earliest time on a STEP_S grid at which the robot can be where the item is, ignoring reach_x."""
+    t = t_free + np.arange(0, 10, STEP_S)
+    item = solver.position(np.repeat([position], len(t), axis=0), timestamp, t)
+    return t[np.argmax(solver.travel_time(np.linalg.norm(item - robot_xy, axis=1)) <= t - t_free)]
+
+
+class TestInterceptSolver:
+    @pytest.mark.parametrize("spread", [0.5, 5.0, 40.0]) # Triangular and trapezoidal moves, and items next to the robot
+    def test_matches_brute_force(self, spread):
+        solver = InterceptSolver(conveyor_speed=8.727, max_speed=100.0, acceleration=400.0)
+        rng = np.random.default_rng(0)
+        positions = rng.normal(0, spread, (40, 2)) + [32.0, 20.0]
+        timestamps = rng.uniform(-0.5, 0.0, 40)
+        intercept = solver.solve(positions, timestamps, (32.0, 20.0), 0.1)
+        expected = [brute_force(solver, position, timestamp, (32.0, 20.0), 0.1) for position, timestamp in zip(positions, timestamps)]
+        np.testing.assert_allclose(intercept.t, expected, atol=2 * STEP_S)
+        np.testing.assert_allclose(intercept.positions, solver.position(positions, timestamps, intercept.t))
+        assert intercept.feasible.all()
+
+    def test_slow_robot_and_fast_belt(self):
+        solver = InterceptSolver(conveyor_speed=20.0, max_speed=30.0, acceleration=50.0)
+        positions = np.array([[60.0, 10.0], [0.0, 10.0], [10.0, 40.0]])
+        intercept = solver.solve(positions, 0.0, (20.0, 20.0), 0.0)
+        np.testing.assert_allclose(intercept.t, [brute_force(solver, position, 0.0, (20.0, 20.0), 0.0) for position in positions], atol=2 * STEP_S)
+
+    def test_reach_window(self):
+        solver = InterceptSolver(conveyor_speed=10.0, max_speed=100.0, acceleration=400.0, reach_x=(10.0, 50.0))
+        intercept = solver.solve([[80.0, 20.0], [5.0, 20.0]], 0.0, (30.0, 20.0), 0.0)
+        assert intercept.t[0] == pytest.approx(3.0) and intercept.positions[0, 0] == pytest.approx(50.0) # Waits for the item to enter
+        assert list(intercept.feasible) == [True, False]
+
+    def test_travel_time_and_validation(self):
+        np.testing.assert_allclose(travel_time([0.0, 4.0, 25.0, 125.0], 100.0, 400.0), [0.0, 0.2, 0.5, 1.5])
+        with pytest.raises(ValueError): InterceptSolver(conveyor_speed=10.0, max_speed=5.0, acceleration=10.0)
+        assert InterceptSolver.from_config(load_robot_config()).reach_x == (8.0, 56.0)
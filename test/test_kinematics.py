@@ -0,0 +1,59 @@
+import numpy as np
+
+from easysort.common.config import load_robot_config
+from easysort.system.delta.kinematics import DeltaKinematics, KinematicsLUT
+
+
+def belt_points(kinematics: DeltaKinematics, n: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return kinematics.to_robot(np.stack([rng.uniform(0, 64, n), rng.uniform(0, 49, n), rng.uniform(0, 15, n)], axis=1))
+
+
+class TestDeltaKinematics:
+    def test_forward_inverts_inverse(self):
+        kinematics = DeltaKinematics.from_config(load_robot_config())
+        points = belt_points(kinematics, 1000)
+        angles = kinematics.inverse(points)
+        assert kinematics.within_limits(angles).all() # The whole belt is in the workspace
+        np.testing.assert_allclose(kinematics.forward(angles), points, atol=1e-9)
+
+    def test_home_position_and_unreachable_points(self):
+        kinematics = DeltaKinematics(base_side=30.0, effector_side=8.0, upper_arm=30.0, forearm=60.0)
+        home = kinematics.forward(np.zeros((1, 3)))[0]
+        assert abs(home[0]) < 1e-9 and abs(home[1]) < 1e-9 and home[2] < 0 # Arms horizontal: straight below the base
+        np.testing.assert_allclose(kinematics.inverse(home), np.zeros((1, 3)), atol=1e-9)
+        assert np.isnan(kinematics.inverse([[0.0, 0.0, -200.0], [100.0, 0.0, -40.0]])).all()
+        assert not kinematics.reachable([[0.0, 0.0, -200.0]]).any()
+
+    def test_drop_positions_are_reachable(self):
+        config = load_robot_config()
+        kinematics = DeltaKinematics.from_config(config)
+        drops = np.array([[x, y, 10.0] for x, y in config.drop_positions.values()])
+        assert kinematics.reachable(kinematics.to_robot(drops)).all()
+
+    def test_move_time(self):
+        kinematics = DeltaKinematics(30.0, 8.0, 30.0, 60.0, joint_max_speed_deg_s=180.0, joint_acceleration_deg_s2=360.0)
+        # 135 degrees on the slowest joint: 1 s of ramps covering 90 degrees + 0.25 s at full speed. 10 degrees: triangular
+        np.testing.assert_allclose(kinematics.move_time(np.zeros((2, 3)), np.radians([[135.0, 10.0, 0.0], [10.0, 0.0, 0.0]])),
+                                   [1.25, 2 * np.sqrt(10.0 / 360.0)])
+
+
+class TestKinematicsLUT:
+    def test_matches_closed_form(self):
+        kinematics = DeltaKinematics.from_config(load_robot_config())
+        lut = KinematicsLUT(kinematics, resolution=1.0)
+        points = belt_points(kinematics, 5000, seed=1)
+        direct, interpolated = kinematics.inverse(points), lut.inverse(points)
+        assert lut.reachable(points).all()
+        assert np.degrees(np.abs(interpolated - direct).max()) < 0.05
+        np.testing.assert_allclose(kinematics.forward(interpolated), points, atol=0.02) # cm
+
+    def test_reachability_is_conservative(self):
+        kinematics = DeltaKinematics.from_config(load_robot_config())
+        lut = KinematicsLUT(kinematics, resolution=2.0)
+        rng = np.random.default_rng(2)
+        points = rng.uniform(lut.bounds[:, 0] - 5, lut.bounds[:, 1] + 5, (20000, 3))
+        lut_reachable, reachable = lut.reachable(points), kinematics.reachable(points)
+        assert not (lut_reachable & ~reachable).any()
+        assert lut_reachable.sum() > 0.8 * reachable.sum()
+        assert np.isnan(lut.inverse(points[~lut_reachable])).all()
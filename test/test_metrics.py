@@ -0,0 +1,36 @@
+import numpy as np
+
+from easysort.sorting.metrics import MeanAveragePrecision, iou_matrix, match, yolo_to_xyxy
+
+GT = np.array([[0, 0, 10, 10], [20, 20, 40, 40], [50, 0, 60, 20]], dtype=np.float64)
+GT_CLASS = np.array([0, 1, 0])
+
+
+class TestMetrics:
+    def test_perfect_predictions_score_one(self):
+        metric = MeanAveragePrecision(n_classes=3)
+        metric.update(GT, [0.9, 0.8, 0.7], GT_CLASS, GT, GT_CLASS)
+        result = metric.compute()
+        assert result.map50 == 1.0 and result.map50_95 == 1.0
+        assert np.isnan(result.ap50_per_class[2])
+
+    def test_wrong_class_and_duplicates_are_false_positives(self):
+        pred = np.array([GT[0], GT[0], GT[1]])
+        tp = match(pred, np.array([0.9, 0.8, 0.7]), np.array([0, 0, 0]), GT, GT_CLASS)
+        assert tp[:, 0].tolist() == [True, False, False]
+
+    def test_average_precision_of_a_ranked_list(self):
+        # One class, 2 ground truth boxes, ranked predictions: hit, miss, hit. Precision 1 up to recall 0.5,
+        # then 2/3 up to recall 1, so AP = (51 * 1 + 50 * 2/3) / 101 on the 101 recall points
+        gt = GT[[0, 2]]
+        pred = np.array([GT[0], [100, 100, 110, 110], GT[2]])
+        metric = MeanAveragePrecision(n_classes=1)
+        metric.update(pred, [0.9, 0.8, 0.7], [0, 0, 0], gt, [0, 0])
+        np.testing.assert_allclose(metric.compute().map50, (51 + 50 * 2 / 3) / 101)
+
+    def test_iou_thresholds_and_yolo_labels(self):
+        shifted = GT[:1] + [2, 0, 2, 0] # IoU 80 / 120
+        np.testing.assert_allclose(iou_matrix(shifted, GT[:1]), [[80 / 120]])
+        tp = match(shifted, np.array([0.9]), np.array([0]), GT[:1], np.array([0]))
+        assert tp[0].tolist() == [True] * 4 + [False] * 6
+        np.testing.assert_allclose(yolo_to_xyxy(np.array([[1, 0.5, 0.25, 0.2, 0.1]]), 100, 200), [[40, 40, 60, 60]])
@@ -0,0 +1,108 @@
+import itertools
+import time
+from queue import Empty
+
+import numpy as np
+import pytest
+
+from easysort.common.pipeline import LatestQueue, Pipeline, sorting_pipeline
+from easysort.sorting.tracker import Tracker
+
+
+def wait_until(predicate, timeout: float = 2.0):
+    deadline = time.perf_counter() + timeout
+    while not predicate() and time.perf_counter() < deadline: time.sleep(0.005)
+    return predicate()
+
+
+class TestLatestQueue:
+    def test_drops_oldest_when_full(self):
+        queue = LatestQueue(maxsize=2)
+        for i in range(5): queue.put(i)
+        assert queue.depth == 2 and queue.n_dropped == 3
+        assert [queue.get(timeout=0), queue.get(timeout=0)] == [3, 4]
+        with pytest.raises(Empty): queue.get(timeout=0.01)
+
+
+class TestPipeline:
+    def test_slow_stage_drops_frames_instead_of_adding_latency(self):
+        counter = itertools.count()
+        def capture(): time.sleep(0.001); return next(counter)
+        def slow_inference(frame): time.sleep(0.02); return frame
+        dispatched = []
+        stages = [("capture", capture), ("inference", slow_inference), ("dispatch", dispatched.append)]
+        with Pipeline(stages) as pipeline:
+            assert wait_until(lambda: len(dispatched) >= 5)
+        capture_stats, inference_stats, _ = pipeline.stats()
+        assert inference_stats.dropped > 0 and inference_stats.queue_depth <= 1
+        assert dispatched == sorted(dispatched) and dispatched[-1] - dispatched[0] > len(dispatched)
+        assert inference_stats.last_age_s < 0.1
+
+    def test_none_is_not_forwarded_and_errors_are_counted(self):
+        counter = itertools.count()
+        def capture(): time.sleep(0.001); return next(counter)
+        def gate(frame):
+            if frame % 3 == 0: raise ValueError("bad frame")
+            return frame if frame % 3 == 1 else None
+        seen = []
+        with Pipeline([("capture", capture), ("gate", gate), ("dispatch", seen.append)], queue_size=64) as pipeline:
+            assert wait_until(lambda: len(seen) >= 5)
+        _, gate_stats, _ = pipeline.stats()
+        assert gate_stats.errors > 0 and gate_stats.skipped > 0
+        assert all(frame % 3 == 1 for frame in seen)
+
+    def test_source_stops_on_end_of_input(self):
+        frames = iter(range(3))
+        seen = []
+        pipeline = Pipeline([("capture", lambda: next(frames)), ("dispatch", seen.append)], queue_size=8).start()
+        assert wait_until(lambda: not pipeline.stages[0].is_alive and len(seen) == 3)
+        pipeline.stop()
+
+    def test_failing_source_backs_off_and_recovers(self):
+        calls = []
+        def capture():
+            calls.append(time.perf_counter())
+            if len(calls) <= 6: raise TimeoutError("no frame") # Camera unplugged for a while
+            time.sleep(0.001)
+            return len(calls)
+        seen = []
+        with Pipeline([("capture", capture), ("dispatch", seen.append)], queue_size=8) as pipeline:
+            assert wait_until(lambda: len(seen) >= 3)
+        assert pipeline.stats()[0].errors == 6
+        gaps = [b - a for a, b in zip(calls[:6], calls[1:7])]
+        assert gaps[0] >= 0.01 and gaps[-1] >= 0.3 and all(b > a for a, b in zip(gaps, gaps[1:]))
+
+
+class Detections:
+    """The parts of sv.Detections the tracker uses."""
+
+    def __init__(self, world_xy, class_id, confidence):
+        self.data, self.class_id, self.confidence, self.tracker_id = {"world_xy": world_xy}, class_id, confidence, None
+
+    def __getitem__(self, index): return Detections(self.data["world_xy"][index], self.class_id[index], self.confidence[index])
+
+
+class TestSortingPipeline:
+    def test_tracker_gets_capture_times_not_processing_times(self):
+        speed, period = 50.0, 0.02 # cm/s, s between captures
+        rng = np.random.default_rng(0)
+        def capture():
+            time.sleep(period)
+            return time.perf_counter() # The frame shows the item where it is now
+        class Classifier:
+            def detect(self, t):
+                time.sleep(rng.uniform(0.0, 0.012)) # Inference latency jitter
+                return Detections(np.array([[60.0 - speed * (t - start), 10.0]]), np.array([0]), np.array([0.9]))
+            def cam_view_to_world_view(self, detections): return detections
+        tracker, timestamps = Tracker(n_classes=1, belt_velocity=(-speed, 0.0), velocity_gain=0.5), []
+        update = tracker.update
+        def recording_update(*args):
+            timestamps.append(time.monotonic() if args[3] is None else args[3]) # What the tracker uses
+            return update(*args)
+        tracker.update = recording_update
+        start = time.perf_counter()
+        with sorting_pipeline(capture, Classifier(), lambda items: None, queue_size=64, tracker=tracker):
+            assert wait_until(lambda: len(timestamps) >= 30)
+        spacing = np.diff(timestamps[:30])
+        assert abs(spacing.mean() - period) < 0.005 and spacing.std() < 0.003 # Latency jitter would add ~5 ms std
+        np.testing.assert_allclose(tracker.tracks().velocities, [[-speed, 0.0]], atol=1.0)
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from easysort.sorting.postprocess import Letterbox, batched_nms, box_iou, decode_yolov8, nms
+
+
+def random_boxes(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    xy = rng.uniform(0, 100, (n, 2))
+    wh = rng.uniform(5, 30, (n, 2))
+    return np.concatenate([xy, xy + wh], axis=1), rng.uniform(0, 1, n)
+
+
+def brute_force_nms(boxes, scores, iou_threshold):
+    keep = []
+    for i in np.argsort(-scores, kind="stable"):
+        if all(box_iou(boxes[i], boxes[[k]])[0] <= iou_threshold for k in keep): keep.append(i)
+    return keep
+
+
+class TestPostprocess:
+    def test_nms_matches_brute_force(self):
+        boxes, scores = random_boxes(200)
+        assert nms(boxes, scores, 0.45).tolist() == brute_force_nms(boxes, scores, 0.45)
+
+    def test_batched_nms_keeps_overlapping_boxes_of_other_classes(self):
+        boxes = np.array([[0, 0, 10, 10], [1, 1, 11, 11], [0, 0, 10, 10]], dtype=np.float32)
+        scores = np.array([0.9, 0.8, 0.7])
+        assert batched_nms(boxes, scores, np.array([0, 0, 1])).tolist() == [0, 2]
+        assert batched_nms(boxes[:0], scores[:0], np.array([], dtype=int)).tolist() == []
+
+    def test_decode_yolov8_undoes_letterbox(self):
+        # Frame 480x640 letterboxed into 320: scale 0.5, 40 px padding on top
+        box = Letterbox(0.5, 0, 40, (480, 640))
+        output = np.zeros((1, 4 + 3, 5), dtype=np.float32)
+        output[0, :4, 0] = [100, 100, 40, 20]    # Class 1, kept
+        output[0, 5, 0] = 0.9
+        output[0, :4, 1] = [101, 100, 40, 20]    # Duplicate of anchor 0, suppressed
+        output[0, 5, 1] = 0.8
+        output[0, :4, 2] = [100, 100, 40, 20]    # Same box, class 2, kept
+        output[0, 6, 2] = 0.7
+        output[0, :4, 3] = [200, 200, 10, 10]    # Below the confidence threshold
+        output[0, 4, 3] = 0.1
+        detections, = decode_yolov8(output, [box])
+        assert detections.class_id.tolist() == [1, 2]
+        np.testing.assert_allclose(detections.confidence, [0.9, 0.7])
+        np.testing.assert_allclose(detections.xyxy[0], [160, 100, 240, 140])
+
+    def test_letterbox_pads_and_scales(self):
+        pytest.importorskip("cv2")
+        from easysort.sorting.postprocess import letterbox, preprocess
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        frame[..., 2] = 255 # Red in BGR
+        image, box = letterbox(frame, 320)
+        assert image.shape == (320, 320, 3) and box == Letterbox(0.5, 0, 40, (480, 640))
+        assert (image[:40] == 114).all() and (image[40:280, :, 2] == 255).all()
+        batch, _ = preprocess([frame], 320)
+        assert batch.shape == (1, 3, 320, 320) and batch[0, 0, 100, 100] == 1.0 and batch[0, 2, 100, 100] == 0.0
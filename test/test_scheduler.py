@@ -0,0 +1,62 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from easysort.common.config import load_robot_config
+from easysort.sorting.scheduler import PickScheduler
+
+
+def make_scheduler(**kwargs) -> PickScheduler:
+    options = dict(conveyor_speed=10.0, max_speed=100.0, acceleration=400.0, reach_x=(0.0, 60.0), pick_time_s=0.2,
+                   drop_time_s=0.1, drop_positions={"plastic-bottle": [10.0, -10.0], "cardboard-box": [50.0, -10.0]})
+    options.update(kwargs)
+    return PickScheduler(**options)
+
+
+class TestPickScheduler:
+    def test_plan_is_feasible_and_ordered(self):
+        scheduler = make_scheduler(conveyor_speed=2.0)
+        rng = np.random.default_rng(0)
+        positions = np.stack([rng.uniform(0, 60, 30), rng.uniform(0, 40, 30)], axis=1)
+        classes = list(rng.choice(["plastic-bottle", "cardboard-box"], 30))
+        plan = scheduler.plan(positions, classes, (30.0, 20.0))
+        assert len(plan.order) == scheduler.horizon and len(set(plan.order)) == len(plan.order)
+        assert np.all(np.diff(plan.finish_times) > 0) and np.all(plan.pick_times < plan.finish_times)
+        _, t_leave = scheduler.solver.reach_times(positions[plan.order], 0.0)
+        assert np.all(plan.pick_times <= t_leave)
+        np.testing.assert_allclose(plan.pick_positions[:, 0], positions[plan.order, 0] - 2.0 * plan.pick_times)
+
+    def test_skips_unsorted_and_unreachable_items(self):
+        scheduler = make_scheduler()
+        positions = [[1.0, 20.0], [30.0, 20.0], [30.0, 20.0]] # The first item leaves reach before the robot gets there
+        plan = scheduler.plan(positions, ["plastic-bottle", "other", "cardboard-box"], (60.0, 40.0))
+        assert list(plan.order) == [2]
+
+    def test_prefers_short_cycles_over_smallest_x(self):
+        scheduler = make_scheduler(conveyor_speed=1.0)
+        positions = [[20.0, 40.0], [45.0, -5.0]] # The second item is right next to its container
+        plan = scheduler.plan(positions, ["plastic-bottle", "cardboard-box"], (50.0, -10.0))
+        assert list(plan.order) == [1, 0]
+
+    def test_plan_is_the_best_ordering(self):
+        scheduler = make_scheduler(conveyor_speed=3.0, horizon=3)
+        rng = np.random.default_rng(1)
+        for _ in range(20):
+            positions = np.stack([rng.uniform(0, 60, 6), rng.uniform(-10, 40, 6)], axis=1)
+            classes = list(rng.choice(["plastic-bottle", "cardboard-box"], 6))
+            containers = scheduler.class_indices(classes)
+            best = (0, 0.0) # (picks, -finish of the last pick) over all orderings, by brute force
+            for order in itertools.permutations(range(6), 3):
+                robot_xy, t, n = (40.0, -10.0), 0.0, 0
+                for item in order:
+                    finish, _, _ = scheduler._cycles(positions[[item]], containers[[item]], robot_xy, t)
+                    if finish[0] == np.inf: break
+                    robot_xy, t, n = scheduler.drop_positions[containers[item]], finish[0], n + 1
+                best = max(best, (n, -t))
+            plan = scheduler.plan(positions, classes, (40.0, -10.0))
+            assert len(plan.order) == best[0] and plan.finish_times[-1] == pytest.approx(-best[1])
+
+    def test_from_config(self):
+        scheduler = PickScheduler.from_config(load_robot_config())
+        assert scheduler.classes and scheduler.drop_positions.shape == (len(scheduler.classes), 2)
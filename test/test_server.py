@@ -0,0 +1,85 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from easysort.sorting.server import InferenceClient, InferenceServer
+
+
+class FakeClassifier:
+    """One detection per frame, its box made from the first pixels so results can be checked per frame."""
+    classes = ["bottle-plastic", "carton"]
+    max_batch_size, max_wait_s = 8, 0.02
+
+    def __init__(self): self.batch_sizes, self.n_warmups = [], 0
+    def warmup(self, **kwargs): self.n_warmups += 1
+
+    def infer_batch(self, frames):
+        self.batch_sizes.append(len(frames)); time.sleep(0.005)
+        if any(frame[1, 0, 0] for frame in frames): raise ValueError("bad frame")
+        return [SimpleNamespace(xyxy=np.array([frame[0, :4, 0]], dtype=np.float32), confidence=np.array([0.5]),
+                                class_id=np.array([int(frame[0, 0, 1]) % 2]), data={"world_xy": np.array([[1.0, 2.0]])}) for frame in frames]
+
+
+def frame(value: int, shape=(48, 64, 3), bad: bool = False) -> np.ndarray:
+    image = np.zeros(shape, dtype=np.uint8)
+    image[1, 0, 0] = bad
+    image[0, :4, 0] = [value, value + 1, value + 2, value + 3]
+    image[0, 0, 1] = value
+    return image
+
+
+class TestInferenceServer:
+    def test_clients_share_batches_and_get_their_own_results(self, tmp_path):
+        classifier = FakeClassifier()
+        results = {}
+        with InferenceServer(classifier, tmp_path / "inference.sock", keep_warm_s=None) as server:
+            def client_loop(client_id):
+                with InferenceClient(server.socket_path, timeout=5) as client:
+                    results[client_id] = [client.infer_raw(frame(10 * client_id + i)) for i in range(5)]
+            threads = [threading.Thread(target=client_loop, args=(c,)) for c in range(4)]
+            for thread in threads: thread.start()
+            for thread in threads: thread.join()
+            with InferenceClient(server.socket_path, timeout=5) as client: health = client.health()
+        assert classifier.n_warmups == 1 and server.n_requests == 20 and max(classifier.batch_sizes) > 1
+        for c in range(4):
+            for i, result in enumerate(results[c]):
+                value = 10 * c + i
+                assert result.xyxy.tolist() == [[value, value + 1, value + 2, value + 3]] and result.class_id.tolist() == [value % 2]
+                assert result.world_xy.tolist() == [[1.0, 2.0]]
+        assert health["status"] == "ok" and health["classes"] == FakeClassifier.classes and health["n_requests"] == 20
+        assert set(health["latency_ms"]) == {"p50", "p90", "p99"} and health["mean_batch_size"] > 1
+
+    def test_inference_errors_reach_the_client_and_server_keeps_serving(self, tmp_path):
+        with InferenceServer(FakeClassifier(), tmp_path / "inference.sock", keep_warm_s=None, warmup=False) as server:
+            with InferenceClient(server.socket_path, timeout=5) as client:
+                with pytest.raises(RuntimeError, match="bad frame"): client.infer_raw(frame(3, bad=True))
+                assert client.infer_raw(frame(3)).xyxy.tolist() == [[3, 4, 5, 6]]
+            assert server.n_errors == 1
+        assert not server.socket_path.exists()
+
+    def test_bad_frame_does_not_fail_other_clients_in_its_batch(self, tmp_path):
+        classifier = FakeClassifier()
+        classifier.max_wait_s = 0.2 # Long enough for every client's frame to join one batch
+        results, barrier = {}, threading.Barrier(4)
+        with InferenceServer(classifier, tmp_path / "inference.sock", keep_warm_s=None, warmup=False) as server:
+            def client_loop(client_id):
+                with InferenceClient(server.socket_path, timeout=5) as client:
+                    barrier.wait()
+                    try: results[client_id] = client.infer_raw(frame(10 * client_id, bad=client_id == 0)).xyxy.tolist()
+                    except RuntimeError as err: results[client_id] = str(err)
+            threads = [threading.Thread(target=client_loop, args=(c,)) for c in range(4)]
+            for thread in threads: thread.start()
+            for thread in threads: thread.join()
+            assert server.n_errors == 1
+        assert classifier.batch_sizes[0] == 4 # All four shared the failing batch
+        assert "bad frame" in results[0]
+        assert {c: results[c] for c in range(1, 4)} == {c: [[10 * c, 10 * c + 1, 10 * c + 2, 10 * c + 3]] for c in range(1, 4)}
+
+    def test_idle_server_is_kept_warm(self, tmp_path):
+        classifier = FakeClassifier()
+        with InferenceServer(classifier, tmp_path / "inference.sock", keep_warm_s=0.05, warmup=False):
+            time.sleep(0.3)
+        assert len(classifier.batch_sizes) >= 2
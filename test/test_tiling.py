@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+
+from easysort.sorting.backends import DetectorBackend
+from easysort.sorting.classifier import Classifier
+from easysort.sorting.postprocess import RawDetections, batched_nms
+from easysort.sorting.tiling import Tile, Tiler, cut_at_tile_edge, merge_nms, overlap_matrix, tile_grid
+
+FRAME_SHAPE = (980, 1280, 3)
+
+
+def raw(*boxes):
+    """RawDetections from (x0, y0, x1, y1, confidence, class_id) rows."""
+    rows = np.array(boxes, dtype=np.float32).reshape(-1, 6)
+    return RawDetections(rows[:, :4], rows[:, 4], rows[:, 5].astype(np.int64))
+
+
+class BrightPixelBackend(DetectorBackend):
+    """Detects the bounding box of the white pixels of every frame, like a model would see one item."""
+    classes = ["cap"]
+
+    def __init__(self): self.batch_sizes = []
+    def infer(self, frames):
+        import supervision as sv
+        self.batch_sizes.append(len(frames))
+        results = []
+        for frame in frames:
+            ys, xs = np.nonzero(frame[..., 0] == 255)
+            box = [[xs.min(), ys.min(), xs.max() + 1, ys.max() + 1]] if len(xs) else np.empty((0, 4))
+            results.append(sv.Detections(xyxy=np.asarray(box, dtype=np.float32), confidence=np.full(len(box), 0.9, dtype=np.float32),
+                                         class_id=np.zeros(len(box), dtype=int)))
+        return results
+
+
+class TestTileGrid:
+    @pytest.mark.parametrize("grid, overlap", [((1, 1), 0.0), ((2, 2), 0.2), ((2, 3), 0.25), ((3, 4), 0.1)])
+    def test_tiles_cover_the_frame_with_the_overlap(self, grid, overlap):
+        tiles = tile_grid(FRAME_SHAPE, grid, overlap)
+        assert len(tiles) == grid[0] * grid[1] and len({(t.x1 - t.x0, t.y1 - t.y0) for t in tiles}) == 1
+        covered = np.zeros(FRAME_SHAPE[:2], dtype=bool)
+        for tile in tiles: covered[tile.y0:tile.y1, tile.x0:tile.x1] = True
+        assert covered.all() and min(t.x0 for t in tiles) == 0 and max(t.x1 for t in tiles) == FRAME_SHAPE[1]
+        if grid[1] > 1:
+            width = tiles[0].x1 - tiles[0].x0
+            assert (tiles[0].x1 - tiles[1].x0) >= overlap * width - 1
+
+    def test_invalid_arguments(self):
+        with pytest.raises(ValueError): tile_grid(FRAME_SHAPE, (2, 2), 1.0)
+        with pytest.raises(ValueError): tile_grid(FRAME_SHAPE, (0, 2))
+        with pytest.raises(ValueError): Tiler(merge_metric="giou")
+
+
+class TestMerge:
+    def test_overlap_metrics(self):
+        big, inside = np.array([[0, 0, 100, 100]], dtype=np.float32), np.array([[0, 0, 50, 50]], dtype=np.float32)
+        assert overlap_matrix(big, inside, "ios")[0, 0] == pytest.approx(1.0)
+        assert overlap_matrix(big, inside, "iou")[0, 0] == pytest.approx(0.25)
+
+    def test_iou_merge_matches_batched_nms(self):
+        rng = np.random.default_rng(0)
+        top_left = rng.uniform(0, 500, (200, 2)).astype(np.float32)
+        boxes = np.concatenate([top_left, top_left + rng.uniform(20, 120, (200, 2)).astype(np.float32)], axis=1)
+        scores, class_ids = rng.uniform(0, 1, 200).astype(np.float32), rng.integers(0, 3, 200)
+        np.testing.assert_array_equal(merge_nms(boxes, scores, class_ids, 0.45, "iou"), batched_nms(boxes, scores, class_ids, 0.45))
+
+    def test_duplicates_across_tiles_become_one_box_in_frame_pixels(self):
+        tiler = Tiler(grid=(1, 2), overlap=0.2, full_frame=False)
+        left, right = tiler.tiles(FRAME_SHAPE)
+        # The same item in the overlap, seen by both tiles in their own pixels, and one item only the right tile sees
+        item = np.array([left.x1 - 60, 100, left.x1 - 10, 150], dtype=np.float32)
+        merged = tiler.merge([raw([*(item - [left.x0, 0, left.x0, 0]), 0.8, 0]),
+                              raw([*(item - [right.x0, 0, right.x0, 0]), 0.9, 0], [500, 500, 540, 540, 0.7, 0])], [left, right], FRAME_SHAPE)
+        np.testing.assert_allclose(merged.xyxy, [item, [right.x0 + 500, 500, right.x0 + 540, 540]])
+        np.testing.assert_allclose(merged.confidence, [0.9, 0.7])
+
+    def test_whole_box_wins_over_a_higher_scoring_cut_box(self):
+        tiler = Tiler(grid=(1, 2), overlap=0.2, full_frame=False)
+        left, right = tiler.tiles(FRAME_SHAPE)
+        whole = np.array([right.x0 + 10, 100, left.x1 + 80, 200], dtype=np.float32) # Whole only in the right tile
+        cut = [whole[0] - left.x0, 100, left.x1 - left.x0, 200]
+        assert cut_at_tile_edge(np.array([cut], dtype=np.float32), left, FRAME_SHAPE).all()
+        merged = tiler.merge([raw([*cut, 0.95, 0]), raw([*(whole - [right.x0, 0, right.x0, 0]), 0.6, 0])], [left, right], FRAME_SHAPE)
+        np.testing.assert_allclose(merged.xyxy, [whole])
+
+    def test_frame_edges_are_not_cuts_and_classes_stay_apart(self):
+        tile = Tile(0, 0, 700, 540)
+        boxes = np.array([[0, 0, 50, 50], [650, 100, 700, 150], [100, 538, 150, 540]], dtype=np.float32)
+        assert cut_at_tile_edge(boxes, tile, FRAME_SHAPE).tolist() == [False, True, True]
+        merged = Tiler(full_frame=False).merge([raw([0, 0, 50, 50, 0.9, 0], [0, 0, 50, 50, 0.8, 1])], [tile], FRAME_SHAPE)
+        assert merged.class_id.tolist() == [0, 1]
+
+    def test_no_detections(self):
+        tiler = Tiler()
+        tiles = tiler.tiles(FRAME_SHAPE)
+        merged = tiler.merge([raw() for _ in tiles], tiles, FRAME_SHAPE)
+        assert merged.xyxy.shape == (0, 4) and len(merged.confidence) == len(merged.class_id) == 0
+
+
+class TestTiledClassifier:
+    def test_tiles_run_as_one_batch_and_map_back_to_the_frame(self):
+        pytest.importorskip("supervision")
+        backend = BrightPixelBackend()
+        classifier = Classifier(backend=backend, tiler=Tiler(grid=(2, 2), overlap=0.2))
+        frame = np.zeros(FRAME_SHAPE, dtype=np.uint8)
+        frame[500:530, 600:620] = 255 # A cap in the overlap of all four tiles
+        detections = classifier.detect(frame)
+        assert backend.batch_sizes == [5] # Four tiles and the full frame
+        np.testing.assert_allclose(detections.xyxy, [[600, 500, 620, 530]])
+        assert detections.data["class_name"].tolist() == ["cap"]
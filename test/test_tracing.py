@@ -0,0 +1,136 @@
+import asyncio
+import itertools
+import json
+import time
+
+import numpy as np
+import pytest
+
+from easysort.common.datasaver import DataSaver
+from easysort.common.pipeline import Pipeline
+from easysort.common.tracing import END_TO_END, TRACER, Histogram, Tracer, trace_id_str
+from easysort.sorting.tracker import Tracker
+from easysort.system.delta.delta_connector import DeltaConnector
+from easysort.system.delta.simulator import spawn_simulator
+
+
+@pytest.fixture
+def tracer():
+    TRACER.reset(); TRACER.enable()
+    yield TRACER
+    TRACER.disable(); TRACER.reset()
+
+
+@pytest.fixture
+def robot():
+    process, port = spawn_simulator("--move-time", "0.02", "--material", "paper")
+    yield port
+    process.kill(); process.wait()
+
+
+class TestTracer:
+    def test_disabled_tracer_records_nothing(self):
+        tracer = Tracer()
+        with tracer.trace(("frame", 1)), tracer.span("inference"): pass
+        tracer.record("serial_send", 0, 10, ("item", 1)); tracer.link(("item", 1), ("frame", 1))
+        assert not tracer.spans and not tracer.histograms and not tracer.links and tracer.finish_item(("item", 1)) is None
+
+    def test_spans_use_the_current_trace(self):
+        tracer = Tracer(enabled=True)
+        with tracer.trace(("frame", 7)):
+            with tracer.span("inference"):
+                with tracer.span("preprocess"): time.sleep(0.001)
+            with tracer.span("scheduling", ("item", 2)): pass
+        with tracer.span("gate"): pass
+        assert [(s.name, s.trace_id) for s in tracer.spans] == [("preprocess", ("frame", 7)), ("inference", ("frame", 7)),
+                                                                 ("scheduling", ("item", 2)), ("gate", None)]
+        preprocess, inference = tracer.spans[0], tracer.spans[1]
+        assert inference.start_ns <= preprocess.start_ns and preprocess.end_ns <= inference.end_ns
+        assert preprocess.end_ns - preprocess.start_ns >= 1_000_000
+
+    def test_item_timeline_and_end_to_end(self):
+        tracer = Tracer(enabled=True)
+        tracer.record("capture", 1_000, 2_000, ("frame", 1))
+        tracer.record("inference", 2_000, 5_000, ("frame", 1))
+        tracer.record("inference", 9_000, 12_000, ("frame", 2))
+        tracer.record("capture", 20_000, 21_000, ("frame", 3)) # Not linked to the item
+        for frame in [1, 2, 1]: tracer.link(("item", 0), ("frame", frame))
+        tracer.record("serial_send", 13_000, 14_000, ("item", 0))
+        assert tracer.links[("item", 0)] == [("frame", 1), ("frame", 2)]
+        assert [(s.name, s.trace_id[1]) for s in tracer.timeline(("item", 0))] == [("capture", 1), ("inference", 1), ("inference", 2), ("serial_send", 0)]
+        assert tracer.finish_item(("item", 0), end_ns=30_000) == 29_000
+        assert tracer.histograms[END_TO_END].n == 1
+
+    def test_histogram_percentiles_are_within_a_bucket(self):
+        histogram, durations = Histogram(), np.random.default_rng(0).lognormal(np.log(2e6), 0.5, 10_000).astype(int)
+        for duration in durations: histogram.add(int(duration))
+        for q in [50, 90, 99]:
+            assert histogram.percentile(q) == pytest.approx(np.percentile(durations, q), rel=0.1)
+        assert histogram.summary()["max_ms"] == durations.max() / 1e6 and histogram.n == len(durations)
+
+    def test_summary_dump_and_chrome_trace(self, tmp_path):
+        tracer = Tracer(enabled=True)
+        tracer.record("datasaver_update", 0, 3_000_000, ("item", 1))
+        tracer.record("capture", 0, 1_000_000, ("frame", 4))
+        tracer.record("custom", 0, 1_000, None)
+        tracer.link(("item", 1), ("frame", 4))
+        assert list(tracer.summary()) == ["capture", "datasaver_update", "custom"]
+        summary = tracer.dump(tmp_path / "summary.json")
+        assert json.loads((tmp_path / "summary.json").read_text()) == summary and summary["capture"]["count"] == 1
+        trace = json.loads(tracer.export_chrome_trace(tmp_path / "trace.json").read_text())
+        events = trace["traceEvents"]
+        assert [(e["name"], e["ph"], e["args"]["id"]) for e in events] == [("datasaver_update", "X", "item:1"), ("capture", "X", "frame:4"), ("custom", "X", "")]
+        assert events[0]["dur"] == pytest.approx(3_000) and trace["otherData"]["links"] == {"item:1": ["frame:4"]}
+
+    def test_bounded_memory(self):
+        tracer = Tracer(enabled=True, max_spans=10)
+        for i in range(100): tracer.record("capture", i, i + 1, ("frame", i)); tracer.link(("item", i), ("frame", i))
+        assert len(tracer.spans) == 10 and len(tracer.links) == 10 and tracer.histograms["capture"].n == 100
+        assert trace_id_str(("item", 3)) == "item:3"
+
+    def test_span_cost(self):
+        tracer, n = Tracer(enabled=True), 20_000
+        start = time.perf_counter()
+        with tracer.trace(("frame", 1)):
+            for _ in range(n):
+                with tracer.span("inference"): pass
+        assert (time.perf_counter() - start) / n < 20e-6
+
+
+class TestInstrumentation:
+    def test_pipeline_stages_are_traced_per_frame(self, tracer):
+        counter = itertools.count(1)
+        def capture():
+            time.sleep(0.001)
+            return next(counter)
+        def inference(frame):
+            with TRACER.span("preprocess"): return frame
+        seen = []
+        with Pipeline([("capture", capture), ("inference", inference), ("dispatch", seen.append)], queue_size=64):
+            deadline = time.perf_counter() + 2
+            while len(seen) < 5 and time.perf_counter() < deadline: time.sleep(0.005)
+        frame = ("frame", seen[0])
+        assert {span.name for span in tracer.timeline(frame)} == {"capture", "inference", "preprocess", "dispatch"}
+        assert {"capture", "inference", "preprocess", "dispatch"} <= set(tracer.summary())
+
+    def test_tracker_links_items_to_their_frames(self, tracer):
+        tracker = Tracker(n_classes=2, belt_velocity=(-10.0, 0.0), min_hits=2)
+        for frame in [1, 2, 3]:
+            with TRACER.trace(("frame", frame)):
+                tracker.update(np.array([[50.0 - frame, 10.0]]), np.array([0]), timestamp=frame * 0.1)
+        assert tracer.links[("item", 0)] == [("frame", 1), ("frame", 2)] # First seen, then reported
+
+    def test_robot_and_datasaver_spans_end_the_item(self, tracer, robot, tmp_path):
+        item = ("item", 5)
+        tracer.record("capture", time.perf_counter_ns(), time.perf_counter_ns(), ("frame", 1))
+        tracer.link(item, ("frame", 1))
+        async def run():
+            async with DeltaConnector(robot) as connector: return await connector.pick(10.0, 2.0, 0.0, trace_id=item)
+        status = asyncio.run(run())
+        datasaver = DataSaver(tmp_path / "database.json")
+        assert datasaver.decode(status, save=True, trace_id=item) == ("success", "paper", "none")
+        timeline = tracer.timeline(item)
+        assert [span.name for span in timeline] == ["capture", END_TO_END, "serial_send", "robot_ack", "robot_move", "datasaver_update"]
+        capture, end_to_end, robot_move = timeline[0], timeline[1], timeline[4]
+        assert end_to_end.start_ns == capture.start_ns and end_to_end.end_ns >= timeline[-1].end_ns
+        assert robot_move.end_ns - robot_move.start_ns >= 15_000_000 # The simulated move time
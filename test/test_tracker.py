@@ -0,0 +1,59 @@
+import numpy as np
+
+from easysort.sorting.tracker import Tracker, associate, nearby_pairs
+
+
+def belt_frames(n_items: int, n_frames: int, speed: float = 10.0, fps: float = 30.0, noise: float = 0.2, seed: int = 0):
+    """Detections of items moving towards x = 0, in shuffled order, as (timestamp, positions, item indices)."""
+    rng = np.random.default_rng(seed)
+    start = np.stack([rng.uniform(20, 60, n_items), np.linspace(2, 47, n_items)], axis=1)
+    for frame in range(n_frames):
+        t = frame / fps
+        order = rng.permutation(n_items)
+        yield t, start[order] + [-speed * t, 0.0] + rng.normal(0, noise, (n_items, 2)), order
+
+
+class TestTracker:
+    def test_associate_prefers_cheapest_pairs_and_gates(self):
+        cost = np.array([[1.0, 0.5, 9.0], [0.4, 3.0, 9.0], [9.0, 9.0, 9.0]])
+        rows, cols = associate(cost, max_cost=2.0)
+        assert sorted(zip(rows.tolist(), cols.tolist())) == [(0, 1), (1, 0)]
+
+    def test_nearby_pairs_matches_brute_force(self):
+        rng = np.random.default_rng(0)
+        a, b = rng.uniform(0, 20, (50, 2)), rng.uniform(0, 20, (60, 2))
+        i, j, distances = nearby_pairs(a, b, 2.0)
+        dense = np.sqrt(((a[:, None] - b[None]) ** 2).sum(axis=2))
+        assert sorted(zip(i.tolist(), j.tolist())) == sorted(zip(*map(list, np.nonzero(dense <= 2.0))))
+        np.testing.assert_allclose(distances, dense[i, j])
+
+    def test_ids_persist_across_frames(self):
+        tracker = Tracker(n_classes=2, belt_velocity=(-10.0, 0.0))
+        ids_per_item = {}
+        for t, positions, items in belt_frames(20, 30):
+            track_ids, _ = tracker.update(positions, np.zeros(len(positions)), timestamp=t)
+            for item, track_id in zip(items, track_ids): ids_per_item.setdefault(item, set()).add(track_id)
+        assert all(len(ids) == 1 for ids in ids_per_item.values()) and tracker.n_tracks_started == 20
+        np.testing.assert_allclose(tracker.tracks().velocities, [[-10.0, 0.0]] * 20, atol=1.0)
+
+    def test_one_event_per_item_with_voted_class(self):
+        tracker = Tracker(n_classes=3, belt_velocity=(-10.0, 0.0), min_hits=5)
+        rng = np.random.default_rng(1)
+        events = []
+        for t, positions, items in belt_frames(10, 20):
+            class_ids = np.where(rng.random(len(items)) < 0.3, 2, items % 2) # 30% of detections get the wrong class
+            _, new = tracker.update(positions, class_ids, rng.uniform(0.5, 1.0, len(items)), timestamp=t)
+            events.extend(items[new])
+        assert sorted(events) == list(range(10))
+        tracks = tracker.tracks()
+        first_frame_items = next(belt_frames(10, 1))[2] # Tracks were started in this order
+        assert np.array_equal(tracks.class_ids, first_frame_items % 2)
+
+    def test_missed_detections_and_expiry(self):
+        tracker = Tracker(n_classes=1, belt_velocity=(-10.0, 0.0), max_age_s=0.2)
+        first, _ = tracker.update([[30.0, 10.0]], [0], timestamp=0.0)
+        again, _ = tracker.update([[29.0, 10.0]], [0], timestamp=0.1)  # Predicted at 29.0
+        skipped, _ = tracker.update([[27.0, 10.0]], [0], timestamp=0.3) # Missed a frame, still within max_age_s
+        assert first[0] == again[0] == skipped[0]
+        later, _ = tracker.update([[10.0, 10.0]], [0], timestamp=2.0)
+        assert later[0] != first[0] and len(tracker) == 1
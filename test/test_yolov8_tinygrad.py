@@ -0,0 +1,118 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from easysort.sorting.export import DEFAULT_WEIGHTS_PATH
+from easysort.sorting.metrics import iou_matrix
+from easysort.sorting.postprocess import DEFAULT_CONF_THRESHOLD, DEFAULT_INPUT_SIZE, decode_yolov8, preprocess
+from easysort.sorting.yolov8_tinygrad import make_anchors, read_safetensors
+
+PRETRAINED_WEIGHTS_PATH = Path(__file__).parents[1] / "easysort" / "sorting" / "yolov8n.pt" # The training starting point
+
+
+def write_safetensors(path, tensors: dict, metadata: dict):
+    header, offset, blobs = {"__metadata__": metadata}, 0, []
+    for name, array in tensors.items():
+        blob = np.ascontiguousarray(array).tobytes()
+        header[name] = {"dtype": {np.float32: "F32", np.float16: "F16"}[array.dtype.type], "shape": list(array.shape),
+                        "data_offsets": [offset, offset + len(blob)]}
+        offset += len(blob); blobs.append(blob)
+    encoded = json.dumps(header).encode()
+    path.write_bytes(len(encoded).to_bytes(8, "little") + encoded + b"".join(blobs))
+
+
+def random_yolov8(n_classes: int = 4, width: int = 8, seed: int = 0) -> dict:
+    """Fused state dict with the yolov8.yaml layout: channel multiples of width, one bottleneck per C2f."""
+    rng = np.random.default_rng(seed)
+    weights = {}
+    def conv(prefix, c1, c2, k, plain=False):
+        key = prefix if plain else f"{prefix}.conv"
+        weights[f"{key}.weight"] = rng.normal(0, 0.5 / np.sqrt(c1 * k * k), (c2, c1, k, k)).astype(np.float32)
+        weights[f"{key}.bias"] = rng.normal(0, 0.1, c2).astype(np.float32)
+    def c2f(i, c1, c2):
+        conv(f"model.{i}.cv1", c1, c2, 1); conv(f"model.{i}.cv2", c2 // 2 * 3, c2, 1)
+        conv(f"model.{i}.m.0.cv1", c2 // 2, c2 // 2, 3); conv(f"model.{i}.m.0.cv2", c2 // 2, c2 // 2, 3)
+    c = [width * m for m in (1, 2, 4, 8, 16)]
+    conv("model.0", 3, c[0], 3); conv("model.1", c[0], c[1], 3); c2f(2, c[1], c[1]); conv("model.3", c[1], c[2], 3)
+    c2f(4, c[2], c[2]); conv("model.5", c[2], c[3], 3); c2f(6, c[3], c[3]); conv("model.7", c[3], c[4], 3); c2f(8, c[4], c[4])
+    conv("model.9.cv1", c[4], c[4] // 2, 1); conv("model.9.cv2", c[4] * 2, c[4], 1)
+    c2f(12, c[4] + c[3], c[3]); c2f(15, c[3] + c[2], c[2]); conv("model.16", c[2], c[2], 3); c2f(18, c[2] + c[3], c[3])
+    conv("model.19", c[3], c[3], 3); c2f(21, c[3] + c[4], c[4])
+    for i, channels in enumerate([c[2], c[3], c[4]]):
+        conv(f"model.22.cv2.{i}.0", channels, 64, 3); conv(f"model.22.cv2.{i}.1", 64, 64, 3); conv(f"model.22.cv2.{i}.2", 64, 64, 1, plain=True)
+        conv(f"model.22.cv3.{i}.0", channels, c[2], 3); conv(f"model.22.cv3.{i}.1", c[2], c[2], 3); conv(f"model.22.cv3.{i}.2", c[2], n_classes, 1, plain=True)
+    return weights
+
+
+class TestYOLOv8Tinygrad:
+    def test_read_safetensors_roundtrip(self, tmp_path):
+        tensors = {"a.weight": np.arange(6, dtype=np.float32).reshape(2, 3), "b.bias": np.ones(3, dtype=np.float16)}
+        write_safetensors(tmp_path / "model.safetensors", tensors, {"names": json.dumps({"0": "carton"})})
+        loaded, metadata = read_safetensors(tmp_path / "model.safetensors")
+        assert json.loads(metadata["names"]) == {"0": "carton"}
+        for name, array in tensors.items():
+            assert loaded[name].dtype == array.dtype and np.array_equal(loaded[name], array)
+
+    def test_anchors_cover_every_level(self):
+        anchors, strides = make_anchors(64)
+        assert anchors.shape == (2, 64 + 16 + 4) and strides.shape == (1, 84)
+        assert anchors[:, 0].tolist() == [0.5, 0.5] and anchors[:, 9].tolist() == [1.5, 1.5]
+        assert strides[0, 63] == 8 and strides[0, 64] == 16 and strides[0, -1] == 32
+
+    def test_model_output_layout(self, tmp_path):
+        pytest.importorskip("tinygrad")
+        from easysort.sorting.yolov8_tinygrad import YOLOv8
+        model = YOLOv8(random_yolov8(n_classes=4), ["a", "b", "c", "d"], input_size=64)
+        batch = np.random.default_rng(0).uniform(0, 1, (2, 3, 64, 64)).astype(np.float32)
+        outputs = [model.run(batch) for _ in range(3)] # Plain, JIT capture, JIT replay
+        assert outputs[0].shape == (2, 4 + 4, 84)
+        np.testing.assert_allclose(outputs[2], outputs[0], rtol=1e-4, atol=1e-4)
+        assert ((outputs[0][:, 4:] >= 0) & (outputs[0][:, 4:] <= 1)).all()
+        assert (outputs[0][:, 2:4] >= 0).all()
+
+
+@pytest.fixture(scope="module")
+def checkpoint():
+    """The trained weights, or the pretrained ones training starts from: parity holds for any YOLOv8 weights."""
+    for module in ["tinygrad", "torch", "ultralytics", "safetensors", "cv2"]: pytest.importorskip(module)
+    for path in [DEFAULT_WEIGHTS_PATH, PRETRAINED_WEIGHTS_PATH]:
+        if path.exists(): return path
+    pytest.skip(f"No YOLOv8 weights at {DEFAULT_WEIGHTS_PATH} or {PRETRAINED_WEIGHTS_PATH}")
+
+
+def assert_detections_match(expected, actual, margin: float = 0.01):
+    """Every detection clearly above the threshold in one has a same-class twin in the other, within tolerance."""
+    for a, b in [(expected, actual), (actual, expected)]:
+        confident = a.confidence >= DEFAULT_CONF_THRESHOLD + margin
+        assert len(b.xyxy) or not confident.any()
+        if not confident.any(): continue
+        iou = iou_matrix(a.xyxy[confident].astype(np.float64), b.xyxy.astype(np.float64))
+        iou[a.class_id[confident][:, None] != b.class_id[None]] = 0
+        best = iou.argmax(axis=1)
+        assert (iou[np.arange(len(best)), best] >= 0.99).all()
+        np.testing.assert_allclose(b.xyxy[best], a.xyxy[confident], atol=0.5)        # frame pixels
+        np.testing.assert_allclose(b.confidence[best], a.confidence[confident], atol=1e-3)
+
+
+class TestParityWithUltralytics:
+    def test_same_output_as_ultralytics_for_the_same_weights(self, tmp_path, checkpoint):
+        import torch
+        from easysort.sorting.backends import TinygradBackend, UltralyticsBackend
+        from easysort.sorting.dataset import load_images
+        from easysort.sorting.export import export_safetensors
+        frame = load_images("test", 1)[0]
+        reference = UltralyticsBackend(weights_path=checkpoint)
+        port = TinygradBackend(weights_path=export_safetensors(checkpoint, tmp_path / "model.safetensors"))
+        assert port.classes == reference.classes
+
+        batch, boxes = preprocess([frame], DEFAULT_INPUT_SIZE) # The same input for both, raw outputs must agree
+        torch_model = reference.model.model.fuse(verbose=False).eval()
+        with torch.no_grad(): expected = torch_model(torch.from_numpy(batch))
+        expected = (expected[0] if isinstance(expected, (list, tuple)) else expected).numpy()
+        actual = port.model.run(batch)
+        assert actual.shape == expected.shape == (1, 4 + len(port.classes), actual.shape[2])
+        np.testing.assert_allclose(actual[:, :4], expected[:, :4], atol=0.05) # input pixels
+        np.testing.assert_allclose(actual[:, 4:], expected[:, 4:], atol=1e-3)
+        assert_detections_match(decode_yolov8(expected, boxes)[0], decode_yolov8(actual, boxes)[0])